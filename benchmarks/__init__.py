@@ -0,0 +1 @@
+__all__ = ["bench_screenshot", "bench_spatial_hash", "bench_suite"]
@@ -0,0 +1,65 @@
+"""Micro-benchmark of the observation path of the DQN environment.
+
+Compares the previous screenshot path (serialization + PIL + float64 division +
+transpose + float32 copy) with the direct buffer view of get_game_screenshot()
+writing into a preallocated buffer.
+
+Usage: python -m benchmarks.bench_screenshot [--steps N]
+"""
+import argparse
+import os
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from PIL import Image
+
+from dqn.dqn_game_api import init_game, render_game, get_game_screenshot
+from utils.classes.game_context import GameContext
+
+
+def legacy_screenshot(context: GameContext) -> np.ndarray:
+    """Screenshot path used before the direct buffer view (four frame copies)."""
+    screen_str = pygame.image.tostring(context.game_window, "RGB")
+    pil_image = Image.frombytes("RGB",
+                                (context.game_window.get_width(),
+                                    context.game_window.get_height()),
+                                screen_str)
+    res = np.transpose(np.asarray(pil_image) / 255.0, (1, 0, 2))
+    return np.array(res, dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=200,
+                        help="Number of screenshots for each measurement.")
+    args = parser.parse_args()
+
+    context = init_game(headless=True)
+    render_game(context)
+    shape = (context.width, context.height, 3)
+    float_buffer = np.empty(shape, dtype=np.float32)
+    uint8_buffer = np.empty(shape, dtype=np.uint8)
+
+    assert np.allclose(legacy_screenshot(context),
+                       get_game_screenshot(context, float_buffer))
+
+    paths = {
+        "legacy": lambda: legacy_screenshot(context),
+        "float32_new_array": lambda: get_game_screenshot(context),
+        "float32_preallocated": lambda: get_game_screenshot(context, float_buffer),
+        "uint8_preallocated": lambda: get_game_screenshot(context, uint8_buffer, normalize=False),
+    }
+    legacy_time = None
+    for name, screenshot_fn in paths.items():
+        step_time = min(timeit.repeat(screenshot_fn, number=args.steps, repeat=3)) / args.steps
+        legacy_time = legacy_time or step_time
+        print(f"{name:>22}: {step_time * 1e3:7.3f} ms/step "
+              f"(saves {(legacy_time - step_time) * 1e3:6.3f} ms, x{legacy_time / step_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark of the bullet hit checks: brute force against the spatial hash.
+
+For each number of ships and bullets, measures the time of checking the hits
+of all the bullets against all the ships with the brute force pass of the
+BulletPool (one pass over all the bullets per ship) and with the SpatialHash
+(one grid build plus one query per ship), and reports the crossover point.
+
+Each time is the median of several repetitions, reported with the spread
+(min-max) of the repetitions. The grid only counts as faster when its slowest
+repetition beats the fastest one of the brute force, so a crossover is not
+reported from the noise of a single run. The crossover is also given as
+ships x bullets pairs, the unit of SPATIAL_HASH_MIN_PAIRS.
+
+Usage: python -m benchmarks.bench_spatial_hash [--repeat N]
+"""
+import argparse
+import os
+import random
+import statistics
+import timeit
+from typing import Callable, List, Tuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+from pygame import Rect
+
+from utils.classes.bullet_pool import BulletPool
+from utils.classes.spatial_hash import SpatialHash
+from utils.config import WINDOW_WIDTH, WINDOW_HEIGHT, SPACESHIP_WIDTH, SPACESHIP_HEIGHT
+from utils.config import BULLET_WIDTH, BULLET_HEIGHT, BULLET_DAMAGE, SPATIAL_HASH_CELL_SIZE
+
+
+BULLET_COUNTS = (2, 8, 32, 128, 512, 2048, 8192, 32768)
+SHIP_COUNTS = (2, 8, 32, 128)
+
+
+def create_scene(n_ships: int, n_bullets: int, rng: random.Random):
+    """Creates ships bodies and a pool of bullets at random positions."""
+    ships = [Rect(rng.randrange(WINDOW_WIDTH - SPACESHIP_HEIGHT),
+                  rng.randrange(WINDOW_HEIGHT - SPACESHIP_WIDTH),
+                  SPACESHIP_HEIGHT, SPACESHIP_WIDTH) for _ in range(n_ships)]
+    bullets = BulletPool(n_bullets)
+    for _ in range(n_bullets):
+        bullets.spawn(rng.randrange(WINDOW_WIDTH), rng.randrange(WINDOW_HEIGHT),
+                      BULLET_WIDTH, BULLET_HEIGHT, 7, BULLET_DAMAGE, rng.randrange(2))
+    return ships, bullets
+
+
+def brute_force_checks(ships: List[Rect], bullets: BulletPool) -> Callable[[], None]:
+    """Returns the hit checks with one pass over all the bullets per ship."""
+    def check() -> None:
+        for ship_idx, ship in enumerate(ships):
+            bullets.find_hits(ship, ship_idx % 2)
+    return check
+
+
+def spatial_hash_checks(ships: List[Rect], bullets: BulletPool) -> Callable[[], None]:
+    """Returns the hit checks with a grid build and a query per ship."""
+    grid = SpatialHash((WINDOW_WIDTH, WINDOW_HEIGHT), SPATIAL_HASH_CELL_SIZE)
+
+    def check() -> None:
+        grid.build(bullets.x, bullets.y, bullets.width, bullets.height, bullets.active)
+        for ship_idx, ship in enumerate(ships):
+            slots = grid.query(ship)
+            slots[bullets.owner[slots] == ship_idx % 2]
+    return check
+
+
+def measure(check: Callable[[], None], repeat: int, number: int = 200) -> Tuple[float, float, float]:
+    """Returns the (median, min, max) seconds of a call over the repetitions."""
+    times = [time / number for time in timeit.repeat(check, number=number, repeat=repeat)]
+    return statistics.median(times), min(times), max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7,
+                        help="Repetitions of each measurement (at least 3).")
+    args = parser.parse_args()
+    if args.repeat < 3:
+        parser.error("At least 3 repetitions are needed to report the spread.")
+
+    rng = random.Random(0)
+    for n_ships in SHIP_COUNTS:
+        print(f"{n_ships} ships:")
+        crossover = None
+        for n_bullets in BULLET_COUNTS:
+            ships, bullets = create_scene(n_ships, n_bullets, rng)
+            brute, grid = (measure(make_check(ships, bullets), args.repeat)
+                           for make_check in (brute_force_checks, spatial_hash_checks))
+            faster = grid[2] < brute[1]
+            if not faster:
+                crossover = None
+            elif crossover is None:
+                crossover = n_bullets
+            print(f"  {n_bullets:>5} bullets: "
+                  f"brute force {brute[0] * 1e6:8.1f} us ({brute[1] * 1e6:.1f}-{brute[2] * 1e6:.1f}), "
+                  f"spatial hash {grid[0] * 1e6:8.1f} us ({grid[1] * 1e6:.1f}-{grid[2] * 1e6:.1f}) "
+                  f"(x{brute[0] / grid[0]:.2f}{'' if faster else ', not faster'})")
+        if crossover is None:
+            print("  crossover: -")
+        else:
+            print(f"  crossover: {crossover} bullets ({n_ships * crossover} pairs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Benchmark suite of the simulation, render, reset and observation hot paths.
+
+Each case measures the best time per operation over several repetitions and
+the results are written as JSON. With --compare, the results are checked
+against a stored baseline and the script fails if any case is slower than the
+baseline by more than the tolerance.
+
+Usage:
+    python -m benchmarks.bench_suite [--output results.json]
+    python -m benchmarks.bench_suite --compare baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+from typing import Callable, Dict, Optional, Tuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from utils.classes.bullet_pool import BulletPool
+from utils.classes.game_context import GameContext
+from utils.config import BULLET_WIDTH, BULLET_HEIGHT, BULLET_DAMAGE
+from utils.game_api import setup_game
+from utils.game_utils import create_barrier, create_spaceships
+from utils.game_utils import draw_game, update_window, get_player_inputs
+from utils.simulation import NO_INPUT, SHOOT, MOVE_UP, MOVE_DOWN, LEFT, RIGHT, step
+
+
+# Number of bullets of the bullet-heavy cases
+HEAVY_BULLETS = 1000
+
+# A case builds its state and returns the operation to measure
+BenchmarkCase = Callable[[], Callable[[], None]]
+
+
+def alternate_inputs() -> Callable[[], Tuple[int, int]]:
+    """Returns a function with a fixed cycle of inputs (move and shoot) for both ships."""
+    inputs = [(SHOOT | MOVE_UP, MOVE_DOWN), (MOVE_UP, SHOOT | MOVE_DOWN),
+              (MOVE_DOWN, MOVE_UP), (SHOOT | MOVE_DOWN, SHOOT | MOVE_UP)]
+    tick = [0]
+
+    def next_inputs() -> Tuple[int, int]:
+        tick[0] += 1
+        return inputs[tick[0] % len(inputs)]
+    return next_inputs
+
+
+def create_headless_context(bullets: Optional[BulletPool] = None) -> GameContext:
+    """Creates a game context without window."""
+    return GameContext(game_window=None,
+                       barrier=create_barrier(),
+                       spaceships=create_spaceships(),
+                       bullets=bullets,
+                       seed=0)
+
+
+def refill_bullets(context: GameContext, n_bullets: int, rng: random.Random) -> None:
+    """Spawns bullets at random positions until the pool has n_bullets."""
+    bullets = context.bullets
+    while len(bullets) < n_bullets:
+        owner = rng.choice((LEFT, RIGHT))
+        bullets.spawn(rng.randrange(context.width), rng.randrange(context.height),
+                      BULLET_WIDTH, BULLET_HEIGHT, rng.choice((-1, 1)) * rng.randint(1, 7),
+                      BULLET_DAMAGE, owner)
+
+
+def case_simulation_tick() -> Callable[[], None]:
+    """One tick of the display-free simulation core."""
+    context = create_headless_context()
+    next_inputs = alternate_inputs()
+    return lambda: step(context, *next_inputs())
+
+
+def case_game_loop_tick() -> Callable[[], None]:
+    """One iteration of the logic of game_loop() (inputs, simulation and window update), uncapped."""
+    context = setup_game(seed=0)
+    context.events.clear()  # No sounds or win screen delays
+    pressed_keys = pygame.key.get_pressed()
+
+    def tick() -> None:
+        step(context, *get_player_inputs(pygame.event.get(), pressed_keys))
+        update_window(context)
+    return tick
+
+
+def case_update_window() -> Callable[[], None]:
+    """Redraw and display update of a window where the spaceships move."""
+    context = setup_game(seed=0)
+    next_inputs = alternate_inputs()
+
+    def render() -> None:
+        left_inputs, right_inputs = next_inputs()
+        step(context, left_inputs & ~SHOOT, right_inputs & ~SHOOT)
+        update_window(context)
+    return render
+
+
+def case_screenshot() -> Callable[[], None]:
+    """uint8 screenshot of the game window into a preallocated buffer."""
+    from dqn.dqn_game_api import init_game, render_game, get_game_screenshot
+    context = init_game(headless=True, seed=0)
+    render_game(context)
+    buffer = np.empty((context.width, context.height, 3), dtype=np.uint8)
+    return lambda: get_game_screenshot(context, buffer, normalize=False)
+
+
+def make_env_case(method: str, **env_kwargs) -> BenchmarkCase:
+    """Builds a case that measures a method (step or reset) of GameEnv."""
+    def case() -> Callable[[], None]:
+        from dqn.game_env import GameEnv
+        env = GameEnv(seed=0, **env_kwargs)
+        env.reset()
+        if method == "reset":
+            return env.reset
+        actions = [np.int32(action) for action in range(5)]
+        tick = [0]
+
+        def env_step() -> None:
+            tick[0] += 1
+            env.step(actions[tick[0] % len(actions)])
+        return env_step
+    return case
+
+
+def case_bullets_heavy_tick() -> Callable[[], None]:
+    """One simulation tick with HEAVY_BULLETS bullets in the field."""
+    context = create_headless_context(BulletPool(HEAVY_BULLETS))
+    rng = random.Random(0)
+
+    def tick() -> None:
+        refill_bullets(context, HEAVY_BULLETS, rng)
+        step(context, NO_INPUT, NO_INPUT)
+        context.left_spaceship.health = context.right_spaceship.health = 10
+    return tick
+
+
+def case_bullets_heavy_render() -> Callable[[], None]:
+    """One simulation tick and frame draw with HEAVY_BULLETS bullets in the field."""
+    context = setup_game(seed=0)
+    context.bullets = BulletPool(HEAVY_BULLETS)
+    context.events.clear()
+    rng = random.Random(0)
+
+    def tick() -> None:
+        refill_bullets(context, HEAVY_BULLETS, rng)
+        step(context, NO_INPUT, NO_INPUT)
+        context.left_spaceship.health = context.right_spaceship.health = 10
+        draw_game(context)
+    return tick
+
+
+# Cases by name -> (case, number of operations of each repetition)
+CASES: Dict[str, Tuple[BenchmarkCase, int]] = {
+    "simulation_tick": (case_simulation_tick, 5000),
+    "game_loop_tick": (case_game_loop_tick, 500),
+    "update_window": (case_update_window, 500),
+    "screenshot_uint8": (case_screenshot, 500),
+    "env_step_pixels": (make_env_case("step", normalize_observations=False), 300),
+    "env_step_pixels_84x84": (make_env_case("step", normalize_observations=False,
+                                            observation_size=(84, 84), grayscale=True), 300),
+    "env_step_state": (make_env_case("step", observation_mode="state"), 3000),
+    "env_reset_pixels": (make_env_case("reset", normalize_observations=False), 300),
+    "env_reset_state": (make_env_case("reset", observation_mode="state"), 3000),
+    "bullets_heavy_tick": (case_bullets_heavy_tick, 1000),
+    "bullets_heavy_render": (case_bullets_heavy_render, 100),
+}
+
+
+def run_case(case: BenchmarkCase, number: int, repeat: int) -> Dict[str, float]:
+    """Measures the best time per operation of a case.
+
+    Args:
+        case: The case to measure.
+        number: The number of operations of each repetition.
+        repeat: The number of repetitions.
+
+    Returns:
+        A dict with the seconds per operation and the operations per second.
+    """
+    operation = case()
+    operation()  # Warm up
+    seconds = min(timeit.repeat(operation, number=number, repeat=repeat)) / number
+    return {"seconds_per_op": seconds, "ops_per_second": 1.0 / seconds}
+
+
+def compare_results(results: Dict[str, Dict[str, float]],
+                    baseline: Dict[str, Dict[str, float]],
+                    tolerance: float) -> bool:
+    """Prints the comparison of the results with a baseline.
+
+    Args:
+        results: The results of the current run by case name.
+        baseline: The results of the baseline by case name.
+        tolerance: The allowed relative slowdown (e.g. 0.2 for 20%).
+
+    Returns:
+        A bool that says if no case is slower than the baseline beyond the tolerance.
+    """
+    passed = True
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:>24}: not in the baseline")
+            continue
+        ratio = result["seconds_per_op"] / baseline[name]["seconds_per_op"]
+        regression = ratio > 1.0 + tolerance
+        passed &= not regression
+        print(f"{name:>24}: x{ratio:5.2f} of the baseline time"
+              f"{'  <-- REGRESSION' if regression else ''}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES),
+                        help="Cases to run (all by default).")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions of each case, the best one is reported.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Factor for the number of operations of each repetition.")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Path of the JSON file to write the results to.")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Path of a JSON file with baseline results to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown with respect to the baseline.")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.cases:
+        case, number = CASES[name]
+        results[name] = run_case(case, max(int(number * args.scale), 1), args.repeat)
+        print(f"{name:>24}: {results[name]['seconds_per_op'] * 1e3:8.4f} ms/op "
+              f"({results[name]['ops_per_second']:10.1f} ops/s)")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        if not compare_results(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-__all__ = ["dqn_game_api", "dqn_utils", "game_env", "models"]
+__all__ = ["dqn_game_api", "dqn_utils", "env_pool", "game_env", "input_pipeline", "models", "preprocessing", "replay_buffer", "self_play_env", "training", "vector_game_env"]
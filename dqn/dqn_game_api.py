@@ -1,80 +1,155 @@
 """API to manage the game environment for DQN."""
-from PIL import Image
+from typing import Optional
+
 import numpy as np
 import pygame
-from tf_agents.trajectories import time_step
 
-from utils.game_utils import handle_event, handle_bullets_movement
-from utils.game_utils import setup_display, update_window
-from utils.game_utils import create_barrier
+from utils.config import INIT_HEALTH, TEAM_SIZE
+from utils.game_utils import setup_display, create_offscreen_surface, draw_game
+from utils.game_utils import create_barrier, create_spaceships
 from utils.classes.game_context import GameContext
-from dqn.dqn_utils import create_random_spaceships, handle_action
+from utils.hud import prerender_hp_texts
+from dqn.dqn_utils import create_random_spaceships, handle_action, handle_agent_actions
+from utils.simulation import encode_state, LEFT, NO_INPUT
+from dqn.preprocessing import surface_to_array
 
 
-def init_game() -> GameContext:
+def init_game(headless: bool = True,
+              render: bool = True,
+              seed: Optional[int] = None) -> GameContext:
     """Initializes a game with the spaceships at random positons.
 
+    Args:
+        headless: If True the game is drawn in an off-screen surface instead of
+            opening a window, so no video device is needed.
+        render: If False the game is not drawn at all and the context has no
+            game_window (only the simulation runs).
+        seed: Seed for the random generator of the game. If None, it is drawn
+            from the global random module.
+
     Returns:
         The GameContext object of the game.
     """
-    game_window = setup_display()
+    game_window = None
+    if render:
+        game_window = create_offscreen_surface() if headless else setup_display()
+        prerender_hp_texts(TEAM_SIZE * INIT_HEALTH)
     barrier = create_barrier()
-    left_spaceship, right_spaceship = create_random_spaceships(
-        (game_window.get_width(),
-         game_window.get_height()))
     context = GameContext(
         game_window=game_window,
         barrier=barrier,
-        left_spaceship=left_spaceship,
-        right_spaceship=right_spaceship)
+        spaceships=create_spaceships(),
+        seed=seed)
 
-    return context
+    # Place the spaceships with the random generator of the game
+    return reset_game(context)
 
 
 def reset_game(context: GameContext) -> GameContext:
     """Resets the game context with new spaceships positions.
 
+    The positions are drawn from the random generator of the context.
+
     Args:
         context: The game context to reset.
 
     Returns:
         The new reseted game context.
     """
-    left_spaceship, right_spaceship = create_random_spaceships(
-        (context.game_window.get_width(),
-         context.game_window.get_height()))
-    context.restart(left_spaceship, right_spaceship)
+    context.restart(create_random_spaceships(
+        (context.width, context.height), context.rng, context.ships.count(LEFT)))
     return context
 
 
-def get_game_screenshot(context: GameContext) -> np.array:
+def get_game_state(context: GameContext,
+                   out: Optional[np.ndarray] = None,
+                   mirror: bool = False) -> np.ndarray:
+    """Builds the symbolic state of the game, without rendering it.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        out: Optional float32 array with shape (STATE_SIZE,) to write the state to.
+        mirror: If True the state of the game mirrored horizontally is built
+            (the view of the left spaceship in self-play).
+
+    Returns:
+        A float32 array with shape (STATE_SIZE,), see utils.simulation.encode_state().
+    """
+    return encode_state(context, out, mirror)
+
+
+def get_game_screenshot(context: GameContext,
+                        out: Optional[np.ndarray] = None,
+                        normalize: bool = True) -> np.ndarray:
     """Takes a screenshot of the current state of the game.
 
+    The pixels are read through a direct view of the surface buffer and written
+    directly to the output array.
+
     Args:
         context: GameContext object with the context variables of the game.
+        out: Optional preallocated array with shape (W, H, 3) to write the
+            screenshot to. Its dtype should be float32 if normalize is True,
+            or uint8 otherwise.
+        normalize: If True the pixels are normalized between [0, 1], otherwise
+            the raw [0, 255] values are returned (to normalize in the model).
 
     Returns:
-        A numpy array with shape (W, H, 3) and normalized between [0, 1].
+        A numpy array with shape (W, H, 3). It is the out array if provided.
     """
-    screen_str = pygame.image.tostring(context.game_window, "RGB")
-    pil_image = Image.frombytes("RGB",
-                                (context.game_window.get_width(),
-                                    context.game_window.get_height()),
-                                screen_str)
+    if out is None:
+        out = np.empty((context.width, context.height, 3),
+                       dtype=np.float32 if normalize else np.uint8)
+    return surface_to_array(context.game_window, out, normalize)
+
+
+def render_game(context: GameContext) -> None:
+    """Draws the current state of the game in the game surface of the context.
 
-    res = np.asarray(pil_image) / 255.0
-    return np.transpose(res, (1, 0, 2))
+    Args:
+        context: GameContext object with the context variables of the game.
+    """
+    if context.is_headless():
+        return
+    dirty_rects = draw_game(context)
+    if context.game_window is pygame.display.get_surface():
+        pygame.display.update(dirty_rects)
 
 
-def perform_game_action(context: GameContext, action: int) -> None:
-    """Executes an iteration of the event loop of the game given an action to perform.
+def perform_game_action(context: GameContext,
+                        action: int,
+                        render: bool = True,
+                        left_inputs: int = NO_INPUT) -> None:
+    """Executes an iteration of the game given an action to perform.
 
     Args:
         context: GameContext object with the context variables of the game.
         action: The action (by code) to perform in the loop iteration.
+        render: If False the new state of the game is not drawn.
+        left_inputs: The input flags of the left spaceship. By default it
+            stays still.
     """
-    handle_action(context, action)  # Perform the action in the game
+    handle_action(context, action, left_inputs)  # Perform the action in the game
 
-    handle_bullets_movement(context)
+    if render:
+        render_game(context)
+
+
+def perform_agent_actions(context: GameContext,
+                          left_action: int,
+                          right_action: int,
+                          render: bool = True) -> None:
+    """Executes an iteration of the game given the actions of both agents of self-play.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        left_action: The combined action (by code) of the agent of the left
+            spaceship, in its mirrored view of the game.
+        right_action: The combined action (by code) of the agent of the right
+            spaceship.
+        render: If False the new state of the game is not drawn.
+    """
+    handle_agent_actions(context, left_action, right_action)
 
-    update_window(context)
+    if render:
+        render_game(context)
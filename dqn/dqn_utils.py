@@ -1,81 +1,141 @@
 """Module of helper functions for the API to manage the game environment for DQN."""
 import random
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
-import pygame
-from pygame.surface import Surface
 
-from utils.config import RIGHT_LEFT, RIGHT_RIGHT, RIGHT_UP, RIGHT_DOWN, RIGHT_SHOOT
-from utils.config import SPACESHIP_WIDTH, SPACESHIP_HEIGHT
+from utils.config import SPACESHIP_WIDTH, SPACESHIP_HEIGHT, TEAM_SIZE
 from utils.config import BARRIER_WIDTH, WINDOW_WIDTH, WINDOW_HEIGHT
 from utils.config import LEFT_SPACESHIP_FILE, RIGHT_SPACESHIP_FILE
-from utils.config import DISPLAY_NAME
-from utils.config import RED, BG_COLOR
-from utils.config import MAX_ACTIVE_BULLETS
-from utils.game_utils import handle_right_spaceship_movement
-from utils.game_utils import handle_bullets_fired, handle_bullets_movement, handle_bullet_hit
 from utils.classes.spaceship import Spaceship
-from utils.classes.bullet import Bullet
+from utils.classes.spaceship_store import SpaceshipStore
 from utils.classes.game_context import GameContext
-from utils.my_events import LEFT_HIT
+from utils.simulation import NO_INPUT, SHOOT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN
+from utils.simulation import step, LEFT, RIGHT
 
 
 # To control the right spaceship
-N_KEYS = 512  # From len(pygame.key.get_pressed())
-ACTIONS_TO_KEYS = {0: RIGHT_SHOOT,
-                   1: RIGHT_LEFT,
-                   2: RIGHT_RIGHT,
-                   3: RIGHT_UP,
-                   4: RIGHT_DOWN}
+ACTIONS_TO_INPUTS = {0: SHOOT,
+                     1: MOVE_LEFT,
+                     2: MOVE_RIGHT,
+                     3: MOVE_UP,
+                     4: MOVE_DOWN}
 
 
-def create_random_spaceships(space_size: Tuple[int, int]) -> Tuple[Spaceship, Spaceship]:
-    """Creates the spaceships objects of both sides in random locations.
+def mirror_inputs(inputs: int) -> int:
+    """Swaps the horizontal movement flags of some inputs.
+
+    Args:
+        inputs: int with the input flags of a spaceship.
+
+    Returns:
+        The input flags of the same action in the game mirrored horizontally.
+    """
+    mirrored = inputs & ~(MOVE_LEFT | MOVE_RIGHT)
+    if inputs & MOVE_LEFT:
+        mirrored |= MOVE_RIGHT
+    if inputs & MOVE_RIGHT:
+        mirrored |= MOVE_LEFT
+    return mirrored
+
+
+# Combined actions of the self-play agents: each action is the bitmask of input
+# flags of an optional horizontal move, an optional vertical move and an
+# optional shot (action 0 does nothing)
+AGENT_ACTIONS_TO_INPUTS = tuple(horizontal | vertical | shoot
+                                for horizontal in (NO_INPUT, MOVE_LEFT, MOVE_RIGHT)
+                                for vertical in (NO_INPUT, MOVE_UP, MOVE_DOWN)
+                                for shoot in (NO_INPUT, SHOOT))
+# The same actions for the agent that sees the game mirrored (the left one)
+MIRRORED_AGENT_ACTIONS_TO_INPUTS = tuple(mirror_inputs(inputs) for inputs in AGENT_ACTIONS_TO_INPUTS)
+
+# Rewards of the right spaceship (and of each agent in self-play)
+STEP_REWARD = -1  # We penalize just moving
+HIT_REWARD = 50  # For each point of damage dealt or received
+WIN_REWARD = 1000
+LOSS_REWARD = -1000
+
+
+def create_random_spaceships(space_size: Tuple[int, int],
+                             rng: Optional[random.Random] = None,
+                             team_size: int = TEAM_SIZE) -> List[Spaceship]:
+    """Creates the spaceships objects of both teams in random locations.
 
     Args:
         space_size: The dimensions of the screen.
+        rng: The random generator to use (e.g. the one of the GameContext). If
+            None, the global random module is used.
+        team_size: The number of spaceships of each team.
 
     Returns:
-        A tuple with spaceships objects -> (left_spaceship, right_spaceship).
+        A list with the spaceships objects of the left team followed by the ones
+        of the right team -> [left_spaceship, right_spaceship] for a single
+        spaceship per team.
     """
+    randint = random.randint if rng is None else rng.randint
     # Note: The spaceship object is rotated 90 degrees at creation
-    left_init_x = random.randint(
-        0, WINDOW_WIDTH // 2 - BARRIER_WIDTH // 2 - SPACESHIP_HEIGHT)
-    left_init_y = random.randint(0, WINDOW_HEIGHT - SPACESHIP_WIDTH)
-    left_spaceship = Spaceship(
-        image_file=LEFT_SPACESHIP_FILE,
-        side="left",
-        init_pos=(left_init_x, left_init_y),
-        name="Yellow")
-    right_init_x = random.randint(
-        WINDOW_WIDTH // 2 + BARRIER_WIDTH // 2, WINDOW_WIDTH - SPACESHIP_HEIGHT)
-    right_init_y = random.randint(0, WINDOW_HEIGHT - SPACESHIP_WIDTH)
-    right_spaceship = Spaceship(
-        image_file=RIGHT_SPACESHIP_FILE,
-        side="right",
-        init_pos=(right_init_x, right_init_y),
-        name="Red")
-
-    return (left_spaceship, right_spaceship)
-
-
-def handle_action(context: GameContext, action: np.array) -> None:
-    """Performs an action.
+    teams = ((LEFT_SPACESHIP_FILE, "left", "Yellow",
+              0, WINDOW_WIDTH // 2 - BARRIER_WIDTH // 2 - SPACESHIP_HEIGHT),
+             (RIGHT_SPACESHIP_FILE, "right", "Red",
+              WINDOW_WIDTH // 2 + BARRIER_WIDTH // 2, WINDOW_WIDTH - SPACESHIP_HEIGHT))
+    spaceships = []
+    store = SpaceshipStore(2 * team_size)
+    for image_file, side, name, min_x, max_x in teams:
+        for idx in range(team_size):
+            init_x = randint(min_x, max_x)
+            init_y = randint(0, WINDOW_HEIGHT - SPACESHIP_WIDTH)
+            spaceships.append(Spaceship(
+                image_file=image_file,
+                side=side,
+                init_pos=(init_x, init_y),
+                name=name if idx == 0 else f"{name} {idx + 1}",
+                store=store))
+
+    return spaceships
+
+
+def handle_action(context: GameContext, action: np.array, left_inputs: int = NO_INPUT) -> None:
+    """Performs an action with the right spaceship and advances the simulation one tick.
 
     Args:
         context: GameContext object with the context variables of the game.
         action: A numpy with the code of the action to perform.
+        left_inputs: The input flags of the left spaceship (e.g. decided by an
+            utils.opponents.Opponent). By default it stays still.
+    """
+    step(context, left_inputs, ACTIONS_TO_INPUTS[int(action)])
+
+
+def handle_agent_actions(context: GameContext, left_action: int, right_action: int) -> None:
+    """Performs the combined actions of both spaceships and advances the simulation one tick.
+
+    The left agent sees the game mirrored (it plays as the right spaceship), so
+    its horizontal moves are mirrored back.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        left_action: The code of the action of the left spaceship (see
+            AGENT_ACTIONS_TO_INPUTS).
+        right_action: The code of the action of the right spaceship.
+    """
+    step(context, MIRRORED_AGENT_ACTIONS_TO_INPUTS[left_action], AGENT_ACTIONS_TO_INPUTS[right_action])
+
+
+def compute_reward(previous_health: Sequence[int], health: Sequence[int], side: int) -> int:
+    """Computes the reward of the spaceship of a side in a simulation tick.
+
+    Args:
+        previous_health: The health of the (left, right) spaceships before the tick.
+        health: The health of the (left, right) spaceships after the tick.
+        side: The side of the spaceship (LEFT or RIGHT).
+
+    Returns:
+        The reward of the tick. If a spaceship died, WIN_REWARD or LOSS_REWARD.
     """
-    for event in pygame.event.get():
-        handle_bullet_hit(context, event)
-
-    if action > 0:  # Is a movement action
-        keys = [False] * N_KEYS
-        keys[ACTIONS_TO_KEYS[int(action)]] = True
-        handle_right_spaceship_movement(context, keys)
-    else:  # action=0 for shooting action
-        handle_bullets_fired(context, pygame.event.Event(
-            pygame.KEYDOWN, key=RIGHT_SHOOT))
-
-    handle_bullets_movement(context)
+    enemy = RIGHT if side == LEFT else LEFT
+    if health[enemy] <= 0:
+        return WIN_REWARD
+    if health[side] <= 0:
+        return LOSS_REWARD
+    return STEP_REWARD + HIT_REWARD * (previous_health[enemy] - health[enemy]) \
+        - HIT_REWARD * (previous_health[side] - health[side])
@@ -0,0 +1,222 @@
+"""Pool of game environments running in worker processes.
+
+Each worker hosts one environment and writes its observations straight into a
+shared memory slab, so the observations never go through the pipes. Only the
+actions and the (step_type, reward, discount) of each step are sent.
+"""
+import multiprocessing as mp
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+import random
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from tf_agents.environments import py_environment
+from tf_agents.specs import array_spec
+from tf_agents.trajectories import time_step
+
+from dqn.game_env import GameEnv
+
+
+# The fork server imports the heavy modules (TensorFlow) once and forks the
+# workers from itself, so starting the workers of a pool takes milliseconds
+DEFAULT_START_METHOD = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+
+def _write_time_step(conn: Connection, observations: np.ndarray, ts: time_step.TimeStep) -> None:
+    """Writes the observation of a time step in the shared slab and sends the rest.
+
+    Args:
+        conn: The connection with the parent process.
+        observations: The view of the worker in the shared observations slab.
+        ts: The time step to send.
+    """
+    if ts.observation is not observations:
+        observations[...] = ts.observation
+    conn.send(("ok", (int(ts.step_type), float(ts.reward), float(ts.discount))))
+
+
+def _worker(conn: Connection,
+            env_constructor: Callable[..., py_environment.PyEnvironment],
+            env_kwargs: Dict[str, Any],
+            seed: Optional[int]) -> None:
+    """Main loop of a worker process of the pool.
+
+    Args:
+        conn: The connection with the parent process.
+        env_constructor: Callable that creates the environment of the worker.
+        env_kwargs: Keyword arguments for the env_constructor.
+        seed: Seed for the random generators of the worker.
+    """
+    shared_memory = None
+    try:
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        env = env_constructor(**env_kwargs)
+        observations = None
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                _write_time_step(conn, observations, env.step(data))
+            elif command == "reset":
+                _write_time_step(conn, observations, env.reset())
+            elif command == "spec":
+                conn.send(("ok", (env.observation_spec(), env.action_spec())))
+            elif command == "attach":
+                name, shape, dtype, index = data
+                shared_memory = SharedMemory(name=name)
+                observations = np.ndarray(
+                    shape, dtype=dtype, buffer=shared_memory.buf)[index]
+                if hasattr(env, "set_observation_buffer"):
+                    # The environment writes its observations in the slab directly
+                    env.set_observation_buffer(observations)
+                conn.send(("ok", None))
+            elif command == "close":
+                break
+    except Exception:  # Send the error to the parent instead of dying silently
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        observations = None
+        if shared_memory is not None:
+            shared_memory.close()
+        conn.close()
+
+
+class EnvPool(py_environment.PyEnvironment):
+    """Batched environment that runs one environment per worker process.
+
+    The observations of all the environments are stored in a shared memory slab
+    with shape (num_envs, *observation_shape). The observation returned by the
+    time steps is a view of that slab, so it is overwritten by the next step;
+    copy it if it has to be kept. The environments restart automatically in the
+    step that follows the end of an episode.
+    """
+
+    def __init__(self,
+                 num_envs: int,
+                 env_constructor: Callable[..., py_environment.PyEnvironment] = GameEnv,
+                 env_kwargs: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None,
+                 start_method: str = DEFAULT_START_METHOD):
+        """Pool constructor.
+
+        Args:
+            num_envs: The number of environments (and worker processes).
+            env_constructor: Picklable callable that creates an environment.
+            env_kwargs: Keyword arguments for the env_constructor.
+            seed: Base seed of the pool. The worker i is seeded with seed + i.
+            start_method: The multiprocessing start method for the workers. With
+                "forkserver" the modules of the pool and of the env_constructor
+                are preloaded in the fork server.
+        """
+        super().__init__(handle_auto_reset=False)
+        self._num_envs = num_envs
+        mp_context = mp.get_context(start_method)
+        if start_method == "forkserver":
+            mp_context.set_forkserver_preload([__name__, env_constructor.__module__])
+        self._conns = []
+        self._processes = []
+        for env_idx in range(num_envs):
+            parent_conn, child_conn = mp_context.Pipe()
+            worker_seed = None if seed is None else seed + env_idx
+            process = mp_context.Process(
+                target=_worker,
+                args=(child_conn, env_constructor, env_kwargs or {}, worker_seed),
+                daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+        self._conns[0].send(("spec", None))
+        self._observation_spec, self._action_spec = self._receive(self._conns[0])
+
+        # Shared slab with the observations of all the environments
+        shape = (num_envs,) + tuple(self._observation_spec.shape)
+        dtype = self._observation_spec.dtype
+        self._shared_memory = SharedMemory(
+            create=True, size=int(np.prod(shape)) * dtype.itemsize)
+        self._observations = np.ndarray(
+            shape, dtype=dtype, buffer=self._shared_memory.buf)
+        for env_idx, conn in enumerate(self._conns):
+            conn.send(("attach", (self._shared_memory.name, shape, dtype, env_idx)))
+        for conn in self._conns:
+            self._receive(conn)
+
+    @staticmethod
+    def _receive(conn: Connection) -> Any:
+        """Receives the response of a worker.
+
+        Args:
+            conn: The connection with the worker.
+
+        Returns:
+            The data sent by the worker.
+        """
+        status, data = conn.recv()
+        if status == "error":
+            raise RuntimeError(f"Error in an environment worker:\n{data}")
+        return data
+
+    @property
+    def batched(self) -> bool:
+        return True
+
+    @property
+    def batch_size(self) -> int:
+        return self._num_envs
+
+    @property
+    def observations(self) -> np.ndarray:
+        """The shared memory view with the last observations of all the environments."""
+        return self._observations
+
+    def observation_spec(self) -> array_spec.BoundedArraySpec:
+        """Return observation_spec."""
+        return self._observation_spec
+
+    def action_spec(self) -> array_spec.BoundedArraySpec:
+        """Return action_spec."""
+        return self._action_spec
+
+    def _gather_time_step(self) -> time_step.TimeStep:
+        """Collects the responses of all the workers in a batched time step."""
+        results = [self._receive(conn) for conn in self._conns]
+        step_type, reward, discount = zip(*results)
+        return time_step.TimeStep(
+            step_type=np.array(step_type, dtype=np.int32),
+            reward=np.array(reward, dtype=np.float32),
+            discount=np.array(discount, dtype=np.float32),
+            observation=self._observations)
+
+    def _reset(self) -> time_step.TimeStep:
+        """Return initial_time_step."""
+        for conn in self._conns:
+            conn.send(("reset", None))
+        return self._gather_time_step()
+
+    def _step(self, action: np.ndarray) -> time_step.TimeStep:
+        """Apply actions and return new time_step."""
+        for conn, env_action in zip(self._conns, action):
+            conn.send(("step", env_action))
+        return self._gather_time_step()
+
+    def close(self) -> None:
+        """Stops the workers and releases the shared memory."""
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._observations = None
+        self._shared_memory.close()
+        self._shared_memory.unlink()
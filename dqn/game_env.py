@@ -1,50 +1,157 @@
+from typing import Optional, Tuple
+
 import numpy as np
-import pygame
 from tf_agents.environments import py_environment
 from tf_agents.specs import array_spec
 from tf_agents.trajectories import time_step
 
-from utils.game_utils import update_window
-from dqn.dqn_game_api import init_game, reset_game, perform_game_action, get_game_screenshot
+from utils.simulation import STATE_SIZE, RIGHT, NO_INPUT
+from dqn.dqn_utils import compute_reward
+from dqn.dqn_game_api import init_game, reset_game, render_game
+from dqn.dqn_game_api import perform_game_action, get_game_state
+from dqn.preprocessing import ObservationPreprocessor
+from utils.profiler import FrameProfiler, ENV_STEP_PHASES
+from utils.opponents import Opponent
 
 
-OBSERVATION_FRAMES = 1  # Number of consecutive frames that forms an observation
 TRANSITION_DISCOUNT = 1.0
+OBSERVATION_MODES = ("pixels", "state")
 
 
 class GameEnv(py_environment.PyEnvironment):
 
-    def __init__(self):
-        self.context = init_game()
-        # 5 actions: move up, down, left, right and shoot
-        """For observations of more than one screenshot
-        self._action_spec = array_spec.BoundedArraySpec(
-            shape=(OBSERVATION_FRAMES,), dtype=np.int32, minimum=0, maximum=4, name="action")
-        self._observation_spec = array_spec.BoundedArraySpec(
-            shape=(OBSERVATION_FRAMES,  # The observation is made of several shots
-                   self.context.game_window.get_width(),
-                   self.context.game_window.get_height(),
-                   3),  # 3 because is a RGB image
-            dtype=(np.float32),
-            minimum=0,
-            maximum=1,
-            name="game_screenshot")
+    def __init__(self,
+                 observation_mode: str = "pixels",
+                 headless: bool = True,
+                 normalize_observations: bool = True,
+                 observation_buffer: Optional[np.ndarray] = None,
+                 observation_size: Optional[Tuple[int, int]] = None,
+                 grayscale: bool = False,
+                 crop_hud: bool = False,
+                 frame_stack: int = 1,
+                 action_repeat: int = 1,
+                 max_pool_frames: bool = False,
+                 seed: Optional[int] = None,
+                 profiler: Optional[FrameProfiler] = None,
+                 opponent: Optional[Opponent] = None):
+        """Environment constructor.
+
+        Args:
+            observation_mode: "pixels" to observe the screenshots of the game or
+                "state" to observe the symbolic state vector of the game (see
+                utils.simulation.encode_state()). In "state" mode the game is
+                not rendered and the screenshot options are ignored.
+            headless: If True the game is simulated and drawn off-screen, without
+                opening a window.
+            normalize_observations: If True the observations are float32 screenshots
+                normalized between [0, 1]. If False they are the raw uint8 pixels
+                and the normalization is left to the model.
+            observation_buffer: Optional preallocated array where the observations
+                are written. Note that the observation returned in every time step
+                is then overwritten by the next step. If None, every time step
+                has a new observation array.
+            observation_size: The (width, height) to resize the screenshots to. None
+                to keep the size of the game window.
+            grayscale: If True the screenshots are converted to grayscale.
+            crop_hud: If True the band with the HP texts is cropped out.
+            frame_stack: The number of consecutive screenshots of an observation.
+                With more than one, the observation shape is (frame_stack, W, H, C).
+            action_repeat: The number of simulation ticks that each action is
+                repeated for. Only the last tick is rendered and observed, and
+                the reward is the sum of the rewards of the ticks. The agent
+                decides at FPS / action_repeat steps per second of game time.
+            max_pool_frames: If True the screenshot of the observation is the
+                pixel-wise maximum of the last two ticks of the step. Only used
+                in "pixels" mode with action_repeat > 1.
+            seed: Seed for the random generator of the game, which places the
+                spaceships in each episode. If None, it is drawn from the global
+                random module.
+            profiler: Optional FrameProfiler to time the phases of each step
+                (see utils.profiler.ENV_STEP_PHASES).
+            opponent: Optional Opponent (see utils.opponents) that controls the
+                left spaceship, deciding its inputs every tick. By default the
+                left spaceship stays still.
         """
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(
+                f"The observation mode \"{observation_mode}\" is not valid, use one of {OBSERVATION_MODES}.")
+        if action_repeat < 1:
+            raise ValueError("The action repeat must be at least 1.")
+        if profiler is not None and profiler.phases != ENV_STEP_PHASES:
+            raise ValueError(f"The profiler phases must be {ENV_STEP_PHASES}.")
+        self.profiler = profiler
+        self.opponent = opponent
+        self._observation_mode = observation_mode
+        self._action_repeat = action_repeat
+        self.context = init_game(headless, render=observation_mode == "pixels", seed=seed)
+        # 5 actions: move up, down, left, right and shoot
         self._action_spec = array_spec.BoundedArraySpec(
             shape=(), dtype=np.int32, minimum=0, maximum=4, name="action")
-        # The agents observe the screenshots of the game
-        self._observation_spec = array_spec.BoundedArraySpec(
-            shape=(self.context.game_window.get_width(),
-                   self.context.game_window.get_height(),
-                   3),  # Is a RGB image
-            dtype=np.float32,
-            minimum=0,
-            maximum=1,
-            name="game_screenshot")
+        self._preprocessor = None
+        self._max_pool_frames = False
+        if observation_mode == "state":
+            # The agents observe the state vector of the game
+            self._observation_spec = array_spec.BoundedArraySpec(
+                shape=(STATE_SIZE,),
+                dtype=np.float32,
+                minimum=-1,
+                maximum=1,
+                name="game_state")
+        else:
+            # The agents observe the (preprocessed) screenshots of the game
+            self._preprocessor = ObservationPreprocessor(
+                source_size=(self.context.width, self.context.height),
+                observation_size=observation_size,
+                grayscale=grayscale,
+                crop_hud=crop_hud,
+                frame_stack=frame_stack,
+                normalize=normalize_observations)
+            self._max_pool_frames = max_pool_frames and action_repeat > 1
+            self._observation_spec = array_spec.BoundedArraySpec(
+                shape=self._preprocessor.observation_shape,
+                dtype=self._preprocessor.dtype,
+                minimum=0,
+                maximum=1 if normalize_observations else 255,
+                name="game_screenshot")
+        self.set_observation_buffer(observation_buffer)
         self._hp_state = [self.context.left_spaceship.health,
                           self.context.right_spaceship.health]
         self._episode_ended = False
 
+    def set_observation_buffer(self, observation_buffer: Optional[np.ndarray]) -> None:
+        """Sets the array where the observations are written.
+
+        Args:
+            observation_buffer: Array with the shape and dtype of the observation
+                spec, overwritten by every step. If None, every time step has a
+                new observation array.
+        """
+        if observation_buffer is not None and (
+                observation_buffer.shape != self._observation_spec.shape
+                or observation_buffer.dtype != self._observation_spec.dtype):
+            raise ValueError(
+                f"The observation buffer must have shape {self._observation_spec.shape}"
+                f" and dtype {self._observation_spec.dtype}.")
+        self._observation = observation_buffer
+
+    def _observe(self, first: bool = False) -> np.ndarray:
+        """Builds the current observation from the game state or window.
+
+        Args:
+            first: If True the observation is the first of an episode.
+
+        Returns:
+            The observation array.
+        """
+        if self._preprocessor is None:
+            return get_game_state(self.context, self._observation)
+        observation = self._preprocessor.process(
+            self.context.game_window, self._observation, first)
+        if self._observation is None:
+            # The preprocessor returned its own buffer, overwritten by the next step
+            observation = observation.copy()
+        return observation
+
     def observation_spec(self) -> array_spec.BoundedArraySpec:
         """Return observation_spec."""
         return self._observation_spec
@@ -56,61 +163,68 @@ class GameEnv(py_environment.PyEnvironment):
     def _reset(self) -> time_step.TimeStep:
         """Return initial_time_step."""
         self.context = reset_game(self.context)
-        update_window(self.context)  # Refresh game screen
+        render_game(self.context)  # Refresh game screen
         self._hp_state = [self.context.left_spaceship.health,
                           self.context.right_spaceship.health]
         self._episode_ended = False
 
-        """For observations of more than one screenshot
-        game_frames = []
-        for _ in range(0, OBSERVATION_FRAMES):
-            game_frames.append(get_game_screenshot(self.context))
-        """
-        game_frames = get_game_screenshot(self.context)
+        game_frames = self._observe(first=True)
 
-        return time_step.restart(np.array(game_frames, dtype=np.float32))
+        return time_step.restart(game_frames)
+
+    def _tick_reward(self) -> float:
+        """Computes the reward of the last simulation tick and checks the end of the episode."""
+        health = [self.context.left_spaceship.health,
+                  self.context.right_spaceship.health]
+        reward = compute_reward(self._hp_state, health, RIGHT)
+        self._episode_ended = min(health) <= 0
+
+        # Reset hp counters after damage computation
+        self._hp_state = health
+        return reward
 
     def _step(self, action: time_step.TimeStep) -> time_step.TimeStep:
         """Apply action and return new time_step."""
         if self._episode_ended:
-            return self.reset
-
-        """For observations of more than one screenshot
-        game_frames = []
-        for sub_action in action:
-            perform_game_action(self.context, sub_action)
-            game_frames.append(get_game_screenshot(self.context))
-        """
-        perform_game_action(self.context, action)
-        game_frames = get_game_screenshot(self.context)
-
-        # Compute reward
-        reward = -1  # We penalize just moving
-        if self.context.left_spaceship.is_dead():
-            # We won the game
-            self._episode_ended = True
-            reward = 1000
-        elif self.context.right_spaceship.is_dead():
-            # We losed the game
-            self._episode_ended = True
-            reward = -1000
-        else:
-            if self.context.left_spaceship.health < self._hp_state[0]:
-                # We hit the enemy spaceship
-                reward += 50 * \
-                    (self._hp_state[0] - self.context.left_spaceship.health)
-            if self.context.right_spaceship.health < self._hp_state[1]:
-                # We get hit by the enemy spaceship
-                reward -= 50 * \
-                    (self._hp_state[1] - self.context.right_spaceship.health)
-
-        # Reset hp counters after damage computation
-        self._hp_state = [self.context.left_spaceship.health,
-                          self.context.right_spaceship.health]
+            return self.reset()
+
+        profiler = self.profiler
+        simulation_phase, reward_phase, render_phase, observation_phase = range(4)
+        if profiler is not None:
+            profiler.start_frame()
+
+        # Repeat the action without rendering the intermediate ticks
+        reward = 0
+        for tick in range(self._action_repeat):
+            left_inputs = NO_INPUT
+            if self.opponent is not None:
+                self.opponent.start_tick(self.context)
+                left_inputs = self.opponent.get_inputs(self.context, self.context.left_spaceship)
+            perform_game_action(self.context, action, render=False, left_inputs=left_inputs)
+            if profiler is not None:
+                profiler.mark(simulation_phase)
+            reward += self._tick_reward()
+            if profiler is not None:
+                profiler.mark(reward_phase)
+            if self._episode_ended:
+                break
+            if self._max_pool_frames and tick == self._action_repeat - 2:
+                render_game(self.context)
+                if profiler is not None:
+                    profiler.mark(render_phase)
+                self._preprocessor.hold_frame(self.context.game_window)
+                if profiler is not None:
+                    profiler.mark(observation_phase)
+        render_game(self.context)
+        if profiler is not None:
+            profiler.mark(render_phase)
+        game_frames = self._observe()
+        if profiler is not None:
+            profiler.mark(observation_phase)
+            profiler.end_frame()
 
         if self._episode_ended:
-            return time_step.termination(
-                np.array(game_frames, dtype=np.float32), reward=reward)
+            return time_step.termination(game_frames, reward=reward)
         else:
             return time_step.transition(
-                np.array(game_frames, dtype=np.float32), reward=reward, discount=TRANSITION_DISCOUNT)
+                game_frames, reward=reward, discount=TRANSITION_DISCOUNT)
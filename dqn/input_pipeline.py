@@ -0,0 +1,147 @@
+"""tf.data pipeline that streams the training batches from a replay buffer."""
+from typing import Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from dqn.replay_buffer import FrameReplayBuffer, ReplayBatch
+
+
+def normalize_frames(frames: tf.Tensor) -> tf.Tensor:
+    """Converts uint8 frames to float32 frames normalized between [0, 1], in the graph.
+
+    Args:
+        frames: The tensor with the frames. Frames of other dtypes are only
+            cast to float32.
+
+    Returns:
+        The float32 tensor with the frames.
+    """
+    if frames.dtype == tf.uint8:
+        return tf.cast(frames, tf.float32) * (1 / 255)
+    return tf.cast(frames, tf.float32)
+
+
+def make_replay_dataset(buffer: FrameReplayBuffer,
+                        batch_size: int,
+                        beta: float = 0.4,
+                        normalize: bool = True,
+                        num_parallel_calls: int = tf.data.AUTOTUNE,
+                        prefetch: int = tf.data.AUTOTUNE) -> tf.data.Dataset:
+    """Creates an endless dataset of batches of transitions sampled from a replay buffer.
+
+    The pipeline has three stages, so the learner doesn't wait for any of them:
+
+    - The indices of the batches are sampled by a Python generator, which only
+      draws random numbers (and walks the sum tree if prioritized), so the
+      sampling is sequential and cheap.
+    - The uint8 frames of the batches are gathered from the buffer (and stacked,
+      see FrameReplayBuffer.gather()) with num_parallel_calls batches at once.
+      NumPy releases the GIL during the copies.
+    - The frames are normalized to float32 inside the graph, and the batches
+      are prefetched while the learner trains on the previous ones.
+
+    Only the uint8 frames are copied out of the buffer, the float conversion
+    of the (900, 500, 3) screenshots is done by TensorFlow kernels. Nothing
+    is placed on an accelerator, so it runs on hosts with only a CPU.
+
+    Note: The buffer can be filled while the dataset is iterated. The batches
+    whose transitions are overwritten before they are gathered are sampled
+    again (see FrameReplayBuffer.gather()), but the prefetched batches were
+    sampled with the priorities of the previous updates.
+
+    Args:
+        buffer: The FrameReplayBuffer to sample from. It must have enough steps
+            stored before the dataset is iterated.
+        batch_size: The number of transitions of each batch.
+        beta: Exponent of the importance sampling weights (only for
+            prioritized sampling).
+        normalize: If True the observations are float32 frames normalized
+            between [0, 1]. If False they keep the dtype of the buffer.
+        num_parallel_calls: The number of batches gathered in parallel.
+        prefetch: The number of batches prepared in advance.
+
+    Returns:
+        A tf.data.Dataset of ReplayBatch tuples of tensors.
+    """
+    observation_shape = (batch_size,) + buffer.frame_shape
+    if buffer.frame_stack > 1:
+        observation_shape = (batch_size, buffer.frame_stack) + buffer.frame_shape
+    frame_dtype = tf.as_dtype(buffer.frames.dtype)
+
+    def sample_indices():
+        while True:
+            indices, weights, version = buffer.sample_indices(batch_size, beta)
+            yield indices.astype(np.int64), weights, version
+
+    def gather(indices: np.ndarray, weights: np.ndarray, version: np.ndarray) -> Tuple[np.ndarray, ...]:
+        batch = buffer.gather(indices, weights, int(version), beta)
+        return (batch.observations, batch.actions, batch.rewards, batch.next_observations, batch.terminals,
+                batch.indices, batch.weights)
+
+    def gather_batch(indices: tf.Tensor, weights: tf.Tensor, version: tf.Tensor) -> ReplayBatch:
+        # The indices of the overwritten transitions are sampled again by the buffer
+        observations, actions, rewards, next_observations, terminals, indices, weights = tf.numpy_function(
+            gather, [indices, weights, version],
+            [frame_dtype, tf.int32, tf.float32, frame_dtype, tf.bool, tf.int64, tf.float32])
+        observations.set_shape(observation_shape)
+        next_observations.set_shape(observation_shape)
+        for tensor in (actions, rewards, terminals, indices, weights):
+            tensor.set_shape((batch_size,))
+        return ReplayBatch(observations, actions, rewards, next_observations, terminals, indices, weights)
+
+    def normalize_batch(batch: ReplayBatch) -> ReplayBatch:
+        return batch._replace(observations=normalize_frames(batch.observations),
+                              next_observations=normalize_frames(batch.next_observations))
+
+    dataset = tf.data.Dataset.from_generator(
+        sample_indices,
+        output_signature=(tf.TensorSpec((batch_size,), tf.int64),
+                          tf.TensorSpec((batch_size,), tf.float32),
+                          tf.TensorSpec((), tf.int64)))
+    dataset = dataset.map(gather_batch, num_parallel_calls=num_parallel_calls, deterministic=False)
+    if normalize:
+        dataset = dataset.map(normalize_batch, num_parallel_calls=num_parallel_calls, deterministic=False)
+    return dataset.prefetch(prefetch)
+
+
+def make_parallel_replay_dataset(buffers: Sequence[FrameReplayBuffer],
+                                 batch_size: int,
+                                 beta: float = 0.4,
+                                 normalize: bool = True,
+                                 num_parallel_calls: int = tf.data.AUTOTUNE,
+                                 prefetch: int = tf.data.AUTOTUNE) -> tf.data.Dataset:
+    """Creates an endless dataset of batches sampled evenly from several replay buffers.
+
+    A FrameReplayBuffer stores the steps of a single stream of episodes, so the
+    environments of a batched environment (e.g. EnvPool) have a buffer each.
+    Each batch has batch_size / len(buffers) transitions of every buffer,
+    sampled and gathered by the pipelines of make_replay_dataset() and
+    concatenated inside the graph.
+
+    Args:
+        buffers: The FrameReplayBuffers to sample from, with the same frames.
+        batch_size: The number of transitions of each batch. It must be a
+            multiple of the number of buffers.
+        beta: Exponent of the importance sampling weights (only for
+            prioritized sampling).
+        normalize: If True the observations are float32 frames normalized
+            between [0, 1]. If False they keep the dtype of the buffers.
+        num_parallel_calls: The number of batches gathered in parallel by the
+            pipeline of each buffer.
+        prefetch: The number of batches prepared in advance.
+
+    Returns:
+        A tf.data.Dataset of ReplayBatch tuples of tensors. The indices of the
+        transitions are the ones of their buffers.
+    """
+    if batch_size % len(buffers) != 0:
+        raise ValueError(f"The batch size must be a multiple of the {len(buffers)} buffers.")
+    datasets = tuple(make_replay_dataset(buffer, batch_size // len(buffers), beta, normalize,
+                                         num_parallel_calls, prefetch)
+                     for buffer in buffers)
+
+    def concatenate(*batches: ReplayBatch) -> ReplayBatch:
+        return ReplayBatch(*(tf.concat(fields, axis=0) for fields in zip(*batches)))
+
+    return tf.data.Dataset.zip(datasets).map(concatenate).prefetch(prefetch)
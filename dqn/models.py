@@ -1,18 +1,53 @@
+import tensorflow as tf
 from tensorflow.keras import Sequential
 from tensorflow.keras.layers import Conv2D, Dense, Flatten
 import tf_agents
 
 
 class ConvQNetwork(tf_agents.networks.Network):
-    def __init__(self, n_actions):
+    """Q network of the screenshot observations.
+
+    The uint8 screenshots are normalized between [0, 1] inside the graph, and
+    the stacked observations with shape (K, W, H, C) (see GameEnv frame_stack)
+    are folded into K * C channels before the convolutions.
+    """
+
+    def __init__(self, input_tensor_spec: tf.TensorSpec, n_actions: int, name: str = "ConvQNetwork"):
+        """ConvQNetwork constructor.
+
+        Args:
+            input_tensor_spec: The spec of the observations, e.g. the one of
+                the observation spec of GameEnv.
+            n_actions: The number of actions (outputs of the network).
+            name: The name of the network (e.g. of the copy that is the target
+                network of DqnAgent).
+        """
+        super().__init__(input_tensor_spec=input_tensor_spec, state_spec=(), name=name)
         self._forward = Sequential([
-            Conv2D(64, (3, 3), activation="relu"),
+            Conv2D(32, (8, 8), strides=4, activation="relu"),
+            Conv2D(64, (4, 4), strides=2, activation="relu"),
             Conv2D(64, (3, 3), activation="relu"),
             Flatten(),
-            Dense(512),
+            Dense(512, activation="relu"),
             Dense(n_actions)
         ])
 
-    def call(self, observations, state=()):
-        logits = self._forward(observations)
-        return logits, state
+    def create_variables(self, input_tensor_spec=None, **kwargs):
+        # The random input of the base class overflows the bounds of uint8 specs
+        if self._network_output_spec is None:
+            spec = self.input_tensor_spec
+            outputs, _ = self(tf.zeros((1,) + tuple(spec.shape), spec.dtype), **kwargs)
+            self._network_output_spec = tf.TensorSpec(outputs.shape[1:], outputs.dtype)
+        return self._network_output_spec
+
+    def call(self, observations, step_type=None, network_state=(), training=False):
+        if observations.dtype == tf.uint8:
+            observations = tf.cast(observations, tf.float32) * (1 / 255)
+        if observations.shape.rank == 5:
+            # (B, K, W, H, C) -> (B, W, H, K * C)
+            observations = tf.transpose(observations, (0, 2, 3, 1, 4))
+            observations = tf.reshape(observations, tf.concat([tf.shape(observations)[:3], [-1]], 0))
+            observations.set_shape([None] * 3 + [self.input_tensor_spec.shape[0]
+                                                 * self.input_tensor_spec.shape[-1]])
+        logits = self._forward(observations, training=training)
+        return logits, network_state
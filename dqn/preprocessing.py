@@ -0,0 +1,249 @@
+"""Preprocessing of the game screenshots used as observations."""
+from typing import Optional, Tuple
+
+import numpy as np
+import pygame
+from pygame.surface import Surface
+
+from utils.config import HUD_HEIGHT
+
+
+# Weights to convert the RGB channels to grayscale (ITU-R 601)
+GRAYSCALE_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def surface_to_array(surface: Surface, out: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """Copies the pixels of a surface in an array through a direct view of its buffer.
+
+    Args:
+        surface: The surface to read.
+        out: Array with shape (W, H, 3) to write the pixels to. Its dtype should
+            be float32 if normalize is True, or uint8 otherwise.
+        normalize: If True the pixels are normalized between [0, 1].
+
+    Returns:
+        The out array.
+    """
+    pixels = pygame.surfarray.pixels3d(surface)
+    # Copy channel by channel, the surface view has the channels in the
+    # innermost (and shortest) axis, which makes a whole-array copy much slower
+    for channel in range(pixels.shape[-1]):
+        if normalize:
+            np.multiply(pixels[..., channel], np.float32(1 / 255), out=out[..., channel])
+        else:
+            np.copyto(out[..., channel], pixels[..., channel])
+    del pixels  # Release the lock of the surface
+    return out
+
+
+def surface_to_grayscale(surface: Surface,
+                         out: np.ndarray,
+                         normalize: bool = True,
+                         work_buffer: Optional[np.ndarray] = None) -> np.ndarray:
+    """Copies the pixels of a surface in an array converted to grayscale.
+
+    Args:
+        surface: The surface to read.
+        out: Array with shape (W, H, 1) to write the pixels to. Its dtype should
+            be float32 if normalize is True, or uint8 otherwise.
+        normalize: If True the pixels are normalized between [0, 1].
+        work_buffer: Optional float32 array with shape (W, H) for the
+            intermediate results.
+
+    Returns:
+        The out array.
+    """
+    pixels = pygame.surfarray.pixels3d(surface)
+    if work_buffer is None:
+        work_buffer = np.empty(pixels.shape[:2], dtype=np.float32)
+    channel_buffer = out[..., 0] if out.dtype == np.float32 else np.empty_like(work_buffer)
+    np.multiply(pixels[..., 0], np.float32(GRAYSCALE_WEIGHTS[0]), out=work_buffer)
+    for channel in (1, 2):
+        np.multiply(pixels[..., channel], np.float32(GRAYSCALE_WEIGHTS[channel]), out=channel_buffer)
+        work_buffer += channel_buffer
+    del pixels  # Release the lock of the surface
+
+    if normalize:
+        np.multiply(work_buffer, np.float32(1 / 255), out=out[..., 0])
+    else:
+        np.copyto(out[..., 0], work_buffer, casting="unsafe")
+    return out
+
+
+class FrameStack:
+    """Ring buffer with the last frames of the game.
+
+    Every frame is written twice, in the slots i and i + K of a buffer with 2K
+    slots. This way the last K frames are always a contiguous view of the
+    buffer, ordered from oldest to newest, and the older frames are never copied.
+    """
+
+    def __init__(self, n_frames: int, frame_shape: Tuple[int, ...], dtype: np.dtype):
+        """FrameStack constructor.
+
+        Args:
+            n_frames: The number of frames (K) of the stack.
+            frame_shape: The shape of each frame.
+            dtype: The dtype of the frames.
+        """
+        self.n_frames = n_frames
+        self._frames = np.zeros((2 * n_frames,) + tuple(frame_shape), dtype=dtype)
+        self._head = 0  # Slot for the next frame
+
+    def next_slot(self) -> np.ndarray:
+        """Returns the view of the slot where the next frame has to be written."""
+        return self._frames[self._head]
+
+    def push(self) -> np.ndarray:
+        """Adds the frame written in next_slot() to the stack.
+
+        Returns:
+            A view with the last K frames, with shape (K, *frame_shape).
+        """
+        self._frames[self._head + self.n_frames] = self._frames[self._head]
+        self._head = (self._head + 1) % self.n_frames
+        return self.view()
+
+    def fill(self) -> np.ndarray:
+        """Fills the whole stack with the frame written in next_slot().
+
+        Returns:
+            A view with the last K frames, with shape (K, *frame_shape).
+        """
+        self._frames[:] = self._frames[self._head]
+        self._head = 0
+        return self.view()
+
+    def view(self) -> np.ndarray:
+        """Returns a view with the last K frames, with shape (K, *frame_shape)."""
+        return self._frames[self._head:self._head + self.n_frames]
+
+
+class ObservationPreprocessor:
+    """Class that turns the game surface in the observations of the agent.
+
+    The steps are: crop of the HP text band, resize, grayscale conversion,
+    optional max-pooling with the previous frame and frame stacking. All the
+    intermediate buffers are preallocated.
+    """
+
+    def __init__(self,
+                 source_size: Tuple[int, int],
+                 observation_size: Optional[Tuple[int, int]] = None,
+                 grayscale: bool = False,
+                 crop_hud: bool = False,
+                 frame_stack: int = 1,
+                 normalize: bool = True,
+                 mirror: bool = False):
+        """ObservationPreprocessor constructor.
+
+        Args:
+            source_size: The (width, height) of the game surface.
+            observation_size: The (width, height) to resize the frames to. None to
+                keep the size of the (cropped) game surface.
+            grayscale: If True the frames have a single grayscale channel.
+            crop_hud: If True the top band of the screen with the HP texts is
+                removed. Note that the spaceships can also be inside this band.
+            frame_stack: The number of consecutive frames of an observation.
+            normalize: If True the observations are float32 between [0, 1],
+                otherwise they are uint8.
+            mirror: If True the frames are flipped horizontally (e.g. the view
+                of the left spaceship in self-play).
+        """
+        width, height = source_size
+        self._crop_rect = pygame.Rect(0, HUD_HEIGHT if crop_hud else 0,
+                                      width, height - (HUD_HEIGHT if crop_hud else 0))
+        self._resized_surface = None
+        if observation_size is not None and tuple(observation_size) != self._crop_rect.size:
+            self._resized_surface = pygame.Surface(observation_size, depth=32)
+        frame_size = tuple(observation_size or self._crop_rect.size)
+
+        self.grayscale = grayscale
+        self.normalize = normalize
+        self.mirror = mirror
+        self.dtype = np.dtype(np.float32 if normalize else np.uint8)
+        self.frame_shape = frame_size + (1 if grayscale else 3,)
+        self.observation_shape = self.frame_shape
+        if frame_stack > 1:
+            self.observation_shape = (frame_stack,) + self.frame_shape
+        self._work_buffer = np.empty(frame_size, dtype=np.float32) if grayscale else None
+        self._frame = None
+        self._frame_stack = None
+        self._held_frame = None  # Frame to max-pool with the next processed one
+        self._is_frame_held = False
+        if frame_stack == 1:
+            self._frame = np.empty(self.frame_shape, dtype=self.dtype)
+        else:
+            self._frame_stack = FrameStack(frame_stack, self.frame_shape, self.dtype)
+
+    def _write_frame(self, surface: Surface, out: np.ndarray) -> None:
+        """Writes the preprocessed frame of a surface in an array.
+
+        Args:
+            surface: The game surface.
+            out: Array with shape frame_shape to write to.
+        """
+        if self._crop_rect.size != surface.get_size():
+            surface = surface.subsurface(self._crop_rect)
+        if self._resized_surface is not None:
+            pygame.transform.smoothscale(
+                surface, self._resized_surface.get_size(), self._resized_surface)
+            surface = self._resized_surface
+        if self.mirror:
+            out = out[::-1]  # The pixels are written flipped, without an extra copy
+        if self.grayscale:
+            surface_to_grayscale(surface, out, self.normalize, self._work_buffer)
+        else:
+            surface_to_array(surface, out, self.normalize)
+
+    def hold_frame(self, surface: Surface) -> None:
+        """Stores a frame of the game surface to max-pool it with the next processed frame.
+
+        The next call to process() builds its frame as the pixel-wise maximum of
+        both frames, so objects that are only drawn in one of them are kept.
+
+        Args:
+            surface: The game surface.
+        """
+        if self._held_frame is None:
+            self._held_frame = np.empty(self.frame_shape, dtype=self.dtype)
+        self._write_frame(surface, self._held_frame)
+        self._is_frame_held = True
+
+    def _write_new_frame(self, surface: Surface, out: np.ndarray) -> None:
+        """Writes the preprocessed frame of a surface, max-pooled with the held frame if any."""
+        self._write_frame(surface, out)
+        if self._is_frame_held:
+            np.maximum(out, self._held_frame, out=out)
+            self._is_frame_held = False
+
+    def process(self,
+                surface: Surface,
+                out: Optional[np.ndarray] = None,
+                first: bool = False) -> np.ndarray:
+        """Adds a new frame from the game surface and builds the observation.
+
+        Args:
+            surface: The game surface.
+            out: Optional array with shape observation_shape to write the
+                observation to. If None, a buffer owned by the preprocessor is
+                returned (the frame stack itself when stacking frames), so it is
+                overwritten by the next call.
+            first: If True the frame is the first of an episode, so the previous
+                frames of the stack are replaced by this one.
+
+        Returns:
+            An array with shape observation_shape with the observation.
+        """
+        if self._frame_stack is None:
+            if out is None:
+                out = self._frame
+            self._write_new_frame(surface, out)
+            return out
+
+        self._write_new_frame(surface, self._frame_stack.next_slot())
+        frames = self._frame_stack.fill() if first else self._frame_stack.push()
+        if out is None:
+            return frames
+        np.copyto(out, frames)
+        return out
@@ -0,0 +1,363 @@
+"""Replay buffer that stores the game frames once and builds the stacked observations on sampling."""
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class ReplayBatch(NamedTuple):
+    """Batch of transitions sampled from the replay buffer."""
+    observations: np.ndarray  # (B, K, *frame_shape), or (B, *frame_shape) if K == 1
+    actions: np.ndarray  # (B,)
+    rewards: np.ndarray  # (B,)
+    next_observations: np.ndarray  # Same shape as observations
+    terminals: np.ndarray  # (B,) True if next_observations is the end of the episode
+    indices: np.ndarray  # (B,) Indices of the transitions, for update_priorities()
+    weights: np.ndarray  # (B,) Importance sampling weights (ones for uniform sampling)
+
+
+class SumTree:
+    """Binary tree where each node stores the sum of the priorities of its leaves.
+
+    The tree is stored in a flat array (node i has the children 2i and 2i + 1) so
+    the updates and the sampling of a batch are vectorized level by level.
+    """
+
+    def __init__(self, capacity: int):
+        """SumTree constructor.
+
+        Args:
+            capacity: The number of leaves (priorities) of the tree.
+        """
+        self.depth = max(int(np.ceil(np.log2(capacity))), 1)
+        self.n_leaves = 2 ** self.depth
+        self.nodes = np.zeros(2 * self.n_leaves, dtype=np.float64)
+        self.max_priority = 1.0
+
+    @property
+    def total(self) -> float:
+        """The sum of all the priorities."""
+        return float(self.nodes[1])
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        """Returns the priorities of the given leaves."""
+        return self.nodes[indices + self.n_leaves]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        """Sets the priorities of the given leaves.
+
+        Args:
+            indices: int array with the indices of the leaves.
+            priorities: float array with the new priorities.
+        """
+        nodes = np.asarray(indices) + self.n_leaves
+        self.nodes[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> np.ndarray:
+        """Samples leaves with probability proportional to their priorities.
+
+        The total mass is split in batch_size segments and one leaf is sampled
+        from each segment (stratified sampling).
+
+        Args:
+            batch_size: The number of leaves to sample.
+            rng: The random generator.
+
+        Returns:
+            An int array with the indices of the sampled leaves.
+        """
+        segment = self.total / batch_size
+        targets = (np.arange(batch_size) + rng.random(batch_size)) * segment
+        nodes = np.ones(batch_size, dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.nodes[2 * nodes]
+            go_right = targets >= left
+            targets -= left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.n_leaves
+
+
+class FrameReplayBuffer:
+    """Circular replay buffer for the game frames.
+
+    Each step stores a single uint8 frame with the action taken, the reward
+    received and whether the episode ended after it. The stacked observations
+    of the K last frames are gathered from the shared frames when sampling, so
+    every frame is stored only once. The frames before the start of an episode
+    are replaced by its first frame in the stacked observations, as the frame
+    stack of the agent does when acting (see dqn.preprocessing.FrameStack.fill()).
+
+    The frames can be stored in a memory-mapped file to hold millions of
+    transitions, and the transitions can be sampled uniformly or with
+    proportional prioritization.
+
+    The steps can be added while the batches are sampled and gathered by other
+    threads (see dqn.input_pipeline): the bookkeeping (cursor, sum tree) is
+    guarded by a lock, and the transitions overwritten between their sampling
+    and the end of their gathering are detected and sampled again (see gather()).
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 frame_shape: Tuple[int, ...],
+                 frame_stack: int = 1,
+                 frame_dtype: np.dtype = np.uint8,
+                 mmap_path: Optional[str] = None,
+                 prioritized: bool = False,
+                 alpha: float = 0.6,
+                 seed: Optional[int] = None):
+        """FrameReplayBuffer constructor.
+
+        Args:
+            capacity: The maximum number of stored steps.
+            frame_shape: The shape of a single frame, e.g. (W, H, C).
+            frame_stack: The number of frames (K) of an observation.
+            frame_dtype: The dtype of the stored frames.
+            mmap_path: Optional path of a .npy file to store the frames in a
+                memory-mapped array instead of in memory.
+            prioritized: If True the transitions are sampled with probability
+                proportional to priority^alpha.
+            alpha: The prioritization exponent.
+            seed: Seed for the sampling.
+        """
+        if capacity <= frame_stack:
+            raise ValueError("The capacity must be greater than the frame stack.")
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.frame_stack = frame_stack
+        frames_shape = (capacity,) + self.frame_shape
+        if mmap_path is None:
+            self.frames = np.zeros(frames_shape, dtype=frame_dtype)
+        else:
+            self.frames = np.lib.format.open_memmap(
+                mmap_path, mode="w+", dtype=frame_dtype, shape=frames_shape)
+        self.actions = np.zeros(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.terminals = np.zeros(capacity, dtype=bool)
+        self.cursor = 0  # Index for the next step
+        self.size = 0
+        self.n_added = 0  # Total steps added, the version of the contents
+        self.alpha = alpha
+        self._sum_tree = SumTree(capacity) if prioritized else None
+        self._rng = np.random.default_rng(seed)
+        # Offsets of the frames of an observation relative to its last frame
+        self._stack_offsets = np.arange(1 - frame_stack, 1)
+        # Offsets of the steps read by a transition (its observations)
+        self._transition_offsets = np.arange(1 - frame_stack, 2)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, frame: np.ndarray, action: int, reward: float, terminal: bool) -> None:
+        """Stores a step.
+
+        Args:
+            frame: The last frame of the observation where the action was taken.
+            action: The action taken.
+            reward: The reward received after the action.
+            terminal: True if the episode ended after the action.
+        """
+        with self._lock:
+            self.frames[self.cursor] = frame
+            self.actions[self.cursor] = action
+            self.rewards[self.cursor] = reward
+            self.terminals[self.cursor] = terminal
+
+            if self._sum_tree is not None:
+                # The new step has no next frame yet and the steps that follow it
+                # lost the start of their observations
+                overwritten = (self.cursor + np.arange(self.frame_stack)) % self.capacity
+                self._sum_tree.update(overwritten, np.zeros(self.frame_stack))
+                if self.size > 0:
+                    previous = np.array([(self.cursor - 1) % self.capacity])
+                    self._sum_tree.update(previous, np.array([self._sum_tree.max_priority]))
+
+            self.cursor = (self.cursor + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.n_added += 1
+
+    def is_valid(self, indices: np.ndarray) -> np.ndarray:
+        """Checks which transitions can be sampled.
+
+        A transition is valid if its next frame is stored and the frames of its
+        observation have not been overwritten.
+
+        Args:
+            indices: int array with the indices of the transitions.
+
+        Returns:
+            A bool array that says if each transition is valid.
+        """
+        if self.size < self.capacity:
+            return indices < self.size - 1
+        # Position of each index relative to the oldest stored step
+        age_rank = (indices - self.cursor) % self.capacity
+        return (age_rank >= self.frame_stack - 1) & (age_rank < self.capacity - 1)
+
+    def _is_overwritten(self, indices: np.ndarray, version: int) -> np.ndarray:
+        """Checks which transitions had some of their steps overwritten since a version.
+
+        Args:
+            indices: int array with the indices of the transitions.
+            version: The n_added of the buffer when the transitions were sampled.
+
+        Returns:
+            A bool array that says if each transition was overwritten.
+        """
+        n_written = self.n_added - version
+        if n_written >= self.capacity:
+            return np.ones(len(indices), dtype=bool)
+        steps = (indices[:, None] + self._transition_offsets) % self.capacity
+        # Age of the last write of each step, 0 for the newest one
+        age = (self.cursor - 1 - steps) % self.capacity
+        return (age < n_written).any(axis=1)
+
+    def _sample_indices(self, batch_size: int) -> np.ndarray:
+        """Samples valid transition indices uniformly."""
+        indices = self._rng.integers(0, self.size, batch_size)
+        invalid = ~self.is_valid(indices)
+        while invalid.any():
+            indices[invalid] = self._rng.integers(0, self.size, int(invalid.sum()))
+            invalid = ~self.is_valid(indices)
+        return indices
+
+    def _gather_observations(self, indices: np.ndarray) -> np.ndarray:
+        """Builds the stacked observations that end in the given steps.
+
+        Args:
+            indices: int array with shape (B,) with the last step of each observation.
+
+        Returns:
+            An array with shape (B, K, *frame_shape), or (B, *frame_shape) if K == 1.
+        """
+        if self.frame_stack == 1:
+            return self.frames[indices]
+
+        stack_indices = indices[:, None] + self._stack_offsets
+        # A frame belongs to a previous episode if there is a terminal step
+        # between it and the last frame of the observation (or if it is before
+        # the first step of a buffer that has not wrapped around yet)
+        previous_episode = self.terminals[stack_indices[:, :-1] % self.capacity]
+        if self.size < self.capacity:
+            previous_episode |= stack_indices[:, :-1] < 0
+        previous_episode = np.logical_or.accumulate(previous_episode[:, ::-1], axis=1)[:, ::-1]
+        # Those frames are replaced by the first frame of the episode
+        first_frame = previous_episode.sum(axis=1, keepdims=True)
+        stack_positions = np.maximum(np.arange(self.frame_stack), first_frame)
+        stack_indices = np.take_along_axis(stack_indices, stack_positions, axis=1) % self.capacity
+        return self.frames[stack_indices]
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> ReplayBatch:
+        """Samples a batch of transitions.
+
+        Args:
+            batch_size: The number of transitions to sample.
+            beta: Exponent of the importance sampling weights (only for
+                prioritized sampling).
+
+        Returns:
+            A ReplayBatch with the sampled transitions.
+        """
+        return self.gather(*self.sample_indices(batch_size, beta), beta=beta)
+
+    def sample_indices(self, batch_size: int, beta: float = 0.4) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Samples the indices of a batch of transitions, without gathering them.
+
+        Args:
+            batch_size: The number of transitions to sample.
+            beta: Exponent of the importance sampling weights (only for
+                prioritized sampling).
+
+        Returns:
+            A tuple (indices, weights, version) with the int array of the
+            indices of the transitions, the float32 array of their importance
+            sampling weights and the version of the buffer (n_added) that they
+            were sampled from (see gather()).
+        """
+        with self._lock:
+            return self._sample_batch_indices(batch_size, beta) + (self.n_added,)
+
+    def _sample_batch_indices(self, batch_size: int, beta: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples the indices and weights of a batch, with the lock held (see sample_indices())."""
+        if self.size <= self.frame_stack:
+            raise ValueError("There are not enough steps stored to sample.")
+
+        if self._sum_tree is None:
+            indices = self._sample_indices(batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        else:
+            indices = self._sum_tree.sample(batch_size, self._rng)
+            invalid = ~self.is_valid(indices)
+            if invalid.any():  # Only due to floating point rounding at the segment borders
+                indices[invalid] = self._sample_indices(int(invalid.sum()))
+            probabilities = self._sum_tree.get(indices) / self._sum_tree.total
+            probabilities = np.maximum(probabilities, np.finfo(np.float64).tiny)
+            weights = (self.size * probabilities) ** -beta
+            weights = (weights / weights.max()).astype(np.float32)
+        return indices, weights
+
+    def gather(self,
+               indices: np.ndarray,
+               weights: np.ndarray,
+               version: Optional[int] = None,
+               beta: float = 0.4) -> ReplayBatch:
+        """Builds the batch of some sampled transitions.
+
+        The steps are copied without holding the lock, so the batches can be
+        gathered by several threads while other threads add steps (see
+        dqn.input_pipeline). After the copy, the batch is checked against the
+        version that the indices were sampled from: if steps were added over
+        some of its transitions (e.g. the oldest ones, near the cursor of a full
+        buffer), the copy could mix the frames of two episodes with a stale
+        action and reward, so a new batch is sampled and gathered instead.
+
+        Note: The priorities of the prioritized sampling can still change
+        between the sampling and the train step of a batch.
+
+        Args:
+            indices: int array with the indices of the transitions.
+            weights: float32 array with the importance sampling weights.
+            version: The version of the buffer returned by sample_indices(). If
+                None the buffer must not be modified during the gathering.
+            beta: Exponent of the importance sampling weights of the batch
+                sampled again (only for prioritized sampling).
+
+        Returns:
+            A ReplayBatch with the transitions.
+        """
+        while True:
+            next_indices = (indices + 1) % self.capacity
+            batch = ReplayBatch(
+                observations=self._gather_observations(indices),
+                actions=self.actions[indices],
+                rewards=self.rewards[indices],
+                next_observations=self._gather_observations(next_indices),
+                terminals=self.terminals[indices],
+                indices=indices,
+                weights=weights)
+            if version is None:
+                return batch
+            with self._lock:
+                if not self._is_overwritten(indices, version).any():
+                    return batch
+                indices, weights = self._sample_batch_indices(len(indices), beta)
+                version = self.n_added
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        """Updates the priorities of sampled transitions (e.g. with their TD errors).
+
+        Args:
+            indices: int array with the indices of the transitions.
+            priorities: float array with the new priorities.
+        """
+        if self._sum_tree is None:
+            raise ValueError("The replay buffer is not prioritized.")
+        priorities = (np.abs(priorities) + 1e-6) ** self.alpha
+        indices, unique_pos = np.unique(indices, return_index=True)
+        with self._lock:
+            self._sum_tree.max_priority = max(self._sum_tree.max_priority, float(priorities.max()))
+            self._sum_tree.update(indices, priorities[unique_pos])
@@ -0,0 +1,170 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from tf_agents.environments import py_environment
+from tf_agents.specs import array_spec
+from tf_agents.trajectories import time_step
+
+from utils.simulation import STATE_SIZE, LEFT, RIGHT
+from dqn.dqn_utils import AGENT_ACTIONS_TO_INPUTS, compute_reward
+from dqn.dqn_game_api import init_game, reset_game, render_game
+from dqn.dqn_game_api import perform_agent_actions, get_game_state
+from dqn.game_env import TRANSITION_DISCOUNT, OBSERVATION_MODES
+from dqn.preprocessing import ObservationPreprocessor
+
+
+N_AGENTS = 2  # One agent per spaceship, indexed by side (LEFT, RIGHT)
+
+
+class SelfPlayGameEnv(py_environment.PyEnvironment):
+    """Batched environment where two agents control both spaceships of the same game.
+
+    Each step takes the action of each agent (the batch is indexed by side),
+    advances the game a single tick and returns the observation and the reward
+    of each agent, so every simulated tick gives two transitions. The actions
+    are combined moves and shots (see dqn.dqn_utils.AGENT_ACTIONS_TO_INPUTS),
+    dispatched directly as the input flags of the spaceships.
+
+    Both agents play as the right spaceship: the left agent observes the game
+    mirrored horizontally (the state vector with the sides swapped, or the
+    flipped screenshots) and its moves are mirrored back, so a single policy
+    can control both spaceships. Note that in "pixels" mode the spaceships keep
+    their colors, so the left agent sees itself with the color of the left
+    spaceship.
+    """
+
+    def __init__(self,
+                 observation_mode: str = "state",
+                 headless: bool = True,
+                 normalize_observations: bool = True,
+                 observation_size: Optional[Tuple[int, int]] = None,
+                 grayscale: bool = False,
+                 crop_hud: bool = False,
+                 frame_stack: int = 1,
+                 seed: Optional[int] = None):
+        """Environment constructor.
+
+        Args:
+            observation_mode: "pixels" to observe the screenshots of the game or
+                "state" to observe the symbolic state vector of the game (see
+                utils.simulation.encode_state()). In "state" mode the game is
+                not rendered and the screenshot options are ignored.
+            headless: If True the game is simulated and drawn off-screen, without
+                opening a window.
+            normalize_observations: If True the observations are float32 screenshots
+                normalized between [0, 1]. If False they are the raw uint8 pixels
+                and the normalization is left to the model.
+            observation_size: The (width, height) to resize the screenshots to. None
+                to keep the size of the game window.
+            grayscale: If True the screenshots are converted to grayscale.
+            crop_hud: If True the band with the HP texts is cropped out.
+            frame_stack: The number of consecutive screenshots of an observation.
+                With more than one, the observation shape is (frame_stack, W, H, C).
+            seed: Seed for the random generator of the game, which places the
+                spaceships in each episode. If None, it is drawn from the global
+                random module.
+        """
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(
+                f"The observation mode \"{observation_mode}\" is not valid, use one of {OBSERVATION_MODES}.")
+        super().__init__(handle_auto_reset=False)
+        self.context = init_game(headless, render=observation_mode == "pixels", seed=seed)
+        self._action_spec = array_spec.BoundedArraySpec(
+            shape=(), dtype=np.int32, minimum=0, maximum=len(AGENT_ACTIONS_TO_INPUTS) - 1,
+            name="action")
+        self._preprocessors = None
+        if observation_mode == "state":
+            self._observation_spec = array_spec.BoundedArraySpec(
+                shape=(STATE_SIZE,),
+                dtype=np.float32,
+                minimum=-1,
+                maximum=1,
+                name="game_state")
+        else:
+            # Each agent has its own frame stack, the left one with flipped frames
+            self._preprocessors = [ObservationPreprocessor(
+                source_size=(self.context.width, self.context.height),
+                observation_size=observation_size,
+                grayscale=grayscale,
+                crop_hud=crop_hud,
+                frame_stack=frame_stack,
+                normalize=normalize_observations,
+                mirror=agent == LEFT) for agent in (LEFT, RIGHT)]
+            self._observation_spec = array_spec.BoundedArraySpec(
+                shape=self._preprocessors[RIGHT].observation_shape,
+                dtype=self._preprocessors[RIGHT].dtype,
+                minimum=0,
+                maximum=1 if normalize_observations else 255,
+                name="game_screenshot")
+        # The observations of both agents, overwritten by the next step
+        self._observations = np.empty((N_AGENTS,) + self._observation_spec.shape,
+                                      dtype=self._observation_spec.dtype)
+        self._discount = np.full(N_AGENTS, TRANSITION_DISCOUNT, dtype=np.float32)
+        self._hp_state = [self.context.left_spaceship.health,
+                          self.context.right_spaceship.health]
+        self._episode_ended = False
+
+    @property
+    def batched(self) -> bool:
+        return True
+
+    @property
+    def batch_size(self) -> int:
+        return N_AGENTS
+
+    def observation_spec(self) -> array_spec.BoundedArraySpec:
+        """Return observation_spec."""
+        return self._observation_spec
+
+    def action_spec(self) -> array_spec.BoundedArraySpec:
+        """Return action_spec."""
+        return self._action_spec
+
+    def _observe(self, first: bool = False) -> np.ndarray:
+        """Builds the current observation of each agent from the game state or window.
+
+        Args:
+            first: If True the observations are the first of an episode.
+
+        Returns:
+            The array with the observations of both agents.
+        """
+        for agent in (LEFT, RIGHT):
+            if self._preprocessors is None:
+                get_game_state(self.context, self._observations[agent], mirror=agent == LEFT)
+            else:
+                self._preprocessors[agent].process(
+                    self.context.game_window, self._observations[agent], first)
+        return self._observations
+
+    def _reset(self) -> time_step.TimeStep:
+        """Return initial_time_step."""
+        self.context = reset_game(self.context)
+        render_game(self.context)  # Refresh game screen
+        self._hp_state = [self.context.left_spaceship.health,
+                          self.context.right_spaceship.health]
+        self._episode_ended = False
+
+        return time_step.restart(self._observe(first=True), batch_size=N_AGENTS)
+
+    def _step(self, action: np.ndarray) -> time_step.TimeStep:
+        """Apply the actions of both agents and return new time_step."""
+        if self._episode_ended:
+            return self.reset()
+
+        left_action, right_action = np.asarray(action).tolist()
+        perform_agent_actions(self.context, left_action, right_action, render=False)
+
+        health = [self.context.left_spaceship.health,
+                  self.context.right_spaceship.health]
+        reward = np.array([compute_reward(self._hp_state, health, agent) for agent in (LEFT, RIGHT)],
+                          dtype=np.float32)
+        self._hp_state = health
+        self._episode_ended = min(health) <= 0
+
+        render_game(self.context)
+        observations = self._observe()
+
+        if self._episode_ended:
+            return time_step.termination(observations, reward=reward)
+        return time_step.transition(observations, reward=reward, discount=self._discount)
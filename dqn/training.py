@@ -0,0 +1,344 @@
+"""Training loop of the DQN agent with parallel collection, evaluation and checkpoints."""
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tf_agents.agents.dqn import dqn_agent
+from tf_agents.environments import py_environment
+from tf_agents.networks import network, q_network
+from tf_agents.policies import py_tf_eager_policy, tf_policy
+from tf_agents.specs import tensor_spec
+from tf_agents.trajectories import time_step as ts
+from tf_agents.trajectories import trajectory
+from tf_agents.utils import common
+
+from dqn.input_pipeline import make_parallel_replay_dataset
+from dqn.models import ConvQNetwork
+from dqn.replay_buffer import FrameReplayBuffer, ReplayBatch
+
+
+STATE_LAYERS = (256, 256)  # Hidden layers of the Q network of the state vectors
+CHECKPOINTS_TO_KEEP = 3
+
+# A policy of a batched environment, from the time step to the action of each environment
+BatchedPolicy = Callable[[ts.TimeStep], np.ndarray]
+
+
+def create_q_network(observation_spec: tensor_spec.BoundedTensorSpec, n_actions: int) -> network.Network:
+    """Creates the Q network of the observations of an environment.
+
+    Args:
+        observation_spec: The observation spec of the environment.
+        n_actions: The number of actions of the environment.
+
+    Returns:
+        A ConvQNetwork for the screenshots, or a fully connected QNetwork for
+        the state vectors.
+    """
+    if observation_spec.shape.rank >= 3:
+        return ConvQNetwork(observation_spec, n_actions)
+    action_spec = tensor_spec.BoundedTensorSpec((), tf.int32, 0, n_actions - 1)
+    return q_network.QNetwork(observation_spec, action_spec, fc_layer_params=STATE_LAYERS)
+
+
+def create_agent(env: py_environment.PyEnvironment,
+                 learning_rate: float = 1e-4,
+                 gamma: float = 0.99,
+                 epsilon_end: float = 0.05,
+                 epsilon_decay_steps: int = 50_000,
+                 target_update_period: int = 1000) -> dqn_agent.DqnAgent:
+    """Creates the DQN agent of an environment.
+
+    Args:
+        env: The (batched) environment to train on.
+        learning_rate: The learning rate of the Adam optimizer.
+        gamma: The discount of the future rewards.
+        epsilon_end: The final probability of random actions of the collect
+            policy. It decays linearly from 1.
+        epsilon_decay_steps: The number of train steps of the decay of epsilon.
+        target_update_period: The number of train steps between the updates of
+            the target network.
+
+    Returns:
+        The initialized DqnAgent.
+    """
+    time_step_spec = tensor_spec.from_spec(env.time_step_spec())
+    action_spec = tensor_spec.from_spec(env.action_spec())
+    n_actions = int(action_spec.maximum - action_spec.minimum + 1)
+    train_step_counter = tf.Variable(0, dtype=tf.int64, trainable=False)
+
+    def epsilon() -> tf.Tensor:
+        progress = tf.cast(train_step_counter, tf.float32) / epsilon_decay_steps
+        return tf.maximum(epsilon_end, 1 - (1 - epsilon_end) * progress)
+
+    agent = dqn_agent.DqnAgent(
+        time_step_spec,
+        action_spec,
+        q_network=create_q_network(time_step_spec.observation, n_actions),
+        optimizer=tf.keras.optimizers.Adam(learning_rate),
+        epsilon_greedy=epsilon,
+        target_update_period=target_update_period,
+        td_errors_loss_fn=common.element_wise_huber_loss,
+        gamma=gamma,
+        train_step_counter=train_step_counter)
+    agent.initialize()
+    return agent
+
+
+def to_experience(batch: ReplayBatch) -> trajectory.Trajectory:
+    """Converts a batch of transitions to the two-step trajectories that DqnAgent trains on.
+
+    Args:
+        batch: The ReplayBatch of tensors with the transitions.
+
+    Returns:
+        A Trajectory with shape (B, 2) with each observation and the next one.
+    """
+    mid = tf.fill(tf.shape(batch.actions), ts.StepType.MID)
+    next_step_type = tf.where(batch.terminals, ts.StepType.LAST, ts.StepType.MID)
+    return trajectory.Trajectory(
+        step_type=tf.stack([mid, next_step_type], axis=1),
+        observation=tf.stack([batch.observations, batch.next_observations], axis=1),
+        action=tf.stack([batch.actions, batch.actions], axis=1),
+        policy_info=(),
+        next_step_type=tf.stack([next_step_type, mid], axis=1),
+        reward=tf.stack([batch.rewards, tf.zeros_like(batch.rewards)], axis=1),
+        discount=tf.stack([1 - tf.cast(batch.terminals, tf.float32), tf.ones_like(batch.rewards)], axis=1))
+
+
+def create_replay_buffers(env: py_environment.PyEnvironment,
+                          capacity: int,
+                          seed: Optional[int] = None) -> List[FrameReplayBuffer]:
+    """Creates a replay buffer for each environment of a batched environment.
+
+    The stacked screenshot observations with shape (K, W, H, C) store only the
+    last frame of each step, and the buffers stack the K frames on sampling.
+
+    Args:
+        env: The batched environment.
+        capacity: The total number of steps stored by the buffers.
+        seed: Seed for the sampling. The buffer i is seeded with seed + i.
+
+    Returns:
+        A list with a FrameReplayBuffer per environment.
+    """
+    spec = env.observation_spec()
+    frame_shape, frame_stack = spec.shape, 1
+    if len(spec.shape) == 4:
+        frame_stack, frame_shape = spec.shape[0], spec.shape[1:]
+    return [FrameReplayBuffer(capacity // env.batch_size, frame_shape, frame_stack, spec.dtype,
+                              seed=None if seed is None else seed + env_idx)
+            for env_idx in range(env.batch_size)]
+
+
+class Collector:
+    """Steps a batched environment with a policy and stores the transitions of each environment.
+
+    The environments must restart automatically in the step that follows the
+    end of an episode (as EnvPool and VectorGameEnv), the action of that step
+    is not stored.
+    """
+
+    def __init__(self, env: py_environment.PyEnvironment, buffers: List[FrameReplayBuffer]):
+        """Collector constructor.
+
+        Args:
+            env: The batched environment.
+            buffers: The FrameReplayBuffer of each environment (see
+                create_replay_buffers()).
+        """
+        self.env = env
+        self.buffers = buffers
+        self._stacked = buffers[0].frame_stack > 1
+        self._time_step = env.reset()
+
+    def collect(self, policy: BatchedPolicy, n_steps: int) -> int:
+        """Steps all the environments.
+
+        Args:
+            policy: The policy that decides the actions.
+            n_steps: The number of steps of each environment.
+
+        Returns:
+            The number of environment steps (n_steps times the number of
+            environments).
+        """
+        time_step = self._time_step
+        for _ in range(n_steps):
+            # (the observations of a batched environment can be overwritten by the next step)
+            frames = np.array(time_step.observation[:, -1] if self._stacked else time_step.observation)
+            actions = policy(time_step)
+            next_time_step = self.env.step(actions)
+            terminals = next_time_step.step_type == ts.StepType.LAST
+            for env_idx in np.flatnonzero(time_step.step_type != ts.StepType.LAST).tolist():
+                self.buffers[env_idx].add(frames[env_idx], actions[env_idx],
+                                          next_time_step.reward[env_idx], terminals[env_idx])
+            time_step = next_time_step
+        self._time_step = time_step
+        return n_steps * self.env.batch_size
+
+
+def create_batched_policy(policy: tf_policy.TFPolicy) -> BatchedPolicy:
+    """Wraps a TF policy to act in a batched Python environment.
+
+    Args:
+        policy: The policy, e.g. agent.collect_policy.
+
+    Returns:
+        The batched policy.
+    """
+    eager_policy = py_tf_eager_policy.PyTFEagerPolicy(policy, use_tf_function=True, batch_time_steps=False)
+    return lambda time_step: eager_policy.action(time_step).action
+
+
+def evaluate(env: py_environment.PyEnvironment, policy: BatchedPolicy, max_steps: int) -> Tuple[float, int]:
+    """Plays an episode in each environment of a batched environment.
+
+    Args:
+        env: The batched environment.
+        policy: The policy that decides the actions.
+        max_steps: The maximum number of steps of the episodes.
+
+    Returns:
+        A tuple (average_return, n_finished) with the average return of the
+        episodes (the unfinished episodes count with the rewards of their
+        max_steps steps) and the number of episodes that finished.
+    """
+    time_step = env.reset()
+    returns = np.zeros(env.batch_size)
+    finished = np.zeros(env.batch_size, dtype=bool)
+    for _ in range(max_steps):
+        time_step = env.step(policy(time_step))
+        returns += np.where(finished, 0, time_step.reward)
+        finished |= time_step.step_type == ts.StepType.LAST
+        if finished.all():
+            break
+    return float(returns.mean()), int(finished.sum())
+
+
+def train(env: py_environment.PyEnvironment,
+          agent: dqn_agent.DqnAgent,
+          num_iterations: int,
+          eval_env: Optional[py_environment.PyEnvironment] = None,
+          checkpoint_dir: Optional[str] = None,
+          replay_capacity: int = 100_000,
+          initial_collect_steps: int = 1000,
+          collect_steps_per_iteration: int = 1,
+          train_steps_per_iteration: int = 1,
+          batch_size: int = 32,
+          eval_interval: int = 5000,
+          max_eval_steps: int = 2000,
+          checkpoint_interval: int = 5000,
+          log_interval: int = 500,
+          action_repeat: int = 1,
+          seed: Optional[int] = None) -> None:
+    """Trains a DQN agent, alternating the collection of steps and the train steps.
+
+    Each iteration steps every environment of the batched env
+    collect_steps_per_iteration times with the collect policy and then runs
+    train_steps_per_iteration train steps with batches of the replay buffers,
+    so the ratio of environment steps to train steps is
+    env.batch_size * collect_steps_per_iteration / train_steps_per_iteration.
+    The batches are prepared in the background by the tf.data pipelines of the
+    buffers (see make_parallel_replay_dataset()).
+
+    Every log_interval iterations the throughput is printed: the environment
+    steps and the train steps per second of wall time, and the game frames per
+    hour that they make (action_repeat frames per environment step).
+
+    With a checkpoint_dir, the agent (networks, optimizer and counters) is
+    saved every checkpoint_interval iterations and at the end, and a training
+    that is started again resumes from the last checkpoint. The replay buffers
+    are not saved, they are filled again with initial_collect_steps steps of
+    the restored collect policy.
+
+    Args:
+        env: The batched environment to collect the steps, restarted
+            automatically at the end of the episodes (e.g. EnvPool).
+        agent: The DqnAgent of the environment (see create_agent()).
+        num_iterations: The total number of iterations, including the ones of
+            a restored checkpoint.
+        eval_env: Optional batched environment to evaluate the greedy policy
+            every eval_interval iterations, with an episode per environment.
+        checkpoint_dir: Optional directory of the checkpoints.
+        replay_capacity: The total number of steps stored by the replay buffers.
+        initial_collect_steps: The number of steps of each environment collected
+            before training (with random actions if the agent is new).
+        collect_steps_per_iteration: The number of steps of each environment
+            collected per iteration.
+        train_steps_per_iteration: The number of train steps per iteration.
+        batch_size: The number of transitions of each train step. It must be a
+            multiple of the number of environments.
+        eval_interval: The number of iterations between evaluations.
+        max_eval_steps: The maximum number of steps of an evaluation episode.
+        checkpoint_interval: The number of iterations between checkpoints.
+        log_interval: The number of iterations between throughput logs.
+        action_repeat: The number of game frames of each environment step (see
+            GameEnv action_repeat), only for the throughput logs.
+        seed: Seed for the sampling of the replay buffers.
+    """
+    buffers = create_replay_buffers(env, replay_capacity, seed)
+    if initial_collect_steps <= buffers[0].frame_stack:
+        raise ValueError("The initial collect steps must be more than the frame stack.")
+    iteration = tf.Variable(0, dtype=tf.int64, trainable=False)
+    env_steps = tf.Variable(0, dtype=tf.int64, trainable=False)
+    manager = None
+    if checkpoint_dir is not None:
+        checkpoint = tf.train.Checkpoint(agent=agent, iteration=iteration, env_steps=env_steps)
+        manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, CHECKPOINTS_TO_KEEP)
+        if manager.latest_checkpoint is not None:
+            checkpoint.restore(manager.latest_checkpoint)
+            print(f"Restored {manager.latest_checkpoint} at iteration {int(iteration.numpy())}.")
+
+    collector = Collector(env, buffers)
+    collect_policy = create_batched_policy(agent.collect_policy)
+    if int(iteration.numpy()) == 0:
+        rng = np.random.default_rng(seed)
+        n_actions = int(env.action_spec().maximum) + 1
+        collector.collect(lambda _: rng.integers(0, n_actions, env.batch_size, dtype=np.int32),
+                          initial_collect_steps)
+    else:
+        collector.collect(collect_policy, initial_collect_steps)
+
+    dataset = make_parallel_replay_dataset(buffers, batch_size, normalize=False)
+    batches = iter(dataset)
+    train_step = common.function(lambda batch: agent.train(to_experience(batch), weights=batch.weights).loss)
+    eval_policy = create_batched_policy(agent.policy)
+
+    interval_start = time.perf_counter()
+    interval_env_steps = interval_train_steps = 0
+    collect_time = 0.0
+    loss = 0.0
+    while int(iteration.numpy()) < num_iterations:
+        collect_start = time.perf_counter()
+        interval_env_steps += collector.collect(collect_policy, collect_steps_per_iteration)
+        collect_time += time.perf_counter() - collect_start
+        for _ in range(train_steps_per_iteration):
+            loss = train_step(next(batches))
+        interval_train_steps += train_steps_per_iteration
+        iteration.assign_add(1)
+        current = int(iteration.numpy())
+
+        if current % log_interval == 0:
+            elapsed = time.perf_counter() - interval_start
+            env_steps.assign_add(interval_env_steps)
+            print(f"Iteration {current}: {interval_env_steps / elapsed:.1f} env steps/s "
+                  f"({interval_env_steps * action_repeat / elapsed * 3600:.3g} frames/h), "
+                  f"{interval_train_steps / elapsed:.1f} train steps/s, "
+                  f"{100 * collect_time / elapsed:.0f}% collecting, loss {float(loss):.4f}")
+            interval_start = time.perf_counter()
+            interval_env_steps = interval_train_steps = 0
+            collect_time = 0.0
+        pause_start = time.perf_counter()
+        if eval_env is not None and current % eval_interval == 0:
+            average_return, n_finished = evaluate(eval_env, eval_policy, max_eval_steps)
+            print(f"Iteration {current}: average return {average_return:.1f} "
+                  f"({n_finished}/{eval_env.batch_size} episodes finished)")
+        if manager is not None and current % checkpoint_interval == 0:
+            manager.save()
+        interval_start += time.perf_counter() - pause_start  # (not counted in the throughput)
+
+    env_steps.assign_add(interval_env_steps)
+    if manager is not None:
+        manager.save()
@@ -0,0 +1,100 @@
+from typing import Optional
+
+import numpy as np
+from tf_agents.environments import py_environment
+from tf_agents.specs import array_spec
+from tf_agents.trajectories import time_step
+
+from utils.simulation import NO_INPUT
+from utils.vector_simulation import VectorGame, STATE_SIZE, LEFT, RIGHT
+from dqn.dqn_utils import ACTIONS_TO_INPUTS
+from dqn.dqn_utils import STEP_REWARD, HIT_REWARD, WIN_REWARD, LOSS_REWARD
+from dqn.game_env import TRANSITION_DISCOUNT
+
+
+# Lookup table from action code to the input flags of the right spaceship
+ACTION_INPUTS = np.array([ACTIONS_TO_INPUTS[action] for action in range(len(ACTIONS_TO_INPUTS))],
+                         dtype=np.int32)
+
+
+class VectorGameEnv(py_environment.PyEnvironment):
+    """Batched environment that steps several games at once with NumPy arrays.
+
+    The agent controls the right spaceship of every game with the same actions
+    and rewards as GameEnv, but the observations are the state vectors of the
+    games (see VectorGame.get_state()) instead of screenshots. The games that
+    end are restarted automatically in the following step.
+    """
+
+    def __init__(self, num_envs: int, seed: Optional[int] = None):
+        """Environment constructor.
+
+        Args:
+            num_envs: The number of games to run in parallel.
+            seed: Seed for the random initial positions of the spaceships.
+        """
+        super().__init__(handle_auto_reset=False)
+        self._num_envs = num_envs
+        self._game = VectorGame(num_envs, seed)
+        # 5 actions: move up, down, left, right and shoot
+        self._action_spec = array_spec.BoundedArraySpec(
+            shape=(), dtype=np.int32, minimum=0, maximum=len(ACTION_INPUTS) - 1, name="action")
+        self._observation_spec = array_spec.BoundedArraySpec(
+            shape=(STATE_SIZE,),
+            dtype=np.float32,
+            minimum=-1,
+            maximum=1,
+            name="game_state")
+        self._inputs = np.full((num_envs, 2), NO_INPUT, dtype=np.int32)
+        self._episode_ended = np.zeros(num_envs, dtype=bool)
+
+    @property
+    def batched(self) -> bool:
+        return True
+
+    @property
+    def batch_size(self) -> int:
+        return self._num_envs
+
+    def observation_spec(self) -> array_spec.BoundedArraySpec:
+        """Return observation_spec."""
+        return self._observation_spec
+
+    def action_spec(self) -> array_spec.BoundedArraySpec:
+        """Return action_spec."""
+        return self._action_spec
+
+    def _reset(self) -> time_step.TimeStep:
+        """Return initial_time_step."""
+        self._game.reset()
+        self._episode_ended[:] = False
+        return time_step.restart(self._game.get_state(), batch_size=self._num_envs)
+
+    def _step(self, action: np.ndarray) -> time_step.TimeStep:
+        """Apply actions and return new time_step."""
+        restarted = self._episode_ended.copy()
+
+        self._inputs[:, RIGHT] = np.where(restarted, NO_INPUT, ACTION_INPUTS[action])
+        damage = self._game.step(self._inputs)
+
+        # Compute rewards
+        dead = self._game.is_dead()
+        won = dead[:, LEFT]
+        lost = dead[:, RIGHT] & ~won
+        reward = STEP_REWARD + HIT_REWARD * (damage[:, LEFT] - damage[:, RIGHT])
+        reward = np.where(won, WIN_REWARD, np.where(lost, LOSS_REWARD, reward))
+
+        # Restart the games that ended in the previous step
+        self._game.reset(restarted)
+        self._episode_ended = (won | lost) & ~restarted
+
+        step_type = np.where(self._episode_ended, time_step.StepType.LAST, time_step.StepType.MID)
+        step_type = np.where(restarted, time_step.StepType.FIRST, step_type)
+        reward = np.where(restarted, 0, reward)
+        discount = np.where(self._episode_ended, 0.0, TRANSITION_DISCOUNT)
+
+        return time_step.TimeStep(
+            step_type=step_type.astype(np.int32),
+            reward=reward.astype(np.float32),
+            discount=discount.astype(np.float32),
+            observation=self._game.get_state())
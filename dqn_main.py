@@ -1,12 +1,94 @@
-import pygame
-from tf_agents.environments import tf_py_environment
+import argparse
+import os
 
+import tensorflow as tf
+
+from dqn.env_pool import EnvPool
 from dqn.game_env import GameEnv
-from dqn.models import ConvQNetwork
+from dqn.vector_game_env import VectorGameEnv
+from dqn.training import create_agent, train
+
+
+def create_env(args: argparse.Namespace, num_envs: int, seed: int):
+    """Creates a batched environment with the options of the command line."""
+    if args.observation_mode == "state":
+        return VectorGameEnv(num_envs, seed=seed)
+    env_kwargs = dict(observation_mode="pixels",
+                      normalize_observations=False,  # (normalized by the network)
+                      observation_size=tuple(args.observation_size),
+                      grayscale=args.grayscale,
+                      crop_hud=True,
+                      frame_stack=args.frame_stack,
+                      action_repeat=args.action_repeat)
+    return EnvPool(num_envs, GameEnv, env_kwargs, seed=seed)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Train a DQN agent to play Spaceships")
+    arg_parser.add_argument("--observation-mode", choices=("pixels", "state"), default="pixels",
+                            help="Observe the screenshots or the state vectors of the games")
+    arg_parser.add_argument("--num-envs", type=int, default=os.cpu_count(),
+                            help="Number of environments collecting in parallel")
+    arg_parser.add_argument("--observation-size", type=int, nargs=2, default=(180, 100), metavar=("W", "H"),
+                            help="Size of the screenshots")
+    arg_parser.add_argument("--grayscale", action="store_true", help="Observe grayscale screenshots")
+    arg_parser.add_argument("--frame-stack", type=int, default=4, help="Screenshots per observation")
+    arg_parser.add_argument("--action-repeat", type=int, default=4, help="Game ticks per environment step")
+    arg_parser.add_argument("--iterations", type=int, default=100_000,
+                            help="Total number of collect and train iterations")
+    arg_parser.add_argument("--collect-steps", type=int, default=1,
+                            help="Steps of each environment collected per iteration")
+    arg_parser.add_argument("--train-steps", type=int, default=1, help="Train steps per iteration")
+    arg_parser.add_argument("--batch-size", type=int, default=32,
+                            help="Transitions per train step (a multiple of the number of environments)")
+    arg_parser.add_argument("--replay-capacity", type=int, default=100_000,
+                            help="Total steps stored by the replay buffers")
+    arg_parser.add_argument("--initial-collect-steps", type=int, default=1000,
+                            help="Steps of each environment collected before training")
+    arg_parser.add_argument("--learning-rate", type=float, default=1e-4)
+    arg_parser.add_argument("--gamma", type=float, default=0.99)
+    arg_parser.add_argument("--target-update-period", type=int, default=1000)
+    arg_parser.add_argument("--eval-interval", type=int, default=5000,
+                            help="Iterations between evaluations of the greedy policy")
+    arg_parser.add_argument("--eval-episodes", type=int, default=4,
+                            help="Episodes of each evaluation (0 to disable them)")
+    arg_parser.add_argument("--checkpoint-dir", type=str, default=None,
+                            help="Directory to save the checkpoints and resume from")
+    arg_parser.add_argument("--checkpoint-interval", type=int, default=5000,
+                            help="Iterations between checkpoints")
+    arg_parser.add_argument("--log-interval", type=int, default=500,
+                            help="Iterations between throughput logs")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    tf.random.set_seed(args.seed)
+    env = create_env(args, args.num_envs, args.seed)
+    eval_env = None
+    if args.eval_episodes > 0:
+        eval_env = create_env(args, args.eval_episodes, args.seed + args.num_envs)
+    try:
+        agent = create_agent(env,
+                             learning_rate=args.learning_rate,
+                             gamma=args.gamma,
+                             target_update_period=args.target_update_period)
+        train(env, agent, args.iterations,
+              eval_env=eval_env,
+              checkpoint_dir=args.checkpoint_dir,
+              replay_capacity=args.replay_capacity,
+              initial_collect_steps=args.initial_collect_steps,
+              collect_steps_per_iteration=args.collect_steps,
+              train_steps_per_iteration=args.train_steps,
+              batch_size=args.batch_size,
+              eval_interval=args.eval_interval,
+              checkpoint_interval=args.checkpoint_interval,
+              log_interval=args.log_interval,
+              action_repeat=args.action_repeat if args.observation_mode == "pixels" else 1,
+              seed=args.seed)
+    finally:
+        for batched_env in (env, eval_env):
+            if isinstance(batched_env, EnvPool):
+                batched_env.close()
 
 
 if __name__ == "__main__":
-    # Create a TF agents environment from my py environment
-    env = GameEnv()
-    train_env = tf_py_environment.TFPyEnvironment(env)
-    #eval_env = tf_py_environment.TFPyEnvironment(env)
+    main()
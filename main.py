@@ -1,13 +1,86 @@
+import argparse
+import cProfile
+import pstats
+import sys
+
 import pygame
 
-from utils.game_api import setup_game, game_loop
+from utils.config import FPS, TEAM_SIZE
+from utils.game_api import setup_game, game_loop, fixed_step_game_loop
+from utils.profiler import FrameProfiler, GAME_LOOP_PHASES
+from utils.recording import InputRecorder, read_recording, replay_recording
+from utils.recording import compute_state_hash
+from utils.opponents import HeuristicOpponent, LookaheadOpponent
 
 
-def main():
-    context = setup_game()
-    game_loop(context)
+OPPONENTS = {"heuristic": HeuristicOpponent, "lookahead": LookaheadOpponent}
+
+
+def run(args: argparse.Namespace):
+    """Runs (or replays) a match with the options of the command line."""
+    if args.replay is not None:
+        recording = read_recording(args.replay)
+        context = replay_recording(recording)
+        if compute_state_hash(context) != recording.state_hash:
+            print(f"Error! The replay of {len(recording.inputs)} ticks doesn't match the recording.")
+            sys.exit(1)
+        print(f"Replay of {len(recording.inputs)} ticks verified.")
+        return
+
+    context = setup_game(args.seed, args.team_size)
+    recorder = None
+    if args.record is not None:
+        recorder = InputRecorder(args.record, context.seed, n_ships=len(context.spaceships))
+    profiler = None
+    if args.profile_overlay or args.profile_dump is not None:
+        profiler = FrameProfiler(GAME_LOOP_PHASES, dump_path=args.profile_dump)
+    opponent = None
+    if args.opponent is not None:
+        opponent = OPPONENTS[args.opponent]()
+    if args.fixed_step:
+        fixed_step_game_loop(context, recorder, profiler, show_overlay=args.profile_overlay,
+                             render_fps=args.render_fps, opponent=opponent)
+    else:
+        game_loop(context, recorder, profiler, show_overlay=args.profile_overlay, opponent=opponent)
+    if args.profile_dump is not None:
+        profiler.dump(args.profile_dump)
+    if recorder is not None:
+        recorder.close(context)
     pygame.quit()
 
 
+def main():
+    arg_parser = argparse.ArgumentParser(description="Spaceships game")
+    arg_parser.add_argument("--seed", type=int, default=None,
+                            help="Seed for the random generator of the game")
+    arg_parser.add_argument("--team-size", type=int, default=TEAM_SIZE,
+                            help="Number of spaceships of each team (controlled together by its player)")
+    arg_parser.add_argument("--opponent", choices=list(OPPONENTS), default=None,
+                            help="Let the computer play the left team")
+    arg_parser.add_argument("--fixed-step", action="store_true",
+                            help="Simulate at a fixed rate independent of the drawing speed")
+    arg_parser.add_argument("--render-fps", type=int, default=FPS,
+                            help="Maximum frames drawn per second with --fixed-step")
+    arg_parser.add_argument("--record", type=str, default=None, metavar="PATH",
+                            help="Record the inputs of the match to a file")
+    arg_parser.add_argument("--replay", type=str, default=None, metavar="PATH",
+                            help="Re-simulate a recorded match without window and verify it")
+    arg_parser.add_argument("--profile-overlay", action="store_true",
+                            help="Show the timings of the phases of the frames over the game")
+    arg_parser.add_argument("--profile-dump", type=str, default=None, metavar="PATH",
+                            help="Write the timings of the phases periodically to a .csv or .json file")
+    arg_parser.add_argument("--cprofile", type=str, default=None, metavar="PATH",
+                            help="Run the game inside cProfile and write the stats to a file")
+    args = arg_parser.parse_args()
+
+    if args.cprofile is not None:
+        profile = cProfile.Profile()
+        profile.runcall(run, args)
+        profile.dump_stats(args.cprofile)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+    else:
+        run(args)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+from pygame import Rect
+
+from utils.classes.bullet_pool import BulletPool
+
+
+class TestBulletPool(unittest.TestCase):
+    """Tests for the bullet pool class"""
+
+    def setUp(self) -> None:
+        """Prepares the variables for each test in this class."""
+        self.pool = BulletPool(capacity=4)
+
+    def test_free_list(self) -> None:
+        """Tests that the pool has a fixed capacity and reuses the released slots."""
+        slots = [self.pool.spawn(0, 0, 10, 5, 7, 1, owner=0) for _ in range(4)]
+        self.assertEqual([0, 1, 2, 3], slots)
+        self.assertEqual(-1, self.pool.spawn(0, 0, 10, 5, 7, 1, owner=0),
+                         msg="The pool should be full.")
+        self.pool.release(np.array([2]))
+        self.assertEqual(3, len(self.pool))
+        self.assertEqual(3, self.pool.count(0))
+        self.assertEqual(2, self.pool.spawn(0, 0, 10, 5, -7, 1, owner=1),
+                         msg="The released slot should be reused.")
+        self.assertEqual(1, self.pool.count(1))
+
+    def test_move_and_cull(self) -> None:
+        """Tests the movement of the bullets and the detection of the ones out of the field."""
+        right_slot = self.pool.spawn(95, 0, 10, 5, 7, 1, owner=0)
+        left_slot = self.pool.spawn(3, 0, 10, 5, -7, 1, owner=1)
+        self.pool.move()
+        self.assertEqual([102, -4], [self.pool.x[right_slot], self.pool.x[left_slot]])
+        self.assertEqual([right_slot, left_slot],
+                         np.flatnonzero(self.pool.find_out_of_field(100)).tolist())
+
+    def test_find_hits(self) -> None:
+        """Tests that only the bullets of the given owner that overlap the target hit it."""
+        target = Rect(50, 50, 20, 20)
+        hitting = self.pool.spawn(45, 55, 10, 5, 7, 1, owner=0)
+        self.pool.spawn(45, 55, 10, 5, -7, 1, owner=1)  # From the target side
+        self.pool.spawn(40, 55, 10, 5, 7, 1, owner=0)  # Touching the border only
+        self.assertEqual([hitting], np.flatnonzero(self.pool.find_hits(target, owner=0)).tolist())
@@ -0,0 +1,39 @@
+import unittest
+
+from utils.classes.game_context import GameContext
+from utils.game_utils import create_barrier, create_spaceships
+from utils.simulation import NO_INPUT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, SHOOT, LEFT, RIGHT
+from dqn.dqn_utils import AGENT_ACTIONS_TO_INPUTS, MIRRORED_AGENT_ACTIONS_TO_INPUTS
+from dqn.dqn_utils import WIN_REWARD, LOSS_REWARD, STEP_REWARD, HIT_REWARD
+from dqn.dqn_utils import handle_agent_actions, compute_reward
+
+
+class TestAgentActions(unittest.TestCase):
+    """Tests for the combined actions and rewards of the self-play agents"""
+
+    def test_action_table(self) -> None:
+        """Tests that the combined actions cover each move and shot combination once."""
+        self.assertEqual(NO_INPUT, AGENT_ACTIONS_TO_INPUTS[0])
+        self.assertEqual(18, len(set(AGENT_ACTIONS_TO_INPUTS)))
+        self.assertIn(MOVE_LEFT | MOVE_UP | SHOOT, AGENT_ACTIONS_TO_INPUTS)
+        action = AGENT_ACTIONS_TO_INPUTS.index(MOVE_LEFT | SHOOT)
+        self.assertEqual(MOVE_RIGHT | SHOOT, MIRRORED_AGENT_ACTIONS_TO_INPUTS[action])
+
+    def test_handle_agent_actions(self) -> None:
+        """Tests that both spaceships act in the same tick, the left one mirrored."""
+        context = GameContext(game_window=None,
+                              barrier=create_barrier(),
+                              spaceships=create_spaceships())
+        left_x, right_x = context.left_spaceship.x, context.right_spaceship.x
+        action = AGENT_ACTIONS_TO_INPUTS.index(MOVE_LEFT | SHOOT)
+        handle_agent_actions(context, action, action)
+        self.assertGreater(context.left_spaceship.x, left_x)
+        self.assertLess(context.right_spaceship.x, right_x)
+        self.assertEqual((1, 1), (context.bullets.count(LEFT), context.bullets.count(RIGHT)))
+
+    def test_compute_reward(self) -> None:
+        """Tests that the rewards of both sides are symmetric."""
+        self.assertEqual(STEP_REWARD + HIT_REWARD, compute_reward((5, 5), (4, 5), RIGHT))
+        self.assertEqual(STEP_REWARD - HIT_REWARD, compute_reward((5, 5), (4, 5), LEFT))
+        self.assertEqual(WIN_REWARD, compute_reward((5, 5), (5, 0), LEFT))
+        self.assertEqual(LOSS_REWARD, compute_reward((5, 5), (5, 0), RIGHT))
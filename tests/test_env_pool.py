@@ -0,0 +1,75 @@
+from multiprocessing.shared_memory import SharedMemory
+import unittest
+
+import numpy as np
+from tf_agents.trajectories import time_step
+
+from dqn.env_pool import EnvPool
+from dqn.game_env import GameEnv
+from utils.opponents import HeuristicOpponent
+from utils.simulation import STATE_SIZE
+
+
+def create_pool(seed: int) -> EnvPool:
+    """Creates a pool of two state environments where the opponent ends the episodes."""
+    env_kwargs = dict(observation_mode="state", action_repeat=4, seed=seed, opponent=HeuristicOpponent())
+    return EnvPool(2, GameEnv, env_kwargs, seed=seed)
+
+
+class TestEnvPool(unittest.TestCase):
+    """Tests for the pool of environments in worker processes"""
+
+    def setUp(self) -> None:
+        """Prepares a pool of state environments for each test in this class."""
+        self.pool = create_pool(seed=0)
+        self.actions = np.zeros(2, dtype=np.int32)
+
+    def tearDown(self) -> None:
+        """Stops the workers of the pool."""
+        if self.pool._conns:
+            self.pool.close()
+
+    def test_observations(self) -> None:
+        """Tests that the observations are read from the shared slab."""
+        ts = self.pool.reset()
+        self.assertIs(self.pool.observations, ts.observation)
+        self.assertEqual((2, STATE_SIZE), ts.observation.shape)
+        self.assertEqual(np.float32, ts.observation.dtype)
+        self.assertTrue((ts.step_type == time_step.StepType.FIRST).all())
+        first = ts.observation.copy()
+        ts = self.pool.step(self.actions)
+        self.assertFalse(np.array_equal(first, ts.observation))
+
+    def test_auto_reset(self) -> None:
+        """Tests that an environment restarts in the step that follows the end of its episode."""
+        self.pool.reset()
+        for _ in range(2000):
+            ts = self.pool.step(self.actions)
+            if ts.is_last().any():
+                break
+        self.assertTrue(ts.is_last().any(), msg="The opponent should end an episode.")
+        ended = ts.is_last()
+        ts = self.pool.step(self.actions)
+        self.assertTrue((ts.step_type[ended] == time_step.StepType.FIRST).all())
+
+    def test_seed(self) -> None:
+        """Tests that two pools with the same seed have the same trajectories."""
+        other_pool = create_pool(seed=0)
+        try:
+            for pool_ts in zip(self.pool.reset(), other_pool.reset()):
+                np.testing.assert_array_equal(*pool_ts)
+            for _ in range(50):
+                ts, other_ts = self.pool.step(self.actions), other_pool.step(self.actions)
+                np.testing.assert_array_equal(ts.observation, other_ts.observation)
+                np.testing.assert_array_equal(ts.reward, other_ts.reward)
+        finally:
+            other_pool.close()
+
+    def test_close(self) -> None:
+        """Tests that closing the pool stops the workers and unlinks the shared memory."""
+        name = self.pool._shared_memory.name
+        processes = self.pool._processes
+        self.pool.close()
+        self.assertFalse(any(process.is_alive() for process in processes))
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
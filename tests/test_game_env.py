@@ -0,0 +1,23 @@
+import unittest
+
+import numpy as np
+
+from dqn.game_env import GameEnv
+
+
+class TestGameEnv(unittest.TestCase):
+    """Tests for the single game environment"""
+
+    def test_fresh_observations(self) -> None:
+        """Tests that the time steps keep their observations unless a buffer is given."""
+        env = GameEnv(observation_mode="state", seed=0)
+        first = env.reset()
+        first_observation = first.observation.copy()
+        second = env.step(np.int32(1))
+        self.assertIsNot(first.observation, second.observation)
+        np.testing.assert_array_equal(first_observation, first.observation)
+        self.assertFalse(np.array_equal(first.observation, second.observation))
+
+        buffer = np.empty_like(first.observation)
+        env.set_observation_buffer(buffer)
+        self.assertIs(buffer, env.step(np.int32(1)).observation)
@@ -0,0 +1,51 @@
+import unittest
+
+import pygame
+
+from utils.config import WHITE, INIT_HEALTH
+from utils.hud import TEXT_CACHE, TextCache, prerender_hp_texts, render_hp_text
+
+
+class TestTextCache(unittest.TestCase):
+    """Tests for the TextCache class"""
+
+    def setUp(self) -> None:
+        """Prepares the variables for each test in this class."""
+        pygame.font.init()
+        self.font = pygame.font.Font(None, 20)
+        self.cache = TextCache(max_size=2)
+
+    def test_reuse(self) -> None:
+        """Tests that a text is rendered only once."""
+        surface = self.cache.render(self.font, "HP: 10", WHITE)
+        self.assertIs(surface, self.cache.render(self.font, "HP: 10", WHITE))
+        self.assertIsNot(surface, self.cache.render(self.font, "HP: 9", WHITE))
+
+    def test_lru_eviction(self) -> None:
+        """Tests that the least recently used text is removed when the cache is full."""
+        first = self.cache.render(self.font, "a", WHITE)
+        second = self.cache.render(self.font, "b", WHITE)
+        self.cache.render(self.font, "a", WHITE)  # "b" is now the least recently used
+        self.cache.render(self.font, "c", WHITE)
+        self.assertEqual(2, len(self.cache))
+        self.assertIs(first, self.cache.render(self.font, "a", WHITE))
+        self.assertIsNot(second, self.cache.render(self.font, "b", WHITE))
+
+
+class TestPrerenderHpTexts(unittest.TestCase):
+    """Tests for the HP counters rendered in advance"""
+
+    def setUp(self) -> None:
+        """Empties the cache of the texts of the game."""
+        pygame.font.init()
+        TEXT_CACHE.clear()
+
+    def test_team_health(self) -> None:
+        """Tests that the counters up to the health of a whole team are cached."""
+        max_health = 4 * INIT_HEALTH
+        prerender_hp_texts(max_health)
+        self.assertEqual(max_health + 1, len(TEXT_CACHE))
+        counter = render_hp_text(max_health)
+        self.assertEqual(max_health + 1, len(TEXT_CACHE))
+        self.assertIs(counter, render_hp_text(max_health))
+        self.assertIs(render_hp_text(0), render_hp_text(0))
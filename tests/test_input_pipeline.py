@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from dqn.input_pipeline import make_replay_dataset
+from dqn.replay_buffer import FrameReplayBuffer
+
+
+class TestReplayDataset(unittest.TestCase):
+    """Tests for the tf.data pipeline of the replay buffer"""
+
+    def setUp(self) -> None:
+        """Prepares a replay buffer whose frames are filled with the step number."""
+        self.buffer = FrameReplayBuffer(64, (3, 2, 1), frame_stack=2, seed=0)
+        for step in range(100):
+            self.buffer.add(np.full(self.buffer.frame_shape, step, dtype=np.uint8),
+                            action=step % 5, reward=float(step), terminal=False)
+
+    def test_normalized_batches(self) -> None:
+        """Tests that the batches are normalized in the graph and match the sampled steps."""
+        dataset = make_replay_dataset(self.buffer, batch_size=8)
+        for batch in dataset.take(3):
+            self.assertEqual((8, 2, 3, 2, 1), tuple(batch.observations.shape))
+            self.assertEqual(tf.float32, batch.observations.dtype)
+            last_frames = batch.observations[:, -1, 0, 0, 0].numpy()
+            np.testing.assert_allclose(batch.rewards.numpy() / 255, last_frames, rtol=1e-6)
+            np.testing.assert_allclose(batch.next_observations[:, 0].numpy(),
+                                       batch.observations[:, 1].numpy())
+            self.assertTrue((batch.actions.numpy() == batch.rewards.numpy() % 5).all())
+
+    def test_raw_frames(self) -> None:
+        """Tests that the frames keep the dtype of the buffer without normalization."""
+        batch = next(iter(make_replay_dataset(self.buffer, batch_size=4, normalize=False)))
+        self.assertEqual(tf.uint8, batch.observations.dtype)
+        self.assertEqual((4,), tuple(batch.weights.shape))
@@ -0,0 +1,91 @@
+import time
+import unittest
+
+from utils.config import INIT_HEALTH
+from utils.classes.event_bus import FireEvent, HitEvent
+from utils.classes.game_context import GameContext
+from utils.classes.spaceship import Spaceship
+from utils.game_utils import create_barrier, create_spaceships
+from utils.opponents import HeuristicOpponent, LookaheadOpponent
+from utils.simulation import NO_INPUT, MOVE_UP, MOVE_DOWN, SHOOT, LEFT, step, encode_state
+
+
+class TestOpponents(unittest.TestCase):
+    """Tests for the computer controlled opponents"""
+
+    def setUp(self) -> None:
+        """Prepares a headless game context for each test in this class."""
+        self.left_spaceship = Spaceship(image_file="spaceship_yellow.png",
+                                        side="left",
+                                        init_pos=(100, 200))
+        self.right_spaceship = Spaceship(image_file="spaceship_red.png",
+                                         side="right",
+                                         init_pos=(700, 200))
+        self.context = GameContext(game_window=None,
+                                   barrier=create_barrier(),
+                                   spaceships=(self.left_spaceship, self.right_spaceship))
+
+    def test_heuristic_aim(self) -> None:
+        """Tests that the heuristic opponent moves towards the enemy and shoots when aligned."""
+        opponent = HeuristicOpponent()
+        self.assertTrue(opponent.get_inputs(self.context, self.left_spaceship) & SHOOT)
+        self.right_spaceship.y = 400
+        inputs = opponent.get_inputs(self.context, self.left_spaceship)
+        self.assertEqual(MOVE_DOWN, inputs, msg="The spaceship should move down without shooting.")
+
+    def test_heuristic_dodge(self) -> None:
+        """Tests that the heuristic opponent dodges an incoming bullet."""
+        opponent = HeuristicOpponent()
+        step(self.context, NO_INPUT, SHOOT)
+        dodged = False
+        for _ in range(150):
+            inputs = opponent.get_inputs(self.context, self.left_spaceship)
+            dodged |= bool(inputs & (MOVE_UP | MOVE_DOWN))
+            step(self.context, inputs & ~SHOOT, NO_INPUT)
+        self.assertTrue(dodged)
+        self.assertEqual(INIT_HEALTH, self.left_spaceship.health,
+                         msg="The bullet shouldn't hit the spaceship.")
+        self.assertEqual(0, len(self.context.bullets.get_slots()))
+
+    def test_lookahead_budget(self) -> None:
+        """Tests that the lookahead opponent searches within its budget and keeps the game intact."""
+        events = []
+        self.context.events.subscribe(FireEvent, events.append)
+        self.context.events.subscribe(HitEvent, events.append)
+        step(self.context, SHOOT, SHOOT)
+        events.clear()
+        opponent = LookaheadOpponent(max_depth=10, time_budget=5.0)
+        opponent.get_inputs(self.context, self.right_spaceship)  # Creates the private context
+        state = encode_state(self.context).tolist()
+        rng_state = self.context.rng.getstate()
+        start = time.perf_counter()
+        opponent.plan(self.context, self.right_spaceship)
+        elapsed = time.perf_counter() - start
+        # The budget is only exceeded by the simulation of one decision
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(state, encode_state(self.context).tolist())
+        self.assertEqual(rng_state, self.context.rng.getstate())
+        self.assertEqual([], events, msg="The simulated ticks shouldn't publish events.")
+
+    def test_lookahead_shared_budget(self) -> None:
+        """Tests that the spaceships planned in a tick share the time budget of the tick."""
+        context = GameContext(game_window=None, barrier=create_barrier(), spaceships=create_spaceships(3))
+        opponent = LookaheadOpponent(max_depth=50, time_budget=100.0)
+        start = time.perf_counter()
+        opponent.start_tick(context)
+        for spaceship in context.spaceships:
+            if spaceship.team == LEFT:
+                opponent.get_inputs(context, spaceship)
+        elapsed = time.perf_counter() - start
+        self.assertGreater(elapsed, 0.1)
+        self.assertLess(elapsed, 0.15, msg="The tick shouldn't search once per spaceship.")
+
+    def test_lookahead_restart(self) -> None:
+        """Tests that the plans of the lookahead opponent don't carry into a restarted game."""
+        opponent = LookaheadOpponent(max_depth=1)
+        opponent.get_inputs(self.context, self.left_spaceship)
+        opponent.get_inputs(self.context, self.left_spaceship)
+        self.assertEqual(opponent.decision_ticks - 2, opponent._plans[self.left_spaceship.index][1])
+        self.context.restart(create_spaceships())
+        opponent.get_inputs(self.context, self.context.left_spaceship)
+        self.assertEqual(opponent.decision_ticks - 1, opponent._plans[self.context.left_spaceship.index][1])
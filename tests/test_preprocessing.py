@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+import pygame
+
+from utils.config import HUD_HEIGHT
+from dqn.preprocessing import FrameStack, ObservationPreprocessor
+
+
+class TestFrameStack(unittest.TestCase):
+    """Tests for the FrameStack ring buffer"""
+
+    def setUp(self) -> None:
+        """Prepares the variables for each test in this class."""
+        self.n_frames = 3
+        self.frame_stack = FrameStack(self.n_frames, (2,), np.uint8)
+
+    def push_frame(self, value: int) -> np.ndarray:
+        """Writes a frame filled with value in the stack and pushes it."""
+        self.frame_stack.next_slot()[:] = value
+        return self.frame_stack.push()
+
+    def test_order(self) -> None:
+        """Tests that the frames are ordered from oldest to newest."""
+        for value in range(1, 6):
+            frames = self.push_frame(value)
+            expected = [max(value - i, 0) for i in reversed(range(self.n_frames))]
+            self.assertEqual(expected, list(frames[:, 0]))
+
+    def test_fill(self) -> None:
+        """Tests that the first frame of an episode replaces the previous ones."""
+        self.push_frame(7)
+        self.frame_stack.next_slot()[:] = 9
+        frames = self.frame_stack.fill()
+        self.assertTrue((frames == 9).all())
+        frames = self.push_frame(4)
+        self.assertEqual([9, 9, 4], list(frames[:, 0]))
+
+
+class TestObservationPreprocessor(unittest.TestCase):
+    """Tests for the ObservationPreprocessor class"""
+
+    def setUp(self) -> None:
+        """Prepares a surface with a white band at the bottom."""
+        self.surface = pygame.Surface((90, 200), depth=32)
+        self.surface.fill((255, 255, 255), pygame.Rect(0, 100, 90, 100))
+
+    def test_shapes(self) -> None:
+        """Tests the observation shape derived from the options."""
+        preprocessor = ObservationPreprocessor(
+            (90, 200), observation_size=(45, 50), grayscale=True, frame_stack=4)
+        self.assertEqual((4, 45, 50, 1), preprocessor.observation_shape)
+        observation = preprocessor.process(self.surface, first=True)
+        self.assertEqual(preprocessor.observation_shape, observation.shape)
+
+    def test_crop_and_grayscale(self) -> None:
+        """Tests the crop of the HP band and the grayscale values."""
+        preprocessor = ObservationPreprocessor(
+            (90, 200), grayscale=True, crop_hud=True, normalize=False)
+        out = np.empty(preprocessor.observation_shape, dtype=np.uint8)
+        preprocessor.process(self.surface, out)
+        self.assertEqual((90, 200 - HUD_HEIGHT, 1), out.shape)
+        self.assertTrue((out[:, :100 - HUD_HEIGHT] == 0).all())
+        self.assertTrue((out[:, 100 - HUD_HEIGHT:] >= 254).all())
+
+    def test_max_pool(self) -> None:
+        """Tests that a held frame is max-pooled with the next processed frame only."""
+        preprocessor = ObservationPreprocessor((90, 200), normalize=False)
+        other_surface = pygame.Surface((90, 200), depth=32)
+        other_surface.fill((255, 0, 0), pygame.Rect(0, 0, 90, 10))
+        preprocessor.hold_frame(other_surface)
+        observation = preprocessor.process(self.surface)
+        self.assertEqual([255, 0, 0], list(observation[0, 0]))
+        self.assertEqual([255, 255, 255], list(observation[0, 150]))
+        observation = preprocessor.process(self.surface)
+        self.assertEqual([0, 0, 0], list(observation[0, 0]))
+
+    def test_mirror(self) -> None:
+        """Tests that the mirrored frames are flipped horizontally."""
+        self.surface.fill((255, 0, 0), pygame.Rect(0, 0, 10, 100))
+        observation = ObservationPreprocessor((90, 200), normalize=False).process(self.surface)
+        mirrored = ObservationPreprocessor((90, 200), normalize=False, mirror=True).process(self.surface)
+        self.assertTrue((mirrored == observation[::-1]).all())
+        self.assertEqual([255, 0, 0], list(mirrored[89, 0]))
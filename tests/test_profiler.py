@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.profiler import FrameProfiler
+
+
+class TestFrameProfiler(unittest.TestCase):
+    """Tests for the FrameProfiler class"""
+
+    def setUp(self) -> None:
+        """Records some frames with two phases in a profiler with a small ring buffer."""
+        self.profiler = FrameProfiler(("first", "second"), capacity=4)
+        for _ in range(10):
+            self.profiler.start_frame()
+            self.profiler.mark(0)
+            sum(range(1000))
+            self.profiler.mark(1)
+            self.profiler.end_frame()
+
+    def test_stats(self) -> None:
+        """Tests the statistics of the phases and of the whole frame."""
+        self.assertEqual(10, self.profiler.n_frames)
+        stats = self.profiler.get_stats()
+        self.assertEqual(["first", "second", "frame"], list(stats))
+        self.assertEqual(["mean_ms", "p50_ms", "p95_ms", "p99_ms"], list(stats["frame"]))
+        self.assertGreater(stats["second"]["mean_ms"], 0.0)
+        self.assertAlmostEqual(stats["first"]["mean_ms"] + stats["second"]["mean_ms"],
+                               stats["frame"]["mean_ms"])
+
+    def test_dump(self) -> None:
+        """Tests the CSV and JSON dumps of the statistics."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "stats.csv")
+            self.profiler.dump(csv_path)
+            with open(csv_path) as csv_file:
+                lines = csv_file.read().splitlines()
+            self.assertEqual("phase,mean_ms,p50_ms,p95_ms,p99_ms", lines[0])
+            self.assertEqual(4, len(lines))
+
+            json_path = os.path.join(temp_dir, "stats.json")
+            self.profiler.dump(json_path)
+            with open(json_path) as json_file:
+                self.assertEqual(10, json.load(json_file)["n_frames"])
@@ -0,0 +1,53 @@
+import os
+import random
+import tempfile
+import unittest
+
+from utils.classes.game_context import GameContext
+from utils.game_utils import create_barrier, create_spaceships, restart_game
+from utils.classes.event_bus import WinEvent
+from utils.recording import InputRecorder, read_recording, verify_recording
+from utils.simulation import SHOOT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN
+from utils.simulation import step
+
+
+class TestRecording(unittest.TestCase):
+    """Tests for the recording and replay of matches"""
+
+    def setUp(self) -> None:
+        """Plays a headless match with random inputs and records it."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "match.rec")
+        context = GameContext(game_window=None,
+                              barrier=create_barrier(),
+                              spaceships=create_spaceships(),
+                              seed=3)
+        context.events.subscribe(WinEvent, lambda event: restart_game(context))
+        recorder = InputRecorder(self.file_path, context.seed)
+        rng = random.Random(0)
+        flags = (SHOOT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN)
+        self.n_ticks = 500
+        for _ in range(self.n_ticks):
+            inputs = (rng.choice(flags) | rng.choice(flags), rng.choice(flags))
+            recorder.record(*inputs)
+            step(context, *inputs)
+        recorder.close(context)
+
+    def tearDown(self) -> None:
+        """Removes the recording file."""
+        self.temp_dir.cleanup()
+
+    def test_read(self) -> None:
+        """Tests the contents read from a recording file."""
+        recording = read_recording(self.file_path)
+        self.assertEqual(3, recording.seed)
+        self.assertEqual((self.n_ticks, 2), recording.inputs.shape)
+
+    def test_verify(self) -> None:
+        """Tests that the replay reaches the recorded state and detects modified logs."""
+        self.assertTrue(verify_recording(self.file_path))
+        with open(self.file_path, "r+b") as recording_file:
+            recording_file.seek(-30, os.SEEK_END)  # An input of the last ticks
+            recording_file.write(bytes([MOVE_UP]))
+        self.assertFalse(verify_recording(self.file_path),
+                         msg="The replay of the modified inputs shouldn't match.")
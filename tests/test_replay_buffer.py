@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pygame
+
+from dqn.preprocessing import ObservationPreprocessor
+from dqn.replay_buffer import FrameReplayBuffer, SumTree
+
+
+class TestSumTree(unittest.TestCase):
+    """Tests for the SumTree class"""
+
+    def test_sample_proportional(self) -> None:
+        """Tests that only the leaves with priority are sampled."""
+        tree = SumTree(10)
+        tree.update(np.array([2, 7]), np.array([1.0, 3.0]))
+        self.assertAlmostEqual(4.0, tree.total)
+        samples = tree.sample(1000, np.random.default_rng(0))
+        self.assertEqual({2, 7}, set(samples.tolist()))
+        self.assertAlmostEqual(0.75, (samples == 7).mean(), delta=0.05)
+
+
+class TestFrameReplayBuffer(unittest.TestCase):
+    """Tests for the FrameReplayBuffer class"""
+
+    def fill(self, buffer: FrameReplayBuffer, n_steps: int, episode_length: int) -> None:
+        """Adds steps whose frames are filled with the step number."""
+        for step in range(n_steps):
+            buffer.add(np.full(buffer.frame_shape, step % 256, dtype=np.uint8),
+                       action=step % 5,
+                       reward=float(step),
+                       terminal=(step + 1) % episode_length == 0)
+
+    def test_stacked_observations(self) -> None:
+        """Tests that the observations are stacked and consistent with the next ones."""
+        buffer = FrameReplayBuffer(50, (2, 2, 1), frame_stack=3, seed=0)
+        self.fill(buffer, 120, episode_length=1000)
+        batch = buffer.sample(64)
+        self.assertEqual((64, 3, 2, 2, 1), batch.observations.shape)
+        last_frames = batch.observations[:, -1, 0, 0, 0].astype(int)
+        # The reward of each step is its number and the frames follow the steps
+        self.assertTrue((last_frames == batch.rewards % 256).all())
+        self.assertTrue((batch.observations[:, 1:] == batch.next_observations[:, :-1]).all())
+        self.assertTrue((batch.observations[:, 0, 0, 0, 0] == last_frames - 2).all())
+
+    def test_episode_start_replicated(self) -> None:
+        """Tests that the frames of the previous episode are replaced by the first one of the episode."""
+        buffer = FrameReplayBuffer(40, (1,), frame_stack=4, seed=0)
+        self.fill(buffer, 30, episode_length=5)
+        batch = buffer.sample(200)
+        episode_start = batch.rewards - batch.rewards % 5
+        expected = np.maximum(batch.rewards[:, None] + np.arange(-3, 1), episode_start[:, None])
+        self.assertTrue((batch.observations[..., 0] == expected).all())
+
+    def test_preprocessor_observations(self) -> None:
+        """Tests that the sampled observations are the ones of the preprocessor when acting."""
+        preprocessor = ObservationPreprocessor((4, 4), grayscale=True, frame_stack=3, normalize=False)
+        buffer = FrameReplayBuffer(30, preprocessor.frame_shape, frame_stack=3, seed=0)
+        surface = pygame.Surface((4, 4), depth=32)
+        observations = []
+        for step in range(20):
+            surface.fill((step * 10,) * 3)
+            observation = preprocessor.process(surface, first=step % 8 == 0).copy()
+            observations.append(observation)
+            buffer.add(observation[-1], action=0, reward=0.0, terminal=step % 8 == 7)
+        indices = np.arange(19)
+        batch = buffer.gather(indices, np.ones(len(indices), dtype=np.float32))
+        np.testing.assert_array_equal(np.stack(observations[:19]), batch.observations)
+
+    def test_prioritized_memmap(self) -> None:
+        """Tests the prioritized sampling with the frames in a memory-mapped file."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mmap_path = os.path.join(tmp_dir, "frames.npy")
+            buffer = FrameReplayBuffer(32, (4,), frame_stack=2, mmap_path=mmap_path,
+                                       prioritized=True, seed=0)
+            self.fill(buffer, 40, episode_length=1000)
+            self.assertIsInstance(buffer.frames, np.memmap)
+            batch = buffer.sample(16)
+            self.assertTrue(buffer.is_valid(batch.indices).all())
+            valid_indices = np.flatnonzero(buffer.is_valid(np.arange(buffer.capacity)))
+            buffer.update_priorities(valid_indices, np.full(len(valid_indices), 1e-3))
+            high_priority = batch.indices[0]
+            buffer.update_priorities(np.array([high_priority]), np.array([100.0]))
+            batch = buffer.sample(16)
+            self.assertGreater((batch.indices == high_priority).mean(), 0.9)
+            del buffer, batch
+
+    def test_overwritten_resampled(self) -> None:
+        """Tests that the transitions overwritten between their sampling and gathering are sampled again."""
+        buffer = FrameReplayBuffer(20, (1,), frame_stack=2, seed=0)
+        self.fill(buffer, 30, episode_length=1000)
+        indices, weights, version = buffer.sample_indices(200)
+        overwritten = (indices - buffer.cursor) % buffer.capacity < 6
+        self.assertTrue(overwritten.any())
+        for step in range(30, 35):
+            buffer.add(np.full(buffer.frame_shape, step), action=step % 5, reward=float(step), terminal=False)
+        batch = buffer.gather(indices, weights, version)
+        self.assertTrue(buffer.is_valid(batch.indices).all())
+        self.assertTrue((batch.observations[:, -1, 0] == batch.rewards).all())
+        self.assertTrue((batch.next_observations[:, -1, 0] == batch.rewards + 1).all())
+        self.assertTrue((batch.actions == batch.rewards % 5).all())
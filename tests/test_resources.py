@@ -0,0 +1,23 @@
+import unittest
+
+from utils.config import HP_FONT
+from utils.resources import LazySound, get_font, set_silent, is_silent
+
+
+class TestResources(unittest.TestCase):
+    """Tests for the lazily created fonts and sounds"""
+
+    def test_font_cache(self) -> None:
+        """Tests that a font is created once and shared."""
+        self.assertIs(get_font(HP_FONT), get_font(HP_FONT))
+
+    def test_silent_sound(self) -> None:
+        """Tests that a sound is not loaded in silent mode."""
+        was_silent = is_silent()
+        set_silent(True)
+        try:
+            sound = LazySound("missing_file.mp3")
+            sound.play()
+            self.assertIsNone(sound._sound)
+        finally:
+            set_silent(was_silent)
@@ -0,0 +1,196 @@
+import unittest
+from unittest import mock
+
+from utils.config import VEL, BULLET_VEL, INIT_HEALTH
+from utils.classes.event_bus import FireEvent, HitEvent, WinEvent
+from utils.classes.game_context import GameContext
+from utils.classes.spaceship import Spaceship
+from utils.game_utils import create_barrier, create_spaceships
+from utils.simulation import NO_INPUT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN, SHOOT, LEFT
+from utils.simulation import STATE_SIZE, SIDE_STATE_SIZE, SHIP_STATE_SIZE
+from utils.simulation import move_spaceship, move_spaceships, fire_bullet, step, encode_state
+
+
+class TestSimulation(unittest.TestCase):
+    """Tests for the display-free simulation core"""
+
+    def setUp(self) -> None:
+        """Prepares a headless game context for each test in this class."""
+        self.left_spaceship = Spaceship(image_file="spaceship_yellow.png",
+                                        side="left",
+                                        init_pos=(100, 200))
+        self.right_spaceship = Spaceship(image_file="spaceship_red.png",
+                                         side="right",
+                                         init_pos=(700, 200))
+        self.context = GameContext(game_window=None,
+                                   barrier=create_barrier(),
+                                   spaceships=(self.left_spaceship, self.right_spaceship))
+
+    def test_headless_context(self) -> None:
+        """Tests that a context without window is headless and has a field size."""
+        self.assertTrue(self.context.is_headless())
+        self.assertGreater(self.context.width, self.context.barrier.x,
+                           msg="The field should be wider than the barrier position.")
+
+    def test_move_spaceship(self) -> None:
+        """Tests the movement of a spaceship and the limit of the barrier."""
+        move_spaceship(self.context, self.left_spaceship, MOVE_RIGHT)
+        self.assertEqual(100 + VEL, self.left_spaceship.body.x,
+                         msg="The spaceship should move to the right.")
+        # Place the spaceship next to the barrier and try to cross it
+        self.left_spaceship.x = self.context.barrier.x - 1 - self.left_spaceship.width
+        x_pos = self.left_spaceship.x
+        move_spaceship(self.context, self.left_spaceship, MOVE_RIGHT)
+        self.assertEqual(x_pos, self.left_spaceship.body.x,
+                         msg="The spaceship shouldn't cross the barrier.")
+        move_spaceship(self.context, self.left_spaceship, MOVE_LEFT)
+        self.assertEqual(x_pos - VEL, self.left_spaceship.body.x,
+                         msg="The spaceship should move to the left.")
+
+    def test_fire_bullet_limit(self) -> None:
+        """Tests that a spaceship can't exceed the limit of active bullets."""
+        while fire_bullet(self.context, self.left_spaceship):
+            pass
+        n_bullets = self.context.bullets.count(LEFT)
+        self.assertFalse(fire_bullet(self.context, self.left_spaceship))
+        self.assertEqual(n_bullets, self.context.bullets.count(LEFT))
+
+    def test_step_hit(self) -> None:
+        """Tests that a bullet hit is applied in the same tick it happens."""
+        step(self.context, SHOOT, NO_INPUT)
+        bullets = self.context.bullets
+        slot = bullets.get_slots(LEFT)[0]
+        damage = int(bullets.damage[slot])
+        # Place the bullet just before the target
+        bullets.x[slot] = self.right_spaceship.body.x - BULLET_VEL // 2 - bullets.width[slot]
+        hits = step(self.context, NO_INPUT, NO_INPUT)
+        self.assertEqual([(self.right_spaceship, damage)], hits)
+        self.assertEqual(INIT_HEALTH - damage, self.right_spaceship.health)
+        self.assertEqual(0, len(bullets),
+                         msg="The bullet should be removed after the hit.")
+
+    def test_step_hit_with_grid(self) -> None:
+        """Tests that the hit checks with the collision grid find the same hits."""
+        with mock.patch("utils.simulation.SPATIAL_HASH_MIN_PAIRS", 0):
+            self.test_step_hit()
+
+    def test_step_events(self) -> None:
+        """Tests that the fire, hit and win events are published in the bus of the context."""
+        events = []
+        for event_type in (FireEvent, HitEvent, WinEvent):
+            self.context.events.subscribe(event_type, events.append)
+        self.right_spaceship.health = 1
+        step(self.context, SHOOT, NO_INPUT)
+        self.assertEqual([FireEvent(shooter=self.left_spaceship)], events)
+        bullets = self.context.bullets
+        bullets.x[bullets.get_slots(LEFT)] = self.right_spaceship.body.x
+        step(self.context, NO_INPUT, NO_INPUT)
+        self.assertEqual([HitEvent(target=self.right_spaceship, damage=1, killed=True),
+                          WinEvent(winner=self.left_spaceship)], events[1:])
+
+    def test_contexts_do_not_share_bullets(self) -> None:
+        """Tests that two contexts have independent lists of bullets."""
+        other_context = GameContext(game_window=None,
+                                    barrier=create_barrier(),
+                                    spaceships=(self.left_spaceship, self.right_spaceship))
+        fire_bullet(self.context, self.left_spaceship)
+        self.assertEqual(0, len(other_context.bullets))
+        other_context.left_spaceship.x = 50
+        self.assertIs(self.context.ships, self.left_spaceship.store,
+                      msg="The spaceships shouldn't be bound to the other context.")
+        self.assertNotEqual(50, self.context.left_spaceship.x)
+
+    def test_encode_state(self) -> None:
+        """Tests the layout of the state vector with a padded bullets table."""
+        fire_bullet(self.context, self.right_spaceship)
+        state = encode_state(self.context)
+        self.assertEqual((STATE_SIZE,), state.shape)
+        self.assertAlmostEqual(100 / self.context.width, state[0], places=6)
+        self.assertAlmostEqual(1.0, state[2], msg="The health should be normalized.")
+        self.assertTrue((state[SHIP_STATE_SIZE:SIDE_STATE_SIZE] == 0).all(),
+                        msg="The left spaceship has no bullets.")
+        right_bullets = state[SIDE_STATE_SIZE + SHIP_STATE_SIZE:].reshape(-1, 4)
+        self.assertEqual([1.0, -1.0], [right_bullets[0, 0], right_bullets[0, 3]])
+        self.assertTrue((right_bullets[1:] == 0).all())
+
+    def test_encode_mirrored_state(self) -> None:
+        """Tests that the mirrored state swaps the sides of the spaceships."""
+        self.right_spaceship.x = self.context.width - 100 - self.right_spaceship.width
+        self.right_spaceship.health = self.left_spaceship.health
+        self.assertTrue((encode_state(self.context, mirror=True) == encode_state(self.context)).all(),
+                        msg="The state of a symmetric game should be the same mirrored.")
+        self.right_spaceship.health -= 1
+        mirrored_state = encode_state(self.context, mirror=True)
+        self.assertAlmostEqual((INIT_HEALTH - 1) / INIT_HEALTH, mirrored_state[2], places=6)
+
+    def test_snapshot_restore(self) -> None:
+        """Tests that a restored game repeats the same ticks with the same inputs."""
+        inputs = [(SHOOT, SHOOT), (NO_INPUT, MOVE_LEFT), (MOVE_RIGHT, SHOOT)] * 40
+        step(self.context, SHOOT, SHOOT)
+        snapshot = self.context.snapshot()
+        self.assertFalse(snapshot.ships.flags.writeable)
+        states = []
+        for _ in range(2):
+            self.context.restore(snapshot)
+            hits = [step(self.context, *tick_inputs) for tick_inputs in inputs]
+            states.append((encode_state(self.context).tolist(), len(sum(hits, [])),
+                           self.context.rng.random()))
+        self.assertEqual(states[0], states[1])
+        self.assertGreater(states[0][1], 0, msg="The ticks should have some hits.")
+
+
+class TestTeamSimulation(unittest.TestCase):
+    """Tests for the games with several spaceships per team"""
+
+    def setUp(self) -> None:
+        """Prepares a headless 2 vs 2 game context for each test in this class."""
+        self.spaceships = create_spaceships(team_size=2)
+        self.context = GameContext(game_window=None,
+                                   barrier=create_barrier(),
+                                   spaceships=self.spaceships)
+        self.wins = []
+        self.context.events.subscribe(WinEvent, self.wins.append)
+
+    def test_team_win(self) -> None:
+        """Tests that a team only wins when all the spaceships of the other team are dead."""
+        left_leader, left_wingman, right_leader, right_wingman = self.spaceships
+        left_leader.health = left_wingman.health = 1
+        for shooter, target in ((right_leader, left_leader), (right_wingman, left_wingman)):
+            inputs = [NO_INPUT] * 4
+            inputs[shooter.index] = SHOOT
+            step(self.context, *inputs)
+            bullets = self.context.bullets
+            bullets.x[bullets.get_slots(shooter.index)] = target.x
+            bullets.y[bullets.get_slots(shooter.index)] = target.y
+            hits = step(self.context, *[NO_INPUT] * 4)
+            self.assertEqual([(target, 1)], hits)
+            self.assertTrue(target.is_dead())
+        self.assertEqual([WinEvent(winner=right_leader)], self.wins,
+                         msg="The right team should win once, after the second kill.")
+
+    def test_no_friendly_fire(self) -> None:
+        """Tests that the bullets go through the spaceships of the same team."""
+        left_leader, left_wingman = self.spaceships[:2]
+        step(self.context, SHOOT, NO_INPUT, NO_INPUT, NO_INPUT)
+        bullets = self.context.bullets
+        bullets.x[bullets.get_slots(left_leader.index)] = left_wingman.x
+        bullets.y[bullets.get_slots(left_leader.index)] = left_wingman.y
+        self.assertEqual([], step(self.context, *[NO_INPUT] * 4))
+        self.assertEqual(INIT_HEALTH, left_wingman.health)
+        self.assertEqual(1, bullets.count(left_leader.index))
+
+    def test_vectorized_movement(self) -> None:
+        """Tests that the vectorized movement system moves the spaceships like the loop."""
+        self.spaceships[1].health = 0
+        self.spaceships[2].x = self.context.barrier.x + self.context.barrier.width + 1
+        inputs = (MOVE_RIGHT | MOVE_DOWN, MOVE_LEFT, MOVE_LEFT | MOVE_UP, MOVE_RIGHT)
+        initial = self.context.ships.components.copy()
+        move_spaceships(self.context, inputs)
+        looped = self.context.ships.position.copy()
+        self.context.ships.components[:] = initial
+        with mock.patch("utils.simulation.VECTORIZED_MOVEMENT_MIN_SHIPS", 0):
+            move_spaceships(self.context, inputs)
+        self.assertEqual(looped.tolist(), self.context.ships.position.tolist())
+        self.assertEqual([VEL, VEL], (looped - initial[0:2])[:, 0].tolist())
+        self.assertEqual([0, 0], (looped - initial[0:2])[0, 1:3].tolist(),
+                         msg="Dead spaceships and the ones next to the barrier shouldn't move.")
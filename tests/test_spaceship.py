@@ -1,6 +1,7 @@
 import unittest
 
 from utils.classes.spaceship import Spaceship
+from utils.classes.spaceship_store import SpaceshipStore
 
 
 class TestSpaceship(unittest.TestCase):
@@ -46,3 +47,35 @@ class TestSpaceship(unittest.TestCase):
         self.spaceship.health = -2
         self.assertTrue(self.spaceship.is_dead(),
                         msg="Spaceship should be dead with negative health.")
+
+    def test_shared_surface(self) -> None:
+        """Tests that the spaceships with the same image and side share the surface."""
+        other_spaceship = Spaceship(image_file="spaceship_red.png",
+                                    side="right",
+                                    init_pos=(0, 0))
+        self.assertIs(self.spaceship.surface, other_spaceship.surface,
+                      msg="The image should be loaded only once.")
+        left_spaceship = Spaceship(image_file="spaceship_red.png",
+                                   side="left",
+                                   init_pos=(0, 0))
+        self.assertIsNot(self.spaceship.surface, left_spaceship.surface,
+                         msg="The images with different rotations should be different.")
+
+    def test_store_view(self) -> None:
+        """Tests that the spaceship reads and writes its components in its store."""
+        store = SpaceshipStore(2)
+        other_spaceship = Spaceship(image_file="spaceship_red.png",
+                                    side="left",
+                                    init_pos=(0, 0),
+                                    store=store)
+        spaceship = Spaceship(image_file="spaceship_red.png",
+                              side="right",
+                              init_pos=self.init_pos,
+                              store=store)
+        self.assertEqual((0, 1, 2), (other_spaceship.index, spaceship.index, len(store)))
+        spaceship.x = 10
+        store.health[1] = 3
+        self.assertEqual([10, self.init_pos[1]], store.position[:, 1].tolist())
+        self.assertEqual((3, 1), (spaceship.health, spaceship.team))
+        self.assertEqual([0, 0], store.position[:, 0].tolist(),
+                         msg="The other spaceship of the store shouldn't change.")
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+import numpy as np
+from pygame import Rect
+
+from utils.classes.spatial_hash import SpatialHash
+
+
+class TestSpatialHash(unittest.TestCase):
+    """Tests for the uniform grid of rectangles"""
+
+    def setUp(self) -> None:
+        """Prepares random rectangles (some of them outside the field) for each test in this class."""
+        rng = random.Random(0)
+        n_rects = 500
+        self.field_size = (300, 200)
+        self.x_pos = np.array([rng.randrange(-50, 350) for _ in range(n_rects)])
+        self.y_pos = np.array([rng.randrange(-50, 250) for _ in range(n_rects)])
+        self.width = np.array([rng.randrange(1, 30) for _ in range(n_rects)])
+        self.height = np.array([rng.randrange(1, 30) for _ in range(n_rects)])
+        self.queries = [Rect(rng.randrange(-80, 350), rng.randrange(-80, 250),
+                             rng.randrange(1, 80), rng.randrange(1, 80)) for _ in range(100)]
+
+    def brute_force_query(self, rect: Rect, mask: np.ndarray) -> list:
+        """Returns the indices of the masked rectangles that collide with a rectangle."""
+        return [idx for idx in np.flatnonzero(mask).tolist()
+                if rect.colliderect(Rect(int(self.x_pos[idx]), int(self.y_pos[idx]),
+                                         int(self.width[idx]), int(self.height[idx])))]
+
+    def test_query_matches_brute_force(self) -> None:
+        """Tests that the queries find the same rectangles as testing all of them."""
+        mask = np.arange(len(self.x_pos)) % 3 != 0
+        # Power of two (shifts) and non power of two (divisions) cells
+        for cell_size in (32, 45):
+            grid = SpatialHash(self.field_size, cell_size)
+            grid.build(self.x_pos, self.y_pos, self.width, self.height, mask)
+            for rect in self.queries:
+                self.assertEqual(self.brute_force_query(rect, mask), sorted(grid.query(rect).tolist()),
+                                 msg=f"Wrong query result with cells of {cell_size} and {rect}.")
+
+    def test_empty_and_rebuild(self) -> None:
+        """Tests the queries of an empty grid and of a grid rebuilt without a mask."""
+        grid = SpatialHash(self.field_size, 32)
+        self.assertEqual(0, len(grid.query(Rect(0, 0, 300, 200))))
+        grid.build(self.x_pos, self.y_pos, self.width, self.height,
+                   np.zeros(len(self.x_pos), dtype=bool))
+        self.assertEqual(0, len(grid.query(Rect(0, 0, 300, 200))))
+        grid.build(self.x_pos, self.y_pos, self.width, self.height)
+        everything = Rect(-100, -100, 500, 400)
+        self.assertEqual(len(self.x_pos), len(grid.query(everything)))
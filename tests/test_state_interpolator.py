@@ -0,0 +1,42 @@
+import unittest
+
+from utils.config import VEL, BULLET_VEL
+from utils.classes.game_context import GameContext
+from utils.classes.state_interpolator import StateInterpolator
+from utils.game_utils import create_barrier, create_spaceships
+from utils.simulation import NO_INPUT, MOVE_RIGHT, SHOOT, LEFT, step
+
+
+class TestStateInterpolator(unittest.TestCase):
+    """Tests for the StateInterpolator class"""
+
+    def setUp(self) -> None:
+        """Prepares a headless game context and an interpolator for each test in this class."""
+        self.context = GameContext(game_window=None,
+                                   barrier=create_barrier(),
+                                   spaceships=create_spaceships())
+        self.interpolator = StateInterpolator()
+
+    def test_ship_positions(self) -> None:
+        """Tests that the spaceships are drawn between the last two ticks."""
+        x_pos, y_pos = self.context.left_spaceship.x, self.context.left_spaceship.y
+        self.interpolator.save(self.context)
+        step(self.context, MOVE_RIGHT, NO_INPUT)
+        self.interpolator.alpha = 0.4
+        self.assertEqual([x_pos + round(0.4 * VEL), y_pos],
+                         self.interpolator.get_ship_positions(self.context)[LEFT])
+        self.interpolator.alpha = 1.0
+        self.assertEqual([x_pos + VEL, y_pos], self.interpolator.get_ship_positions(self.context)[LEFT])
+
+    def test_bullet_x(self) -> None:
+        """Tests that only the bullets of both ticks are interpolated."""
+        step(self.context, SHOOT, NO_INPUT)
+        self.interpolator.save(self.context)
+        step(self.context, SHOOT, NO_INPUT)
+        self.interpolator.alpha = 0.0
+        bullets = self.context.bullets
+        old_slot, new_slot = bullets.get_slots(LEFT).tolist()
+        bullets_x = self.interpolator.get_bullet_x(self.context)
+        self.assertEqual(bullets.x[old_slot] - BULLET_VEL, bullets_x[old_slot])
+        self.assertEqual(bullets.x[new_slot], bullets_x[new_slot],
+                         msg="A bullet fired in the last tick should be at its position.")
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from dqn.training import Collector, create_agent, create_replay_buffers, train
+from dqn.vector_game_env import VectorGameEnv
+
+
+class TestTraining(unittest.TestCase):
+    """Tests for the DQN training loop"""
+
+    def setUp(self) -> None:
+        """Prepares a batched environment of state vectors for each test in this class."""
+        self.env = VectorGameEnv(num_envs=2, seed=0)
+
+    def test_collector(self) -> None:
+        """Tests that the collector stores the steps of each environment in its buffer."""
+        buffers = create_replay_buffers(self.env, capacity=100, seed=0)
+        collector = Collector(self.env, buffers)
+        n_steps = collector.collect(lambda time_step: np.zeros(2, dtype=np.int32), 10)
+        self.assertEqual(20, n_steps)
+        self.assertEqual([10, 10], [len(buffer) for buffer in buffers])
+        batch = buffers[1].sample(4)
+        self.assertTrue((batch.actions == 0).all())
+
+    def test_resume(self) -> None:
+        """Tests that a training resumes from its last checkpoint."""
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            options = dict(checkpoint_dir=checkpoint_dir, initial_collect_steps=10,
+                           batch_size=4, log_interval=100, seed=0)
+            train(self.env, create_agent(self.env), 3, **options)
+            agent = create_agent(self.env)
+            train(self.env, agent, 5, **options)
+            self.assertEqual(5, int(agent.train_step_counter.numpy()))
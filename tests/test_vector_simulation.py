@@ -0,0 +1,79 @@
+import random
+import unittest
+
+import numpy as np
+
+from utils.config import MAX_ACTIVE_BULLETS
+from utils.classes.game_context import GameContext
+from utils.classes.spaceship import Spaceship
+from utils.game_utils import create_barrier
+from utils.simulation import SHOOT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN
+from utils.simulation import step
+from utils.vector_simulation import VectorGame, STATE_SIZE, LEFT, RIGHT
+
+
+class TestVectorGame(unittest.TestCase):
+    """Tests for the vectorized simulation core"""
+
+    def setUp(self) -> None:
+        """Prepares the variables for each test in this class."""
+        self.num_games = 4
+        self.game = VectorGame(self.num_games, seed=0)
+
+    def test_matches_simulation(self) -> None:
+        """Tests that the vectorized games follow the same rules as utils.simulation."""
+        contexts = []
+        for game_idx in range(self.num_games):
+            left_spaceship = Spaceship(image_file="spaceship_yellow.png",
+                                       side="left",
+                                       init_pos=(int(self.game.ship_x[game_idx, LEFT]),
+                                                 int(self.game.ship_y[game_idx, LEFT])))
+            right_spaceship = Spaceship(image_file="spaceship_red.png",
+                                        side="right",
+                                        init_pos=(int(self.game.ship_x[game_idx, RIGHT]),
+                                                  int(self.game.ship_y[game_idx, RIGHT])))
+            contexts.append(GameContext(game_window=None,
+                                        barrier=create_barrier(),
+                                        spaceships=(left_spaceship, right_spaceship)))
+
+        rng = random.Random(0)
+        flags = (SHOOT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN)
+        for _ in range(300):
+            inputs = np.array([[rng.choice(flags) | rng.choice(flags) for _ in range(2)]
+                               for _ in range(self.num_games)], dtype=np.int32)
+            self.game.step(inputs)
+            for game_idx, context in enumerate(contexts):
+                step(context, int(inputs[game_idx, LEFT]), int(inputs[game_idx, RIGHT]))
+
+        for game_idx, context in enumerate(contexts):
+            for side, spaceship in ((LEFT, context.left_spaceship), (RIGHT, context.right_spaceship)):
+                self.assertEqual(spaceship.body.x, self.game.ship_x[game_idx, side])
+                self.assertEqual(spaceship.body.y, self.game.ship_y[game_idx, side])
+                self.assertEqual(spaceship.health, self.game.health[game_idx, side])
+            for side in (LEFT, RIGHT):
+                self.assertEqual(context.bullets.count(side),
+                                 self.game.bullet_active[game_idx, side].sum())
+
+    def test_bullets_limit(self) -> None:
+        """Tests that a spaceship can't exceed the limit of active bullets."""
+        inputs = np.full((self.num_games, 2), SHOOT, dtype=np.int32)
+        for _ in range(MAX_ACTIVE_BULLETS + 2):
+            self.game.step(inputs)
+        self.assertTrue((self.game.bullet_active.sum(axis=-1) == MAX_ACTIVE_BULLETS).all())
+
+    def test_reset_mask(self) -> None:
+        """Tests that only the selected games are restarted."""
+        self.game.health[:] = 0
+        mask = np.array([True, False, True, False])
+        self.game.reset(mask)
+        self.assertFalse(self.game.is_dead()[mask].any())
+        self.assertTrue(self.game.is_dead()[~mask].all())
+
+    def test_state(self) -> None:
+        """Tests the shape and the bullets table of the state vectors."""
+        self.game.step(np.full((self.num_games, 2), SHOOT, dtype=np.int32))
+        state = self.game.get_state()
+        self.assertEqual((self.num_games, STATE_SIZE), state.shape)
+        bullets_active = state.reshape(self.num_games, 2, -1)[:, :, 3::4]
+        self.assertTrue((bullets_active.sum(axis=-1) == 1).all(),
+                        msg="Each spaceship should have one active bullet.")
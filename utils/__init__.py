@@ -1 +1 @@
-__all__ = ["classes", "config", "game_api", "game_utils", "my_events"]
+__all__ = ["assets", "classes", "config", "game_api", "game_utils", "hud", "opponents", "profiler", "recording", "resources", "simulation", "vector_simulation"]
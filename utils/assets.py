@@ -0,0 +1,53 @@
+"""Process-wide cache of the images used by the game."""
+import os
+from typing import Dict, Optional, Tuple
+
+import pygame
+from pygame.surface import Surface
+
+from utils.config import ASSETS_PATH
+
+
+# Cached surfaces by (image_file, size, rotation, converted)
+_IMAGES_CACHE: Dict[Tuple[str, Optional[Tuple[int, int]], int, bool], Surface] = {}
+
+
+def load_image(image_file: str,
+               size: Optional[Tuple[int, int]] = None,
+               rotation: int = 0,
+               alpha: bool = True) -> Surface:
+    """Loads an image from the assets folder, using the cache of the process.
+
+    The image is decoded, scaled and rotated only the first time it is requested.
+    If there is a display, the surface is converted to the display format, which
+    makes blitting it much faster.
+
+    Note: The returned surface is shared, so it must not be modified.
+
+    Args:
+        image_file: str with the name of the image file in the assets folder.
+        size: Optional (width, height) to scale the image to.
+        rotation: Degrees to rotate the image (after scaling).
+        alpha: If True the image keeps its transparency when it is converted.
+
+    Returns:
+        The Surface object with the image.
+    """
+    converted = pygame.display.get_init() and pygame.display.get_surface() is not None
+    key = (image_file, size, rotation, converted)
+    image = _IMAGES_CACHE.get(key)
+    if image is None:
+        image = pygame.image.load(os.path.join(ASSETS_PATH, image_file))
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        if rotation != 0:
+            image = pygame.transform.rotate(image, rotation)
+        if converted:
+            image = image.convert_alpha() if alpha else image.convert()
+        _IMAGES_CACHE[key] = image
+    return image
+
+
+def clear_images_cache() -> None:
+    """Removes all the images from the cache."""
+    _IMAGES_CACHE.clear()
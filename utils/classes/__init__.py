@@ -1 +1 @@
-__all__ = ["bullet", "game_context", "spaceship"]
+__all__ = ["bullet", "bullet_pool", "event_bus", "game_context", "renderer", "spaceship", "spaceship_store", "spatial_hash", "state_interpolator"]
@@ -3,17 +3,41 @@ from typing import Tuple
 import pygame
 
 from utils.classes.spaceship import Spaceship
+from utils.config import BULLET_WIDTH, BULLET_HEIGHT, BULLET_DAMAGE
+
+
+def get_spawn_position(shooter: Spaceship,
+                       bullet_width: float,
+                       bullet_height: float) -> Tuple[int, int]:
+    """Computes the position of a new bullet in front of the shooter.
+
+    Args:
+        shooter: Spaceship object that fires the bullet.
+        bullet_width: float with the width of the bullet projectile.
+        bullet_height: float with the height of the bullet projectile.
+
+    Returns:
+        A tuple (x, y) with the position of the bullet.
+    """
+    x_pos, y_pos = shooter.body.x, shooter.body.y
+    body_width, body_height = shooter.body.width, shooter.body.height
+    bullet_y = int(y_pos + body_height / 2 - bullet_height / 2)
+    if shooter.side == "left":
+        return (x_pos + body_width, bullet_y)
+    return (int(x_pos - bullet_width), bullet_y)
 
 
 class Bullet:
     """Class that implements the bullets fired by the spaceships."""
 
+    __slots__ = ("color", "damage", "body")
+
     def __init__(self,
                  shooter: Spaceship,
                  color: Tuple[int, int, int],
-                 bullet_width: float = 10.0,
-                 bullet_height: float = 5.0,
-                 bullet_damage: int = 1):
+                 bullet_width: float = BULLET_WIDTH,
+                 bullet_height: float = BULLET_HEIGHT,
+                 bullet_damage: int = BULLET_DAMAGE):
         """Bullet constructor.
 
         Args:
@@ -25,20 +49,10 @@ class Bullet:
         """
         self.color = color
         self.damage = bullet_damage
-        x_pos, y_pos = shooter.body.x, shooter.body.y
-        body_width, body_height = shooter.body.width, shooter.body.height
-        if shooter.side == "left":
-            self.body = pygame.Rect(
-                x_pos + body_width,
-                int(y_pos + body_height / 2 - bullet_height / 2),
-                bullet_width,
-                bullet_height)
-        elif shooter.side == "right":
+        if shooter.side in ("left", "right"):
             self.body = pygame.Rect(
-                x_pos - bullet_width,
-                int(y_pos + body_height / 2 - bullet_height / 2),
-                bullet_width,
-                bullet_height)
+                get_spawn_position(shooter, bullet_width, bullet_height),
+                (bullet_width, bullet_height))
         else:
             print(
                 f"Error! The side name \"{shooter.side}\" of the shooter \"{shooter.name}\""
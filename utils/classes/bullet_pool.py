@@ -0,0 +1,192 @@
+"""Fixed-capacity pool with the bullets of a game."""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from pygame import Rect
+
+
+class BulletPoolSnapshot(NamedTuple):
+    """Immutable copy of the state of a BulletPool, see BulletPool.snapshot()."""
+    components: np.ndarray  # Read-only copy of the int arrays of the pool
+    active: np.ndarray  # Read-only copy of the active flags
+    free_slots: Tuple[int, ...]
+    owner_counts: Tuple[int, ...]
+
+
+class BulletPool:
+    """Class that stores the active bullets of a game in preallocated arrays.
+
+    Each bullet is a slot of the arrays (x, y, width, height, velocity, damage
+    and owner). The free slots are reused through a free list, so firing and
+    removing bullets never allocates, and the movement, the culling and the
+    hit checks of all the bullets are single array operations.
+    """
+
+    def __init__(self, capacity: int, n_owners: int = 2):
+        """BulletPool constructor.
+
+        Args:
+            capacity: The maximum number of bullets that can be active at once.
+            n_owners: The number of different owners (spaceships) of the bullets.
+        """
+        self.capacity = capacity
+        self.n_owners = n_owners
+        # The int arrays are the rows of a single block, so the whole pool is
+        # copied at once (see snapshot())
+        self._components = np.zeros((7, capacity), dtype=np.int32)
+        self.x = self._components[0]
+        self.y = self._components[1]
+        self.width = self._components[2]
+        self.height = self._components[3]
+        self.velocity = self._components[4]  # Zero in the free slots
+        self.damage = self._components[5]
+        self.owner = self._components[6]
+        self.active = np.zeros(capacity, dtype=bool)
+        self._owner_counts = [0] * n_owners
+        # Stack of free slots, the lowest slot is used first
+        self._free_slots = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return self.capacity - len(self._free_slots)
+
+    def count(self, owner: int) -> int:
+        """Returns the number of active bullets of an owner."""
+        return self._owner_counts[owner]
+
+    def spawn(self,
+              x_pos: int,
+              y_pos: int,
+              width: int,
+              height: int,
+              velocity: int,
+              damage: int,
+              owner: int) -> int:
+        """Activates a new bullet in a free slot.
+
+        Args:
+            x_pos: The horizontal position of the bullet.
+            y_pos: The vertical position of the bullet.
+            width: The width of the bullet.
+            height: The height of the bullet.
+            velocity: The horizontal displacement of the bullet in each tick.
+            damage: The damage that the bullet does when hitting a spaceship.
+            owner: The index of the owner of the bullet.
+
+        Returns:
+            The slot of the new bullet, or -1 if the pool is full.
+        """
+        if not self._free_slots:
+            return -1
+        slot = self._free_slots.pop()
+        self.x[slot] = x_pos
+        self.y[slot] = y_pos
+        self.width[slot] = width
+        self.height[slot] = height
+        self.velocity[slot] = velocity
+        self.damage[slot] = damage
+        self.owner[slot] = owner
+        self.active[slot] = True
+        self._owner_counts[owner] += 1
+        return slot
+
+    def release(self, slots: np.ndarray) -> None:
+        """Deactivates bullets and returns their slots to the free list.
+
+        Args:
+            slots: int array with the slots of active bullets.
+        """
+        for slot in slots.tolist():
+            self._owner_counts[self.owner[slot]] -= 1
+            self._free_slots.append(slot)
+        self.active[slots] = False
+        self.velocity[slots] = 0
+
+    def clear(self) -> None:
+        """Removes all the bullets."""
+        self.active[:] = False
+        self.velocity[:] = 0
+        self._owner_counts = [0] * len(self._owner_counts)
+        self._free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def snapshot(self) -> BulletPoolSnapshot:
+        """Copies the state of the pool.
+
+        Returns:
+            A BulletPoolSnapshot with the bullets and the order of the free slots.
+        """
+        components, active = self._components.copy(), self.active.copy()
+        components.setflags(write=False)
+        active.setflags(write=False)
+        return BulletPoolSnapshot(components, active, tuple(self._free_slots), tuple(self._owner_counts))
+
+    def restore(self, snapshot: BulletPoolSnapshot) -> None:
+        """Sets the state of the pool to a snapshot of a pool with the same capacity.
+
+        Args:
+            snapshot: The BulletPoolSnapshot to restore.
+        """
+        if snapshot.active.shape != self.active.shape or len(snapshot.owner_counts) != self.n_owners:
+            raise ValueError("The snapshot is from a bullet pool with another capacity or owners.")
+        np.copyto(self._components, snapshot.components)
+        np.copyto(self.active, snapshot.active)
+        self._free_slots = list(snapshot.free_slots)
+        self._owner_counts = list(snapshot.owner_counts)
+
+    def get_slots(self, owner: Optional[int] = None) -> np.ndarray:
+        """Returns the slots of the active bullets.
+
+        Args:
+            owner: Optional index of the owner to get only its bullets.
+
+        Returns:
+            An int array with the slots in increasing order.
+        """
+        if owner is None:
+            return np.flatnonzero(self.active)
+        return np.flatnonzero(self.active & (self.owner == owner))
+
+    def get_rect(self, slot: int) -> Rect:
+        """Returns a Rect with the body of the bullet in a slot."""
+        return Rect(int(self.x[slot]), int(self.y[slot]),
+                    int(self.width[slot]), int(self.height[slot]))
+
+    def move(self) -> None:
+        """Moves all the bullets one tick."""
+        self.x += self.velocity
+
+    def find_hits(self, target: Rect, owner: int) -> np.ndarray:
+        """Checks which bullets of an owner overlap a target body.
+
+        Args:
+            target: The Rect of the target.
+            owner: The index of the owner of the bullets to check.
+
+        Returns:
+            A bool array with shape (capacity,) with the bullets that hit the target.
+        """
+        return self.find_overlaps(target) & (self.owner == owner)
+
+    def find_overlaps(self, target: Rect) -> np.ndarray:
+        """Checks which bullets overlap a target body, whatever their owner.
+
+        Args:
+            target: The Rect of the target.
+
+        Returns:
+            A bool array with shape (capacity,) with the bullets that overlap the target.
+        """
+        return self.active \
+            & (self.x < target.right) & (self.x + self.width > target.x) \
+            & (self.y < target.bottom) & (self.y + self.height > target.y)
+
+    def find_out_of_field(self, field_width: int) -> np.ndarray:
+        """Checks which bullets crossed the border of the field they move towards.
+
+        Args:
+            field_width: The width of the field.
+
+        Returns:
+            A bool array with shape (capacity,) with the bullets out of the field.
+        """
+        return self.active & (((self.velocity > 0) & (self.x > field_width))
+                              | ((self.velocity < 0) & (self.x < 0)))
@@ -0,0 +1,65 @@
+"""In-process bus for the events of a game."""
+from typing import Any, Callable, Dict, List, NamedTuple, Type
+
+from utils.classes.spaceship import Spaceship
+
+
+class FireEvent(NamedTuple):
+    """A spaceship fired a bullet."""
+    shooter: Spaceship
+
+
+class HitEvent(NamedTuple):
+    """A bullet hit a spaceship. The damage is already applied."""
+    target: Spaceship
+    damage: int
+    killed: bool  # True if the hit killed the target
+
+
+class WinEvent(NamedTuple):
+    """A spaceship won the game."""
+    winner: Spaceship
+
+
+class EventBus:
+    """Class that dispatches the events of a game to the subscribed handlers.
+
+    The handlers of an event are called synchronously when the event is
+    published, in the order they subscribed. Each GameContext owns its bus, so
+    several games can run in the same process without sharing any state.
+    """
+
+    def __init__(self):
+        """EventBus constructor."""
+        self._handlers: Dict[Type, List[Callable[[Any], None]]] = {}
+
+    def subscribe(self, event_type: Type, handler: Callable[[Any], None]) -> None:
+        """Registers a handler for a type of event.
+
+        Args:
+            event_type: The class of the events to handle (e.g. HitEvent).
+            handler: Function that receives the published event.
+        """
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type: Type, handler: Callable[[Any], None]) -> None:
+        """Removes a handler of a type of event.
+
+        Args:
+            event_type: The class of the handled events.
+            handler: The handler to remove.
+        """
+        self._handlers[event_type].remove(handler)
+
+    def publish(self, event: Any) -> None:
+        """Calls the handlers subscribed to the type of the event.
+
+        Args:
+            event: The event to dispatch.
+        """
+        for handler in self._handlers.get(type(event), ()):
+            handler(event)
+
+    def clear(self) -> None:
+        """Removes all the handlers."""
+        self._handlers.clear()
@@ -1,56 +1,186 @@
-import os
-from typing import List
+import random
+from typing import NamedTuple, Optional, Sequence, Tuple
 
+import numpy as np
 import pygame
 from pygame.surface import Surface
 from pygame import Rect
 
-from utils.classes.bullet import Bullet
+from utils.classes.bullet_pool import BulletPool, BulletPoolSnapshot
+from utils.classes.event_bus import EventBus
+from utils.classes.renderer import DirtyRectRenderer
 from utils.classes.spaceship import Spaceship
-from utils.config import ASSETS_PATH, BACKGROUND_IMAGE_FILE
-from utils.config import WINDOW_WIDTH, WINDOW_HEIGHT
+from utils.classes.spaceship_store import SpaceshipStore
+from utils.classes.spatial_hash import SpatialHash
+from utils.assets import load_image
+from utils.config import BACKGROUND_IMAGE_FILE, MAX_ACTIVE_BULLETS, SPATIAL_HASH_CELL_SIZE, VEL
+from utils.config import WINDOW_WIDTH, WINDOW_HEIGHT, SIDES
+
+
+class GameSnapshot(NamedTuple):
+    """Immutable copy of the state of a game, see GameContext.snapshot()."""
+    ships: np.ndarray  # Read-only copy of the components of the spaceship store
+    bullets: BulletPoolSnapshot
+    rng_state: tuple
 
 
 class GameContext:
     """Class to handle the global variables of the game."""
 
     def __init__(self,
-                 game_window: Surface,
+                 game_window: Optional[Surface],
                  barrier: Rect,
-                 left_spaceship: Spaceship,
-                 right_spaceship: Spaceship,
-                 left_bullets: List[Bullet] = [],
-                 right_bullets: List[Bullet] = []):
+                 spaceships: Sequence[Spaceship],
+                 bullets: Optional[BulletPool] = None,
+                 field_size: Tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT),
+                 seed: Optional[int] = None):
         """Context constructor.
 
         Args:
-            game_window: Surface object of the game window.
+            game_window: Surface object where the game is drawn. None to run the
+                game without rendering (headless).
             barrier: A Rect object that represents the middle barrier of the field.
-            left_spaceship: Spaceship object from left side.
-            right_spaceship: Spaceship object from right side.
-            left_bullets: list with the current active bullets from left spaceship.
-            right_bullets: list with the current active bullets from right spaceship.
+            spaceships: The Spaceship objects of both teams (e.g. the pair
+                (left_spaceship, right_spaceship) of the two player game). Their
+                components are copied to the store of the context (context.ships)
+                and the objects are bound to it, unless they are bound to the
+                store of another context: then the context uses new views of
+                them (see Spaceship.view()) and the objects are left alone.
+            bullets: BulletPool with the active bullets of the spaceships, owned
+                by the index of the spaceship. By default an empty pool with room
+                for the bullets of all the spaceships.
+            field_size: The dimensions of the field. Only used if there is no
+                game_window, otherwise the size of the window is used.
+            seed: Seed for the random generator of the game (context.rng). If
+                None, it is drawn from the global random module.
         """
         self.game_window = game_window
         self.barrier = barrier
-        self.left_spaceship = left_spaceship
-        self.right_spaceship = right_spaceship
-        self.left_bullets = left_bullets
-        self.right_bullets = right_bullets
-        # Store default background
-        self.background_surface = pygame.transform.scale(
-            pygame.image.load(os.path.join(
-                ASSETS_PATH, BACKGROUND_IMAGE_FILE)),
-            (WINDOW_WIDTH, WINDOW_HEIGHT))
-
-    def restart(self, left_spaceship: Spaceship, right_spaceship: Spaceship) -> None:
-        """Restarts the game context and sets the new pair of spaceships.
+        if game_window is not None:
+            field_size = (game_window.get_width(), game_window.get_height())
+        self.width, self.height = field_size
+        self.bullets = bullets if bullets is not None \
+            else BulletPool(len(spaceships) * MAX_ACTIVE_BULLETS, n_owners=len(spaceships))
+        if self.bullets.n_owners < len(spaceships):
+            raise ValueError(f"The bullet pool has {self.bullets.n_owners} owners and "
+                             f"the game has {len(spaceships)} spaceships.")
+        # Limits of the (x, y) positions from where the spaceships of each team
+        # can move a VEL step towards the lower or the higher coordinates, the
+        # size of the body must be subtracted from the higher ones. Each team
+        # moves in its half of the field.
+        self._team_move_limits = np.array(
+            [[0 + VEL, barrier.x + barrier.width + VEL],  # x min
+             [0 + VEL, 0 + VEL],  # y min
+             [barrier.x - VEL, self.width - VEL],  # x max
+             [self.height - VEL, self.height - VEL]],  # y max
+            dtype=np.int32)
+        self._set_spaceships(spaceships)
+        # Random generator of the game, every random decision must use it
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        # Bus with the fire, hit and win events of the game
+        self.events = EventBus()
+        # Collision grid of the bullets, only used with many spaceships and bullets
+        self.spatial_hash = SpatialHash(field_size, SPATIAL_HASH_CELL_SIZE)
+        # Store default background and the renderer (only needed to draw the game)
+        self.renderer = DirtyRectRenderer()
+        self.background_surface = None
+        if game_window is not None:
+            self.background_surface = load_image(
+                BACKGROUND_IMAGE_FILE, (self.width, self.height), alpha=False)
+
+    def is_headless(self) -> bool:
+        """Checks if the game runs without rendering.
+
+        Returns:
+            A bool that says if the context has no surface to draw the game.
+        """
+        return self.game_window is None
+
+    def _set_spaceships(self, spaceships: Sequence[Spaceship]) -> None:
+        """Copies the components of the spaceships to a new store of the context.
+
+        The spaceships are bound to the new store, except the ones bound to the
+        store of another context, which are replaced by new views.
+
+        Args:
+            spaceships: The Spaceship objects of both teams.
+        """
+        previous_store = getattr(self, "ships", None)
+        # A new store every time, so the previous spaceships keep their last state
+        source = spaceships[0].store if spaceships else None
+        if all(spaceship.store is source and spaceship.index == index
+               for index, spaceship in enumerate(spaceships)):
+            # Spaceships created together in the same store (the usual case)
+            components = source.components[:, :len(spaceships)]
+        else:
+            components = np.stack([spaceship.store.components[:, spaceship.index]
+                                   for spaceship in spaceships], axis=1)
+        self.ships = SpaceshipStore.from_components(components)
+        self.ships.context_owned = True
+        views = []
+        for index, spaceship in enumerate(spaceships):
+            if spaceship.store.context_owned and spaceship.store is not previous_store:
+                views.append(spaceship.view(self.ships, index))
+            else:
+                spaceship.bind(self.ships, index)
+                views.append(spaceship)
+        self.spaceships = tuple(views)
+        n_ships = len(spaceships)
+        teams = self.ships.team[:n_ships]
+        self.ships.components[6:10, :n_ships] = self._team_move_limits[:, teams]
+        self.ships.move_max[:, :n_ships] -= self.ships.size[:, :n_ships]
+
+        # The first spaceship of each team leads it (e.g. it is the winner of
+        # the team and the one in the state of the two player game)
+        leaders = {}
+        for spaceship, team in zip(self.spaceships, teams.tolist()):
+            leaders.setdefault(team, spaceship)
+        if any(team not in leaders for team in range(len(SIDES))):
+            raise ValueError("The game needs at least one spaceship of each team.")
+        self.left_spaceship, self.right_spaceship = (leaders[team] for team in range(len(SIDES)))
+
+    def restart(self, spaceships: Sequence[Spaceship]) -> None:
+        """Restarts the game context and sets the new spaceships.
+
+        Args:
+            spaceships: The Spaceship objects of both teams.
+        """
+        self._set_spaceships(spaceships)
+        if len(spaceships) > self.bullets.n_owners:
+            self.bullets = BulletPool(len(spaceships) * MAX_ACTIVE_BULLETS,
+                                      n_owners=len(spaceships))
+        self.bullets.clear()
+        self.renderer.invalidate()
+
+    def snapshot(self) -> GameSnapshot:
+        """Copies the state of the game: the spaceships, the bullets and the random generator.
+
+        The snapshot only has arrays and tuples (no surfaces), so it is cheap to
+        take and to restore many times, e.g. to simulate several rollouts from
+        the same state.
+
+        Returns:
+            The GameSnapshot, to restore with restore().
+        """
+        ships = self.ships.components[:, :len(self.ships)].copy()
+        ships.setflags(write=False)
+        return GameSnapshot(ships, self.bullets.snapshot(), self.rng.getstate())
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """Sets the state of the game to a snapshot.
+
+        The spaceship objects keep their surfaces and names, only their
+        components change.
 
         Args:
-            left_spaceship: Spaceship object from left side.
-            right_spaceship: Spaceship object from right side.
+            snapshot: A GameSnapshot of this game, or of a game with the same
+                number of spaceships and bullet pool capacity.
         """
-        self.left_spaceship = left_spaceship
-        self.right_spaceship = right_spaceship
-        self.left_bullets = []
-        self.right_bullets = []
+        if snapshot.ships.shape[1] != len(self.ships):
+            raise ValueError(f"The snapshot has {snapshot.ships.shape[1]} spaceships and "
+                             f"the game has {len(self.ships)}.")
+        self.bullets.restore(snapshot.bullets)
+        np.copyto(self.ships.components[:, :len(self.ships)], snapshot.ships)
+        self.rng.setstate(snapshot.rng_state)
+        self.renderer.invalidate()
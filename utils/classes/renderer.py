@@ -0,0 +1,53 @@
+from typing import List, Optional
+
+from pygame import Rect
+from pygame.surface import Surface
+
+
+class DirtyRectRenderer:
+    """Class that tracks the areas of the game window that change between frames.
+
+    Instead of redrawing the whole background every frame, only the areas where
+    the sprites were drawn in the previous frame are restored, and only those
+    areas and the ones of the new sprites are pushed to the display.
+    """
+
+    def __init__(self):
+        """Renderer constructor."""
+        self._previous_rects: List[Rect] = []
+        self._full_redraw = True
+
+    def invalidate(self) -> None:
+        """Forces a redraw of the whole window in the next frame."""
+        self._full_redraw = True
+
+    def begin_frame(self, surface: Surface, background: Optional[Surface]) -> None:
+        """Erases the sprites of the previous frame by restoring the background.
+
+        Args:
+            surface: The Surface where the game is drawn.
+            background: The Surface with the background of the game.
+        """
+        if self._full_redraw:
+            surface.blit(background, (0, 0))
+        else:
+            for rect in self._previous_rects:
+                surface.blit(background, rect, rect)
+
+    def end_frame(self, surface: Surface, drawn_rects: List[Rect]) -> List[Rect]:
+        """Computes the areas of the window that changed in the frame.
+
+        Args:
+            surface: The Surface where the game is drawn.
+            drawn_rects: The list with the areas of the sprites drawn in the frame.
+
+        Returns:
+            The list of Rect objects that have to be updated in the display.
+        """
+        if self._full_redraw:
+            dirty_rects = [surface.get_rect()]
+            self._full_redraw = False
+        else:
+            dirty_rects = self._previous_rects + drawn_rects
+        self._previous_rects = drawn_rects
+        return dirty_rects
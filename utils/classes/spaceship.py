@@ -1,20 +1,29 @@
-import os
-from typing import Tuple
+import copy
+from typing import Optional, Tuple
 
 import pygame
 
-from ..config import ASSETS_PATH, SPACESHIP_WIDTH, SPACESHIP_HEIGHT, INIT_HEALTH
+from ..assets import load_image
+from ..config import SPACESHIP_WIDTH, SPACESHIP_HEIGHT, INIT_HEALTH, SIDES
+from .spaceship_store import SpaceshipStore
 
 
 class Spaceship:
-    """Class that models the spaceships objects."""
+    """Class that models the spaceships objects.
+
+    The components of the spaceship (position, size, health, team...) live in
+    the arrays of a SpaceshipStore, the object is only a view over its index.
+    A GameContext copies the components of its spaceships to the store of the
+    game and binds the objects to it (see bind()).
+    """
 
     def __init__(self,
                  image_file: str,
                  side: str,
                  init_pos: Tuple[int, int],
                  name: str = "",
-                 health: int = INIT_HEALTH):
+                 health: int = INIT_HEALTH,
+                 store: Optional[SpaceshipStore] = None):
         """Spaceship constructor.
 
         Args:
@@ -23,26 +32,21 @@ class Spaceship:
             init_pos: A tuple with the initial postition of the spaceship.
             name: The name of the spaceship.
             health: int value with the initial health of the spaceship.
+            store: Optional SpaceshipStore to add the spaceship to (e.g. shared
+                by the spaceships created together). By default the spaceship
+                has a store of its own.
         """
-        # Prepare the image for the spaceship
-        spaceship_surface = pygame.image.load(
-            os.path.join(ASSETS_PATH, image_file))
-        spaceship_surface = pygame.transform.scale(
-            spaceship_surface, (SPACESHIP_WIDTH, SPACESHIP_HEIGHT))
+        # Prepare the image for the spaceship (shared by all the spaceships of the process)
         if side == "left":
-            spaceship_surface = pygame.transform.rotate(
-                spaceship_surface, 90)  # Look to the right
+            rotation = 90  # Look to the right
         elif side == "right":
-            spaceship_surface = pygame.transform.rotate(
-                spaceship_surface, -90)  # Look to the left
+            rotation = -90  # Look to the left
         else:
+            rotation = 0
             print(
                 f"Error! The side name \"{side}\" is not valid to create a Spaceship.")
-        self.surface = spaceship_surface
-
-        # Rectangle body of the spaceship
-        self.body = pygame.Rect(
-            init_pos[0], init_pos[1], SPACESHIP_HEIGHT, SPACESHIP_WIDTH)  # Invert width and height because the surface is rotated
+        self.surface = load_image(
+            image_file, (SPACESHIP_WIDTH, SPACESHIP_HEIGHT), rotation)
 
         self.side = side
 
@@ -51,7 +55,91 @@ class Spaceship:
         else:
             self.name = name
 
-        self.health = health
+        # Components of the spaceship, with the body width and height inverted
+        # because the surface is rotated
+        self.store = store if store is not None else SpaceshipStore(1)
+        self.index = self.store.add(init_pos[0], init_pos[1], SPACESHIP_HEIGHT, SPACESHIP_WIDTH,
+                                    health, SIDES.index(side) if side in SIDES else -1)
+
+    def bind(self, store: SpaceshipStore, index: int) -> None:
+        """Makes the spaceship a view over an index of a store.
+
+        Note: The components are not copied, the index of the store must
+        already have them.
+
+        Args:
+            store: The SpaceshipStore with the components of the spaceship.
+            index: The index of the spaceship in the store.
+        """
+        self.store = store
+        self.index = index
+
+    def view(self, store: SpaceshipStore, index: int) -> "Spaceship":
+        """Creates another view of the spaceship over an index of a store.
+
+        The new object shares the surface and the name of the spaceship, and
+        this spaceship stays bound to its store.
+
+        Args:
+            store: The SpaceshipStore with the components of the new view.
+            index: The index of the spaceship in the store.
+
+        Returns:
+            The new Spaceship object.
+        """
+        spaceship = copy.copy(self)
+        spaceship.bind(store, index)
+        return spaceship
+
+    @property
+    def x(self) -> int:
+        """The horizontal position of the spaceship body."""
+        return int(self.store.position[0, self.index])
+
+    @x.setter
+    def x(self, value: int) -> None:
+        self.store.position[0, self.index] = value
+
+    @property
+    def y(self) -> int:
+        """The vertical position of the spaceship body."""
+        return int(self.store.position[1, self.index])
+
+    @y.setter
+    def y(self, value: int) -> None:
+        self.store.position[1, self.index] = value
+
+    @property
+    def width(self) -> int:
+        """The width of the spaceship body."""
+        return int(self.store.size[0, self.index])
+
+    @property
+    def height(self) -> int:
+        """The height of the spaceship body."""
+        return int(self.store.size[1, self.index])
+
+    @property
+    def health(self) -> int:
+        """The health of the spaceship."""
+        return int(self.store.health[self.index])
+
+    @health.setter
+    def health(self, value: int) -> None:
+        self.store.health[self.index] = value
+
+    @property
+    def team(self) -> int:
+        """The index of the team (side) of the spaceship."""
+        return int(self.store.team[self.index])
+
+    @property
+    def body(self) -> pygame.Rect:
+        """A Rect with the body of the spaceship.
+
+        Note: The Rect is a copy, use the x and y properties to move the spaceship.
+        """
+        return pygame.Rect(self.store.components[:4, self.index].tolist())
 
     def is_dead(self) -> bool:
         """Checks if the spaceship is dead.
@@ -59,4 +147,4 @@ class Spaceship:
         Returns:
             A bool saying if the spaceship is dead.
         """
-        return self.health <= 0
+        return bool(self.store.health[self.index] <= 0)
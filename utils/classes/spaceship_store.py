@@ -0,0 +1,97 @@
+"""Component arrays of the spaceships of a game."""
+import numpy as np
+
+
+N_COMPONENTS = 10  # Rows of the block of components
+
+
+class SpaceshipStore:
+    """Class that stores the components of a set of spaceships in contiguous arrays.
+
+    Each spaceship is an index in the arrays of components (position, size,
+    health, team and movement limits), and the movement, firing and damage
+    systems of utils.simulation iterate over these arrays, whatever the number
+    of spaceships of each team. The Spaceship objects are views over one index
+    of a store.
+
+    All the components live in a single (component, spaceship) int32 block, so
+    each component is a contiguous row and the 2D components (e.g. the position
+    rows x and y) are contiguous (2, capacity) blocks. Only the first
+    len(store) spaceships are used.
+    """
+
+    def __init__(self, capacity: int):
+        """SpaceshipStore constructor.
+
+        Args:
+            capacity: The maximum number of spaceships.
+        """
+        self._set_components(np.zeros((N_COMPONENTS, capacity), dtype=np.int32))
+        self._size = 0
+        self.context_owned = False  # True for the store of a GameContext (see GameContext.ships)
+
+    def _set_components(self, components: np.ndarray) -> None:
+        """Sets the block of components and its views."""
+        self.capacity = components.shape[1]
+        self.components = components
+        self.position = self.components[0:2]  # (x, y) of the body
+        self.size = self.components[2:4]  # (width, height) of the body
+        self.health = self.components[4]
+        self.team = self.components[5]
+        # Lowest and highest (x, y) positions from where the body can move one
+        # step towards the lower or higher coordinates (set by the GameContext)
+        self.move_min = self.components[6:8]
+        self.move_max = self.components[8:10]
+
+    def __len__(self) -> int:
+        """Returns the number of spaceships in the store."""
+        return self._size
+
+    def add(self, x_pos: int, y_pos: int, width: int, height: int, health: int, team: int) -> int:
+        """Adds a spaceship to the store.
+
+        Args:
+            x_pos: The horizontal position of the spaceship body.
+            y_pos: The vertical position of the spaceship body.
+            width: The width of the spaceship body.
+            height: The height of the spaceship body.
+            health: The health of the spaceship.
+            team: The index of the team of the spaceship (see utils.config.SIDES).
+
+        Returns:
+            The index of the spaceship in the arrays.
+        """
+        if self._size >= self.capacity:
+            raise ValueError(f"The store is full, it has room for {self.capacity} spaceships.")
+        self.components[:6, self._size] = (x_pos, y_pos, width, height, health, team)
+        self._size += 1
+        return self._size - 1
+
+    @classmethod
+    def from_components(cls, components: np.ndarray) -> "SpaceshipStore":
+        """Creates a full store with a copy of the components of some spaceships.
+
+        Args:
+            components: int array with shape (N_COMPONENTS, n_spaceships) with the
+                components of the spaceships (e.g. gathered from other stores).
+
+        Returns:
+            The new SpaceshipStore with the n_spaceships spaceships.
+        """
+        store = cls.__new__(cls)
+        store._set_components(components.astype(np.int32))  # (always a copy)
+        store._size = store.capacity
+        store.context_owned = False
+        return store
+
+    def get_alive(self) -> np.ndarray:
+        """Returns a bool array that says which spaceships of the store are alive."""
+        return self.health[:self._size] > 0
+
+    def count(self, team: int) -> int:
+        """Returns the number of spaceships of a team."""
+        return int(np.count_nonzero(self.team[:self._size] == team))
+
+    def count_alive(self, team: int) -> int:
+        """Returns the number of spaceships of a team that are alive."""
+        return int(np.count_nonzero(self.get_alive() & (self.team[:self._size] == team)))
@@ -0,0 +1,130 @@
+"""Uniform grid to find the rectangles of a set that overlap a query rectangle."""
+from typing import Optional, Tuple
+
+import numpy as np
+from pygame import Rect
+
+
+class SpatialHash:
+    """Class that indexes a set of rectangles in a uniform grid of cells.
+
+    Each rectangle is stored in the cell of its top-left corner, with the
+    rectangles sorted by cell in a flat array, so the rectangles
+    of a run of consecutive cells of a row are a contiguous slice. A query only
+    tests the rectangles of the cells around the query rectangle, so its cost
+    depends on the number of nearby rectangles instead of the size of the set.
+
+    The grid is rebuilt from the arrays of the set (e.g. the BulletPool) every
+    time they change. The build sorts the indexed rectangles by cell, which is
+    most of its cost: the cell and the index of each rectangle are packed in a
+    single integer key, so a plain (unstable) sort of the keys replaces a
+    stable argsort, and the bounds of the cells are searched in the sorted keys.
+    """
+
+    def __init__(self, field_size: Tuple[int, int], cell_size: int):
+        """SpatialHash constructor.
+
+        Args:
+            field_size: The (width, height) of the field. The rectangles outside
+                the field are stored in the cells of the border.
+            cell_size: The side of the (square) cells.
+        """
+        self.cell_size = cell_size
+        self.n_cols = max(-(-field_size[0] // cell_size), 1)
+        self.n_rows = max(-(-field_size[1] // cell_size), 1)
+        self.n_cells = self.n_cols * self.n_rows
+        # Power of two cells use a shift instead of a division
+        self._shift = cell_size.bit_length() - 1 if cell_size & (cell_size - 1) == 0 else None
+        self._cell_ids = np.arange(self.n_cells + 1, dtype=np.uint64)
+        # Start of each cell in _order (the cell c ends at the start of c + 1)
+        self._bounds = np.zeros(self.n_cells + 1, dtype=np.int64)
+        self._order = np.zeros(0, dtype=np.intp)  # Indices of the rectangles sorted by cell
+        self._size = 0
+        self._max_width = 0
+        self._max_height = 0
+        self._x = self._y = self._width = self._height = None
+
+    def build(self,
+              x_pos: np.ndarray,
+              y_pos: np.ndarray,
+              width: np.ndarray,
+              height: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> None:
+        """Indexes a set of rectangles given as arrays.
+
+        Note: The arrays are referenced (not copied) and used by the queries, so
+        the grid must be rebuilt after modifying them.
+
+        Args:
+            x_pos: int array with the horizontal positions of the rectangles.
+            y_pos: int array with the vertical positions of the rectangles.
+            width: int array with the widths of the rectangles.
+            height: int array with the heights of the rectangles.
+            mask: Optional bool array with the rectangles to index (e.g. the
+                active bullets). By default all the rectangles are indexed.
+        """
+        self._x, self._y, self._width, self._height = x_pos, y_pos, width, height
+        if self._shift is not None:
+            cols, rows = x_pos >> self._shift, y_pos >> self._shift
+        else:
+            cols, rows = x_pos // self.cell_size, y_pos // self.cell_size
+        # (np.clip has a much higher overhead on small arrays)
+        np.minimum(np.maximum(cols, 0, out=cols), self.n_cols - 1, out=cols)
+        np.minimum(np.maximum(rows, 0, out=rows), self.n_rows - 1, out=rows)
+
+        # Keys (cell, index) with the index in the low bits, 32 bit keys if they fit
+        index_bits = max(len(x_pos) - 1, 1).bit_length()
+        key_dtype = np.uint32 if index_bits + self.n_cells.bit_length() <= 32 else np.uint64
+        keys = (rows * self.n_cols + cols).astype(key_dtype)
+        if mask is not None:
+            keys[~mask] = self.n_cells  # Extra cell that is never queried
+        keys <<= key_dtype(index_bits)
+        keys |= np.arange(len(keys), dtype=key_dtype)
+        keys.sort()
+        self._order = (keys & key_dtype((1 << index_bits) - 1)).astype(np.intp)
+        keys >>= key_dtype(index_bits)
+        self._bounds = np.searchsorted(keys, self._cell_ids.astype(key_dtype))
+        self._size = int(self._bounds[self.n_cells])  # Number of indexed rectangles
+        indexed = mask if mask is not None else True
+        self._max_width = int(np.max(width, where=indexed, initial=0))
+        self._max_height = int(np.max(height, where=indexed, initial=0))
+
+    @staticmethod
+    def _clip(cell: int, n_cells: int) -> int:
+        """Clips a cell coordinate to the grid."""
+        return min(max(cell, 0), n_cells - 1)
+
+    def query(self, rect: Rect) -> np.ndarray:
+        """Finds the indexed rectangles that overlap a rectangle.
+
+        The overlap test is the same as Rect.colliderect() (touching borders
+        don't overlap).
+
+        Args:
+            rect: The query rectangle.
+
+        Returns:
+            An int array with the indices (in the arrays given to build()) of the
+            overlapping rectangles.
+        """
+        if self._size == 0:
+            return self._order[:0]
+        # Cells of the top-left corners of the rectangles that can overlap (clipped
+        # like the cells of the rectangles, so the ones outside the field are found)
+        first_col = self._clip((rect.x - self._max_width + 1) // self.cell_size, self.n_cols)
+        last_col = self._clip((rect.right - 1) // self.cell_size, self.n_cols)
+        first_row = self._clip((rect.y - self._max_height + 1) // self.cell_size, self.n_rows)
+        last_row = self._clip((rect.bottom - 1) // self.cell_size, self.n_rows)
+        if first_col > last_col or first_row > last_row:
+            return self._order[:0]
+
+        bounds = self._bounds
+        slices = [self._order[bounds[row_cell + first_col]:bounds[row_cell + last_col + 1]]
+                  for row_cell in range(first_row * self.n_cols, (last_row + 1) * self.n_cols,
+                                        self.n_cols)]
+        candidates = slices[0] if len(slices) == 1 else np.concatenate(slices)
+
+        x_pos, y_pos = self._x[candidates], self._y[candidates]
+        overlapping = (x_pos < rect.right) & (x_pos + self._width[candidates] > rect.x) \
+            & (y_pos < rect.bottom) & (y_pos + self._height[candidates] > rect.y)
+        return candidates[overlapping]
@@ -0,0 +1,83 @@
+"""Positions of the objects of a game between two simulation ticks."""
+from typing import List
+
+import numpy as np
+
+from .game_context import GameContext
+
+
+class StateInterpolator:
+    """Class that interpolates the drawn positions between the last two simulation ticks.
+
+    A loop with a fixed simulation rate draws the frames at any time between two
+    ticks. The positions of the spaceships and the bullets are saved before each
+    tick, and the frames are drawn at the positions interpolated between the
+    saved ones and the current ones with the fraction of the tick elapsed since
+    the last tick (alpha). The frames show the game one tick late, but the
+    movement is smooth whatever the rates of the ticks and the frames.
+    """
+
+    def __init__(self):
+        """StateInterpolator constructor."""
+        self.alpha = 1.0  # Fraction of the tick elapsed since the last tick, in [0, 1]
+        self._ships = None  # Stores with the saved positions
+        self._bullets = None
+        self._ship_position = np.zeros((2, 0), dtype=np.int32)
+        self._bullet_x = np.zeros(0, dtype=np.int32)
+        self._bullet_active = np.zeros(0, dtype=bool)
+
+    def save(self, context: GameContext) -> None:
+        """Saves the positions of the current tick, before advancing the simulation.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+        """
+        ships, bullets = context.ships, context.bullets
+        if ships is not self._ships:
+            self._ships = ships
+            self._ship_position = np.empty((2, len(ships)), dtype=np.int32)
+        if bullets is not self._bullets:
+            self._bullets = bullets
+            self._bullet_x = np.empty_like(bullets.x)
+            self._bullet_active = np.empty_like(bullets.active)
+        np.copyto(self._ship_position, ships.position[:, :len(ships)])
+        np.copyto(self._bullet_x, bullets.x)
+        np.copyto(self._bullet_active, bullets.active)
+
+    def get_ship_positions(self, context: GameContext) -> List[List[int]]:
+        """Returns the interpolated positions of the spaceships.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+
+        Returns:
+            A list with the [x, y] position of each spaceship of the store of the
+            context. The spaceships of a restarted game are at their current
+            position.
+        """
+        ships = context.ships
+        position = ships.position[:, :len(ships)]
+        if ships is self._ships:
+            position = np.rint(self._ship_position + self.alpha * (position - self._ship_position))
+            position = position.astype(np.int32)
+        return position.T.tolist()
+
+    def get_bullet_x(self, context: GameContext) -> np.ndarray:
+        """Returns the interpolated horizontal positions of the bullets.
+
+        Note: A slot of the pool can't be released and spawned again in the same
+        tick, so the slots active in both ticks have the same bullet.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+
+        Returns:
+            An int array with the horizontal position of each slot of the bullet
+            pool of the context. The bullets fired in the last tick are at their
+            current position.
+        """
+        bullets = context.bullets
+        if bullets is not self._bullets:
+            return bullets.x
+        interpolated = np.rint(self._bullet_x + self.alpha * (bullets.x - self._bullet_x))
+        return np.where(self._bullet_active & bullets.active, interpolated, bullets.x).astype(np.int32)
@@ -1,20 +1,36 @@
-"""Global settings of the game."""
-import os
+"""Global settings of the game.
 
+This module only defines constants. The fonts and sounds are created on first
+use by utils.resources.
+"""
 import pygame
 
 #  SETTINGS
 FPS = 60
+MAX_TICKS_PER_FRAME = 5  # Simulation ticks run at most to catch up before drawing a frame
 VEL = 5
 INIT_HEALTH = 10
 BULLET_VEL = 7
-MAX_ACTIVE_BULLETS = 3
+MAX_ACTIVE_BULLETS = 3  # Per spaceship
+BULLET_WIDTH = 10
+BULLET_HEIGHT = 5
+BULLET_DAMAGE = 1
+SPATIAL_HASH_CELL_SIZE = 64  # Side of the cells of the collision grid
+# Minimum spaceships x bullets to check the hits with the grid. None to never use it: no crossover with
+# the brute force pass reproduced up to 128 x 32768 (see benchmarks/bench_spatial_hash.py)
+SPATIAL_HASH_MIN_PAIRS = None
+VECTORIZED_MOVEMENT_MIN_SHIPS = 16  # Minimum spaceships to move them with array operations
 
-pygame.font.init()
-WINNER_FONT = pygame.font.SysFont('comicsans', 100)
+# FONTS: (system font name, size)
+WINNER_FONT = ('comicsans', 100)
 WIN_TEXT_DELAY = 5000  # 5 seconds
-HP_FONT = pygame.font.SysFont('comicsans', 40)
+HP_FONT_SIZE = 40
+HP_FONT = ('comicsans', HP_FONT_SIZE)
 HP_PADDING = 10
+HUD_HEIGHT = HP_FONT_SIZE + 2 * HP_PADDING  # Height of the band with the HP texts
+TEXT_CACHE_SIZE = 32  # Maximum number of rendered texts kept in memory
+PROFILER_FONT = ('monospace', 16)
+PROFILER_OVERLAY_INTERVAL = 30  # Frames between updates of the profiler overlay
 
 WINDOW_WIDTH = 900
 WINDOW_HEIGHT = 500
@@ -32,6 +48,15 @@ LEFT_INIT_Y = WINDOW_HEIGHT // 2 - SPACESHIP_WIDTH // 2
 RIGHT_INIT_X = int(WINDOW_WIDTH * 0.9) - SPACESHIP_HEIGHT
 RIGHT_INIT_Y = WINDOW_HEIGHT // 2 - SPACESHIP_WIDTH // 2
 
+SIDES = ("left", "right")  # Side of the field of each team, by team index
+TEAM_SIZE = 1  # Spaceships per team of the default game
+
+# OPPONENTS
+OPPONENT_DODGE_TICKS = 15  # Ticks ahead that the heuristic opponent looks for incoming bullets
+OPPONENT_SEARCH_DEPTH = 3  # Maximum decisions searched ahead by the lookahead opponent
+OPPONENT_DECISION_TICKS = 4  # Ticks that each decision of the lookahead opponent is held
+OPPONENT_TIME_BUDGET = 5.0  # Milliseconds of search of the lookahead opponent in a tick
+
 # CONTROLS
 LEFT_LEFT = pygame.K_a
 LEFT_RIGHT = pygame.K_d
@@ -67,13 +92,7 @@ DISPLAY_NAME = "Control Smasher"
 BG_COLOR = BLACK
 
 # SOUND
-pygame.mixer.init()
 VOLUME = 0.2  # [0, 1] range
 BULLET_HIT_SOUND_FILE = "Grenade+1.mp3"
 BULLET_SHOOT_SOUND_FILE = "Gun+Silencer.mp3"
-BULLET_HIT_SOUND = pygame.mixer.Sound(
-    os.path.join(ASSETS_PATH, BULLET_HIT_SOUND_FILE))
-BULLET_SHOOT_SOUND = pygame.mixer.Sound(
-    os.path.join(ASSETS_PATH, BULLET_SHOOT_SOUND_FILE))
-BULLET_HIT_SOUND.set_volume(VOLUME)
-BULLET_SHOOT_SOUND.set_volume(VOLUME)
+SILENT_ENV_VAR = "SPACESHIPS_SILENT"  # Set it to "1" to disable the sounds
@@ -1,50 +1,215 @@
 """API to setup and run the game."""
+import time
+from typing import List, Optional
+
 import pygame
 
-from utils.config import FPS
+from utils.config import FPS, MAX_TICKS_PER_FRAME, PROFILER_OVERLAY_INTERVAL, TEAM_SIZE, INIT_HEALTH
 from utils.classes.game_context import GameContext
+from utils.classes.state_interpolator import StateInterpolator
+from utils.hud import prerender_hp_texts, render_profiler_overlay
 from utils.game_utils import create_spaceships, create_barrier
-from utils.game_utils import setup_display, update_window
-from utils.game_utils import handle_event, handle_bullets_movement, handle_keys
+from utils.game_utils import setup_display, update_window, subscribe_game_handlers
+from utils.game_utils import get_player_inputs, get_team_inputs
+from utils.profiler import FrameProfiler, GAME_LOOP_PHASES
+from utils.recording import InputRecorder
+from utils.simulation import step, SHOOT, LEFT
+from utils.opponents import Opponent
 
 
-def setup_game() -> GameContext:
+def setup_game(seed: Optional[int] = None, team_size: int = TEAM_SIZE) -> GameContext:
     """Initializes all the objects to start the game.
 
+    Args:
+        seed: Seed for the random generator of the game. If None, a random seed
+            is used.
+        team_size: The number of spaceships of each team. Each player controls
+            all the spaceships of its team.
+
     Returns:
         context: GameContext object with the context variables of the game.
     """
     game_window = setup_display()
+    prerender_hp_texts(team_size * INIT_HEALTH)
     barrier = create_barrier()
-    left_spaceship, right_spaceship = create_spaceships()
     context = GameContext(
         game_window=game_window,
         barrier=barrier,
-        left_spaceship=left_spaceship,
-        right_spaceship=right_spaceship,
+        spaceships=create_spaceships(team_size),
+        seed=seed,
     )
+    subscribe_game_handlers(context)
 
     return context
 
 
-def game_loop(context: GameContext) -> None:
+def set_opponent_inputs(context: GameContext, opponent: Opponent, inputs: List[int]) -> None:
+    """Replaces the inputs of the spaceships of the left team with the ones of an opponent.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        opponent: The Opponent that controls the left team.
+        inputs: The list with the input flags of each spaceship of the context,
+            modified in place.
+    """
+    opponent.start_tick(context)
+    for idx, spaceship in enumerate(context.spaceships):
+        if spaceship.team == LEFT:
+            inputs[idx] = opponent.get_inputs(context, spaceship)
+
+
+def game_loop(context: GameContext,
+              recorder: Optional[InputRecorder] = None,
+              profiler: Optional[FrameProfiler] = None,
+              show_overlay: bool = False,
+              opponent: Optional[Opponent] = None) -> None:
     """Executes the event loop that runs the game.
 
     Args:
         context: GameContext object with the context variables of the game.
+        recorder: Optional InputRecorder to write the inputs of every tick.
+        profiler: Optional FrameProfiler to time the phases of each frame
+            (see utils.profiler.GAME_LOOP_PHASES).
+        show_overlay: If True (and there is a profiler) the statistics of the
+            phases are shown over the game.
+        opponent: Optional Opponent (see utils.opponents) that controls the
+            spaceships of the left team instead of its player.
     """
+    if profiler is not None and profiler.phases != GAME_LOOP_PHASES:
+        raise ValueError(f"The profiler phases must be {GAME_LOOP_PHASES}.")
+    events_phase, inputs_phase, simulation_phase, render_phase, wait_phase = range(5)
+    overlay = None
     clock = pygame.time.Clock()
     run = True
     while run:
+        if profiler is not None:
+            profiler.start_frame()
         clock.tick(FPS)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-            else:
-                handle_event(context, event)
+        if profiler is not None:
+            profiler.mark(wait_phase)
+
+        events = pygame.event.get()
+        run = not any(event.type == pygame.QUIT for event in events)
+        if profiler is not None:
+            profiler.mark(events_phase)
+
+        inputs = get_team_inputs(context, *get_player_inputs(events, pygame.key.get_pressed()))
+        if opponent is not None:
+            set_opponent_inputs(context, opponent, inputs)
+        if recorder is not None:
+            recorder.record(*inputs)
+        if profiler is not None:
+            profiler.mark(inputs_phase)
+
+        step(context, *inputs)
+        if profiler is not None:
+            profiler.mark(simulation_phase)
+
+        if show_overlay and profiler is not None \
+                and profiler.n_frames % PROFILER_OVERLAY_INTERVAL == 0:
+            overlay = render_profiler_overlay(profiler)
+        update_window(context, overlay)
+        if profiler is not None:
+            profiler.mark(render_phase)
+            profiler.end_frame()
+
+
+def fixed_step_game_loop(context: GameContext,
+                         recorder: Optional[InputRecorder] = None,
+                         profiler: Optional[FrameProfiler] = None,
+                         show_overlay: bool = False,
+                         tick_rate: int = FPS,
+                         render_fps: int = FPS,
+                         opponent: Optional[Opponent] = None) -> None:
+    """Executes the event loop that runs the game at a fixed simulation rate.
+
+    The simulation advances at tick_rate ticks per second of real time whatever
+    the time it takes to draw the frames: the elapsed time is accumulated and
+    consumed in ticks before each frame, and the frames are drawn between the
+    last two ticks (see StateInterpolator). A frame that is late is drawn right
+    away and the missed frames are dropped. If the machine can't even keep up
+    with the simulation, at most MAX_TICKS_PER_FRAME ticks are run per frame
+    and the game slows down instead of falling further behind.
+
+    The inputs are read once per frame, the movement inputs apply to all the
+    ticks of the frame and each shot to a single tick.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        recorder: Optional InputRecorder to write the inputs of every tick.
+        profiler: Optional FrameProfiler to time the phases of each frame
+            (see utils.profiler.GAME_LOOP_PHASES).
+        show_overlay: If True (and there is a profiler) the statistics of the
+            phases are shown over the game.
+        tick_rate: The number of simulation ticks per second.
+        render_fps: The maximum number of frames drawn per second.
+        opponent: Optional Opponent (see utils.opponents) that controls the
+            spaceships of the left team instead of its player. It decides the
+            inputs of every tick.
+    """
+    if profiler is not None and profiler.phases != GAME_LOOP_PHASES:
+        raise ValueError(f"The profiler phases must be {GAME_LOOP_PHASES}.")
+    events_phase, inputs_phase, simulation_phase, render_phase, wait_phase = range(5)
+    tick_ns = 1_000_000_000 // tick_rate
+    frame_ns = 1_000_000_000 // render_fps
+    interpolator = StateInterpolator()
+    overlay = None
+    shots = [0] * len(context.spaceships)  # Shots not fired yet
+    lag = 0  # Time not simulated yet
+    last_time = next_frame_time = time.perf_counter_ns()
+    run = True
+    while run:
+        if profiler is not None:
+            profiler.start_frame()
+        now = time.perf_counter_ns()
+        if now < next_frame_time:
+            time.sleep((next_frame_time - now) / 1e9)
+            now = time.perf_counter_ns()
+        next_frame_time = max(next_frame_time + frame_ns, now)
+        lag += now - last_time
+        last_time = now
+        if profiler is not None:
+            profiler.mark(wait_phase)
+
+        events = pygame.event.get()
+        run = not any(event.type == pygame.QUIT for event in events)
+        if profiler is not None:
+            profiler.mark(events_phase)
 
-        handle_bullets_movement(context)
+        frame_inputs = get_team_inputs(context, *get_player_inputs(events, pygame.key.get_pressed()))
+        movements = [inputs & ~SHOOT for inputs in frame_inputs]
+        shots = [shot | (inputs & SHOOT) for shot, inputs in zip(shots, frame_inputs)]
+        if profiler is not None:
+            profiler.mark(inputs_phase)
 
-        handle_keys(context)
+        n_ticks = 0
+        while lag >= tick_ns:
+            if n_ticks == MAX_TICKS_PER_FRAME:
+                lag %= tick_ns  # Drop the ticks that can't be simulated in time
+                break
+            inputs = [movement | shot for movement, shot in zip(movements, shots)]
+            shots = [0] * len(inputs)
+            if opponent is not None:
+                set_opponent_inputs(context, opponent, inputs)
+            if recorder is not None:
+                recorder.record(*inputs)
+            interpolator.save(context)
+            ships = context.ships
+            step(context, *inputs)
+            lag -= tick_ns
+            n_ticks += 1
+            if context.ships is not ships:
+                # The game was restarted after the winner screen, which waits
+                lag = 0
+                last_time = time.perf_counter_ns()
+        interpolator.alpha = lag / tick_ns
+        if profiler is not None:
+            profiler.mark(simulation_phase)
 
-        update_window(context)
+        if show_overlay and profiler is not None \
+                and profiler.n_frames % PROFILER_OVERLAY_INTERVAL == 0:
+            overlay = render_profiler_overlay(profiler)
+        update_window(context, overlay, interpolator)
+        if profiler is not None:
+            profiler.mark(render_phase)
+            profiler.end_frame()
@@ -1,24 +1,34 @@
 """Module with helper functions for the game"""
-from typing import Tuple, Sequence
+from typing import List, Optional, Tuple, Sequence
 
 import pygame
 from pygame import Rect
 from pygame.surface import Surface
 
+from utils.classes.event_bus import FireEvent, HitEvent, WinEvent
 from utils.classes.game_context import GameContext
-from utils.classes.bullet import Bullet
 from utils.classes.spaceship import Spaceship
-from utils.config import BARRIER_WIDTH
+from utils.classes.spaceship_store import SpaceshipStore
+from utils.classes.state_interpolator import StateInterpolator
+from utils.config import BARRIER_WIDTH, SPACESHIP_WIDTH, TEAM_SIZE, SIDES
 from utils.config import LEFT_SPACESHIP_FILE, RIGHT_SPACESHIP_FILE
 from utils.config import WINDOW_WIDTH, WINDOW_HEIGHT, DISPLAY_NAME, BG_COLOR
-from utils.config import VEL, BULLET_VEL, MAX_ACTIVE_BULLETS
-from utils.config import LEFT_INIT_X, LEFT_INIT_Y, RIGHT_INIT_X, RIGHT_INIT_Y
+from utils.config import LEFT_INIT_X, RIGHT_INIT_X
 from utils.config import LEFT_LEFT, LEFT_RIGHT, LEFT_UP, LEFT_DOWN, LEFT_SHOOT
 from utils.config import RIGHT_LEFT, RIGHT_RIGHT, RIGHT_UP, RIGHT_DOWN, RIGHT_SHOOT
-from utils.config import WHITE, RED, YELLOW
-from utils.config import WINNER_FONT, HP_FONT, HP_PADDING, WIN_TEXT_DELAY
-from utils.config import BULLET_HIT_SOUND, BULLET_SHOOT_SOUND
-from utils.my_events import LEFT_HIT, RIGHT_HIT, WIN
+from utils.config import HP_PADDING, WIN_TEXT_DELAY
+from utils.config import RED, YELLOW
+from utils.hud import render_hp_text, render_winner_text
+from utils.resources import BULLET_HIT_SOUND, BULLET_SHOOT_SOUND
+from utils.simulation import MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN, SHOOT, LEFT, RIGHT
+
+
+# Keys that control each spaceship: (left, right, up, down)
+LEFT_MOVEMENT_KEYS = (LEFT_LEFT, LEFT_RIGHT, LEFT_UP, LEFT_DOWN)
+RIGHT_MOVEMENT_KEYS = (RIGHT_LEFT, RIGHT_RIGHT, RIGHT_UP, RIGHT_DOWN)
+
+# Color of the bullets of each team
+BULLET_COLORS = (YELLOW, RED)
 
 
 def setup_display() -> Surface:
@@ -35,6 +45,15 @@ def setup_display() -> Surface:
     return game_window
 
 
+def create_offscreen_surface() -> Surface:
+    """Creates a surface to draw the game without opening a window.
+
+    Returns:
+        The Surface object to draw the game on.
+    """
+    return pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+
 def create_barrier() -> Rect:
     """Creates a barrier with a rectangle in the middle of the screen. This barrier
        acts as limit for each spaceship area.
@@ -46,24 +65,46 @@ def create_barrier() -> Rect:
     return pygame.Rect(int(WINDOW_WIDTH / 2 - BARRIER_WIDTH / 2), 0, BARRIER_WIDTH, WINDOW_HEIGHT)
 
 
-def create_spaceships() -> Tuple[Spaceship, Spaceship]:
-    """Creates the spaceships objects of both sides.
+def get_team_positions(init_x: int, team_size: int) -> List[Tuple[int, int]]:
+    """Computes the initial positions of the spaceships of a team, in a column.
+
+    Args:
+        init_x: The horizontal position of the column.
+        team_size: The number of spaceships of the team.
 
     Returns:
-        A tuple with spaceships objects -> (left_spaceship, right_spaceship).
+        A list with the (x, y) positions, evenly spaced along the height of the
+        window (the middle of the window for a single spaceship).
     """
-    left_spaceship = Spaceship(
-        image_file=LEFT_SPACESHIP_FILE,
-        side="left",
-        init_pos=(LEFT_INIT_X, LEFT_INIT_Y),
-        name="Yellow")
-    right_spaceship = Spaceship(
-        image_file=RIGHT_SPACESHIP_FILE,
-        side="right",
-        init_pos=(RIGHT_INIT_X, RIGHT_INIT_Y),
-        name="Red")
+    return [(init_x, (idx + 1) * WINDOW_HEIGHT // (team_size + 1) - SPACESHIP_WIDTH // 2)
+            for idx in range(team_size)]
+
+
+def create_spaceships(team_size: int = TEAM_SIZE) -> List[Spaceship]:
+    """Creates the spaceships objects of both teams.
+
+    Args:
+        team_size: The number of spaceships of each team.
 
-    return (left_spaceship, right_spaceship)
+    Returns:
+        A list with the spaceships objects of the left team followed by the ones
+        of the right team -> [left_spaceship, right_spaceship] for a single
+        spaceship per team.
+    """
+    spaceships = []
+    store = SpaceshipStore(2 * team_size)
+    teams = ((LEFT_SPACESHIP_FILE, "left", LEFT_INIT_X, "Yellow"),
+             (RIGHT_SPACESHIP_FILE, "right", RIGHT_INIT_X, "Red"))
+    for image_file, side, init_x, name in teams:
+        for idx, init_pos in enumerate(get_team_positions(init_x, team_size)):
+            spaceships.append(Spaceship(
+                image_file=image_file,
+                side=side,
+                init_pos=init_pos,
+                name=name if idx == 0 else f"{name} {idx + 1}",
+                store=store))
+
+    return spaceships
 
 
 def restart_game(context: GameContext) -> None:
@@ -72,183 +113,186 @@ def restart_game(context: GameContext) -> None:
     Args:
         context: GameContext object with the context variables of the game.
     """
-    left_spaceship, right_spaceship = create_spaceships()
-    context.restart(left_spaceship, right_spaceship)
+    context.restart(create_spaceships(context.ships.count(LEFT)))
 
 
-def update_window(context: GameContext) -> None:
-    """Refreshes the displayed window using the data of the context object.
+def draw_sprites(context: GameContext, interpolator: Optional[StateInterpolator] = None) -> List[Rect]:
+    """Draws the HP texts, the spaceships and the bullets in the game_window of the context.
 
     Args:
         context: GameContext object with the context variables of the game.
-    """
-    context.game_window.blit(context.background_surface, (0, 0))
+        interpolator: Optional StateInterpolator to draw the spaceships and the
+            bullets between the last two simulation ticks.
 
-    # Show spaceships health
-    left_health_text = HP_FONT.render(
-        f"HP: {context.left_spaceship.health}", True, WHITE)
-    right_health_text = HP_FONT.render(
-        f"HP: {context.right_spaceship.health}", True, WHITE)
-    context.game_window.blit(
+    Returns:
+        A list with the areas of the window where something was drawn.
+    """
+    drawn_rects = []
+
+    # Show the health of each team
+    ships = context.ships
+    n_ships = len(ships)
+    healths, teams = ships.health[:n_ships].tolist(), ships.team[:n_ships].tolist()
+    team_health = [0] * len(SIDES)
+    for health, team in zip(healths, teams):
+        team_health[team] += max(health, 0)
+    left_health_text = render_hp_text(team_health[LEFT])
+    right_health_text = render_hp_text(team_health[RIGHT])
+    drawn_rects.append(context.game_window.blit(
         left_health_text,
-        (HP_PADDING, HP_PADDING))
-    context.game_window.blit(
+        (HP_PADDING, HP_PADDING)))
+    drawn_rects.append(context.game_window.blit(
         right_health_text,
         (context.game_window.get_width() -
-         right_health_text.get_width() - HP_PADDING, HP_PADDING))
+         right_health_text.get_width() - HP_PADDING, HP_PADDING)))
 
-    # Draw spaceships
-    context.game_window.blit(context.left_spaceship.surface,
-                             (context.left_spaceship.body.x, context.left_spaceship.body.y))
-    context.game_window.blit(context.right_spaceship.surface,
-                             (context.right_spaceship.body.x, context.right_spaceship.body.y))
+    # Draw the alive spaceships
+    if interpolator is None:
+        positions = ships.position[:, :n_ships].T.tolist()
+    else:
+        positions = interpolator.get_ship_positions(context)
+    for spaceship, position, health in zip(context.spaceships, positions, healths):
+        if health > 0:
+            drawn_rects.append(context.game_window.blit(spaceship.surface, position))
 
     # Draw bullets
-    for bullet in context.left_bullets + context.right_bullets:
-        pygame.draw.rect(context.game_window, bullet.color, bullet.body)
+    bullets = context.bullets
+    slots = bullets.get_slots()
+    bullets_x = bullets.x if interpolator is None else interpolator.get_bullet_x(context)
+    for slot, owner, x_pos in zip(slots.tolist(), bullets.owner[slots].tolist(), bullets_x[slots].tolist()):
+        bullet_rect = bullets.get_rect(slot)
+        bullet_rect.x = x_pos
+        drawn_rects.append(pygame.draw.rect(
+            context.game_window, BULLET_COLORS[teams[owner]], bullet_rect))
 
-    pygame.display.update()
+    return drawn_rects
 
 
-def handle_left_spaceship_movement(context: GameContext, pressed_keys: Sequence[bool]) -> None:
-    """Handles the movement of the left side spaceship from the pressed keys.
+def draw_game(context: GameContext,
+              overlay: Optional[Surface] = None,
+              interpolator: Optional[StateInterpolator] = None) -> List[Rect]:
+    """Draws the current state of the game in the game_window of the context.
+
+    Only the areas that changed since the previous frame are redrawn.
 
     Args:
         context: GameContext object with the context variables of the game.
-        pressed_keys: A pygame.key.ScancodeWraper with the info about the current pressed keys.
+        overlay: Optional Surface drawn over the game in the bottom left corner
+            (e.g. the profiler statistics).
+        interpolator: Optional StateInterpolator to draw the game between the
+            last two simulation ticks.
+
+    Returns:
+        A list with the areas of the window that changed.
     """
-    x_pos, y_pos = context.left_spaceship.body.x, context.left_spaceship.body.y
-    body_width, body_height = context.left_spaceship.body.width, context.left_spaceship.body.height
-    if pressed_keys[LEFT_LEFT] and x_pos - VEL > 0:
-        context.left_spaceship.body.x -= VEL
-    if pressed_keys[LEFT_RIGHT] and x_pos + VEL + body_width < context.barrier.x:
-        context.left_spaceship.body.x += VEL
-    if pressed_keys[LEFT_UP] and y_pos - VEL > 0:
-        context.left_spaceship.body.y -= VEL
-    if pressed_keys[LEFT_DOWN] and y_pos + VEL + body_height < context.game_window.get_height():
-        context.left_spaceship.body.y += VEL
+    context.renderer.begin_frame(context.game_window, context.background_surface)
+    drawn_rects = draw_sprites(context, interpolator)
+    if overlay is not None:
+        drawn_rects.append(context.game_window.blit(
+            overlay, (HP_PADDING, context.height - overlay.get_height() - HP_PADDING)))
+    return context.renderer.end_frame(context.game_window, drawn_rects)
 
 
-def handle_right_spaceship_movement(context: GameContext, pressed_keys: Sequence[bool]) -> None:
-    """Handles the movement of the right side spaceship from the pressed keys.
+def update_window(context: GameContext,
+                  overlay: Optional[Surface] = None,
+                  interpolator: Optional[StateInterpolator] = None) -> None:
+    """Refreshes the displayed window using the data of the context object.
 
     Args:
         context: GameContext object with the context variables of the game.
-        pressed_keys: A pygame.key.ScancodeWraper with the info about the current pressed keys.
+        overlay: Optional Surface drawn over the game, see draw_game().
+        interpolator: Optional StateInterpolator, see draw_game().
     """
-    x_pos, y_pos = context.right_spaceship.body.x, context.right_spaceship.body.y
-    body_width, body_height = context.right_spaceship.body.width, context.right_spaceship.body.height
-    if pressed_keys[RIGHT_LEFT] and x_pos - VEL > context.barrier.x + context.barrier.width:
-        context.right_spaceship.body.x -= VEL
-    if pressed_keys[RIGHT_RIGHT] and x_pos + VEL + body_width < context.game_window.get_width():
-        context.right_spaceship.body.x += VEL
-    if pressed_keys[RIGHT_UP] and y_pos - VEL > 0:
-        context.right_spaceship.body.y -= VEL
-    if pressed_keys[RIGHT_DOWN] and y_pos + VEL + body_height < context.game_window.get_height():
-        context.right_spaceship.body.y += VEL
+    pygame.display.update(draw_game(context, overlay, interpolator))
 
 
-def handle_bullets_fired(context: GameContext, event: pygame.event.Event) -> None:
-    """Handles the shooting action of the spaceships when they press the shoot key.
+def keys_to_inputs(pressed_keys: Sequence[bool], movement_keys: Tuple[int, int, int, int]) -> int:
+    """Translates the pressed keys to the movement input flags of a spaceship.
 
     Args:
-        context: GameContext object with the context variables of the game.
-        event: An EventType object with the current event to handle.
-    """
-    if event.type == pygame.KEYDOWN:
-        if event.key == LEFT_SHOOT and len(context.left_bullets) < MAX_ACTIVE_BULLETS:
-            context.left_bullets.append(
-                Bullet(shooter=context.left_spaceship, color=YELLOW))
-            BULLET_SHOOT_SOUND.play()
-        elif event.key == RIGHT_SHOOT and len(context.right_bullets) < MAX_ACTIVE_BULLETS:
-            context.right_bullets.append(
-                Bullet(shooter=context.right_spaceship, color=RED))
-            BULLET_SHOOT_SOUND.play()
-
+        pressed_keys: A pygame.key.ScancodeWraper with the info about the current pressed keys.
+        movement_keys: A tuple with the (left, right, up, down) keys of the spaceship.
 
-def handle_bullet_hit(context: GameContext, event: pygame.event.Event) -> None:
-    """Handles the damage dealt when a bullet hits an spaceship.
+    Returns:
+        An int with the MOVE_* input flags of the pressed keys.
+    """
+    left_key, right_key, up_key, down_key = movement_keys
+    inputs = 0
+    if pressed_keys[left_key]:
+        inputs |= MOVE_LEFT
+    if pressed_keys[right_key]:
+        inputs |= MOVE_RIGHT
+    if pressed_keys[up_key]:
+        inputs |= MOVE_UP
+    if pressed_keys[down_key]:
+        inputs |= MOVE_DOWN
+    return inputs
+
+
+def get_player_inputs(events: Sequence[pygame.event.Event],
+                      pressed_keys: Sequence[bool]) -> Tuple[int, int]:
+    """Builds the input flags of both spaceships for one tick from the keyboard.
+
+    The movement flags come from the pressed keys and the SHOOT flag from the
+    shoot key presses in the events of the frame.
 
     Args:
-        context: GameContext object with the context variables of the game.
-        event: An EventType object with the current event to handle.
-    """
-    if event.type == RIGHT_HIT:
-        context.right_spaceship.health -= event.damage
-        BULLET_HIT_SOUND.play()
-        if context.right_spaceship.is_dead():
-            pygame.event.post(pygame.event.Event(
-                WIN, winner=context.left_spaceship))
-    if event.type == LEFT_HIT:
-        context.left_spaceship.health -= event.damage
-        BULLET_HIT_SOUND.play()
-        if context.left_spaceship.is_dead():
-            pygame.event.post(pygame.event.Event(
-                WIN, winner=context.right_spaceship))
-
-
-def handle_win(context: GameContext, event: pygame.event.Event) -> None:
-    """Handles the win event, showing the winner and restarting the game.
+        events: The pygame events of the current frame.
+        pressed_keys: A pygame.key.ScancodeWraper with the info about the current pressed keys.
 
-    Args: 
-        context: GameContext object with the context variables of the game.
-        event: An EventType object with the current event to handle.
+    Returns:
+        A tuple with the input flags -> (left_inputs, right_inputs).
     """
-    if event.type == WIN:
-        win_text = WINNER_FONT.render(f"{event.winner.name} wins", True, WHITE)
-        context.game_window.blit(
-            win_text,
-            (context.game_window.get_width() // 2 - win_text.get_width() // 2,
-             context.game_window.get_height() // 2 - win_text.get_height() // 2))
-        pygame.display.update()
-        pygame.time.delay(WIN_TEXT_DELAY)  # Wait a bit in the winner screen
-        restart_game(context)
+    left_inputs = keys_to_inputs(pressed_keys, LEFT_MOVEMENT_KEYS)
+    right_inputs = keys_to_inputs(pressed_keys, RIGHT_MOVEMENT_KEYS)
+    for event in events:
+        if event.type == pygame.KEYDOWN:
+            if event.key == LEFT_SHOOT:
+                left_inputs |= SHOOT
+            elif event.key == RIGHT_SHOOT:
+                right_inputs |= SHOOT
+    return (left_inputs, right_inputs)
 
 
-def handle_event(context: GameContext, event: pygame.event.Event) -> None:
-    """Event handler of the game.
+def get_team_inputs(context: GameContext, left_inputs: int, right_inputs: int) -> List[int]:
+    """Gives the inputs of each player to all the spaceships of its team.
 
     Args:
         context: GameContext object with the context variables of the game.
-        event: An EventType object with the current event to handle.
+        left_inputs: int with the input flags of the left player.
+        right_inputs: int with the input flags of the right player.
+
+    Returns:
+        A list with the input flags of each spaceship, in the order of
+        context.spaceships (see utils.simulation.step()).
     """
-    handle_win(context, event)
-    handle_bullet_hit(context, event)
-    handle_bullets_fired(context, event)
+    return [left_inputs if team == LEFT else right_inputs
+            for team in context.ships.team[:len(context.ships)].tolist()]
 
 
-def handle_bullets_movement(context: GameContext) -> None:
-    """Handles the movement and collisions of the bullets.
+def handle_win(context: GameContext, event: WinEvent) -> None:
+    """Handles the win event, showing the winner and restarting the game.
 
-    Args:
+    Args: 
         context: GameContext object with the context variables of the game.
+        event: The WinEvent with the winner of the game.
     """
-    for bullet in context.left_bullets:
-        bullet.body.x += BULLET_VEL
-        if bullet.is_hitting(context.right_spaceship):
-            pygame.event.post(pygame.event.Event(
-                RIGHT_HIT, damage=bullet.damage))
-            context.left_bullets.remove(bullet)
-        elif bullet.body.x > context.game_window.get_width():
-            context.left_bullets.remove(bullet)
-
-    for bullet in context.right_bullets:
-        bullet.body.x -= BULLET_VEL
-        if bullet.is_hitting(context.left_spaceship):
-            pygame.event.post(pygame.event.Event(
-                LEFT_HIT, damage=bullet.damage))
-            context.right_bullets.remove(bullet)
-        elif bullet.body.x < 0:
-            context.right_bullets.remove(bullet)
-
-
-def handle_keys(context: GameContext) -> None:
-    """Handles the acctions to do from the current pressed keys.
+    win_text = render_winner_text(event.winner.name)
+    context.game_window.blit(
+        win_text,
+        (context.game_window.get_width() // 2 - win_text.get_width() // 2,
+         context.game_window.get_height() // 2 - win_text.get_height() // 2))
+    pygame.display.update()
+    pygame.time.delay(WIN_TEXT_DELAY)  # Wait a bit in the winner screen
+    restart_game(context)
+
+
+def subscribe_game_handlers(context: GameContext) -> None:
+    """Subscribes the sounds and the win screen to the events of the game.
 
     Args:
         context: GameContext object with the context variables of the game.
     """
-    pressed_keys = pygame.key.get_pressed()
-
-    handle_left_spaceship_movement(context, pressed_keys)
-    handle_right_spaceship_movement(context, pressed_keys)
+    context.events.subscribe(FireEvent, lambda event: BULLET_SHOOT_SOUND.play())
+    context.events.subscribe(HitEvent, lambda event: BULLET_HIT_SOUND.play())
+    context.events.subscribe(WinEvent, lambda event: handle_win(context, event))
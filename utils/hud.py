@@ -0,0 +1,129 @@
+"""Cached rendering of the texts of the game (HP counters, winner banner and profiler overlay)."""
+from collections import OrderedDict
+from typing import Tuple
+
+from pygame.font import Font
+from pygame.surface import Surface
+
+from utils.config import HP_FONT, WINNER_FONT, WHITE, BLACK, INIT_HEALTH
+from utils.config import TEXT_CACHE_SIZE, PROFILER_FONT
+from utils.profiler import FrameProfiler, PROFILER_PERCENTILES
+from utils.resources import get_font
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Font rasterization is expensive, and the texts of the game only change a few
+    times per match, so each text is rendered once and reused while it is in the
+    cache.
+    """
+
+    def __init__(self, max_size: int):
+        """TextCache constructor.
+
+        Args:
+            max_size: The maximum number of surfaces kept in the cache.
+        """
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(self, font: Font, text: str, color: Tuple[int, int, int]) -> Surface:
+        """Returns the surface of a text, rendering it only if it is not cached.
+
+        Note: The returned surface is shared, so it must not be modified.
+
+        Args:
+            font: The Font object to render the text with.
+            text: The text to render.
+            color: RGB triplet with the color of the text.
+
+        Returns:
+            The Surface object with the (antialiased) text.
+        """
+        key = (font, text, color)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.max_size:
+                self._surfaces.popitem(last=False)  # Remove the least recently used
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+    def clear(self) -> None:
+        """Removes all the surfaces from the cache."""
+        self._surfaces.clear()
+
+
+TEXT_CACHE = TextCache(TEXT_CACHE_SIZE)
+
+
+def render_hp_text(health: int) -> Surface:
+    """Returns the surface with the HP counter of a spaceship.
+
+    Args:
+        health: The health of the spaceship.
+
+    Returns:
+        The Surface object with the text.
+    """
+    return TEXT_CACHE.render(get_font(HP_FONT), f"HP: {health}", WHITE)
+
+
+def render_winner_text(winner_name: str) -> Surface:
+    """Returns the surface with the winner banner.
+
+    Args:
+        winner_name: The name of the winner spaceship.
+
+    Returns:
+        The Surface object with the text.
+    """
+    return TEXT_CACHE.render(get_font(WINNER_FONT), f"{winner_name} wins", WHITE)
+
+
+def prerender_hp_texts(max_health: int = INIT_HEALTH) -> None:
+    """Renders all the possible HP counters in advance, so no frame of a match
+    has to rasterize text.
+
+    The cache grows if needed, so the counters fit in it along with
+    TEXT_CACHE_SIZE other texts.
+
+    Args:
+        max_health: The highest counter shown, e.g. the health of a whole team
+            (team_size * INIT_HEALTH).
+    """
+    TEXT_CACHE.max_size = max(TEXT_CACHE.max_size, max_health + 1 + TEXT_CACHE_SIZE)
+    for health in range(max_health + 1):
+        render_hp_text(health)
+
+
+def render_profiler_overlay(profiler: FrameProfiler) -> Surface:
+    """Renders a panel with the statistics of the frame phases.
+
+    The statistics change in every frame, so the texts are not cached. The
+    panel should be rendered every few frames and reused in between.
+
+    Args:
+        profiler: The FrameProfiler with the timings of the frames.
+
+    Returns:
+        The Surface object with the panel.
+    """
+    header = "phase (ms)   mean " + " ".join(f"{f'p{p}':>6}" for p in PROFILER_PERCENTILES)
+    font = get_font(PROFILER_FONT)
+    lines = [font.render(line, True, WHITE)
+             for line in [header] + profiler.get_summary_lines()]
+    panel = Surface((max(line.get_width() for line in lines),
+                     sum(line.get_height() for line in lines)))
+    panel.fill(BLACK)
+    y_pos = 0
+    for line in lines:
+        panel.blit(line, (0, y_pos))
+        y_pos += line.get_height()
+    return panel
@@ -1,7 +0,0 @@
-import pygame
-
-
-RIGHT_HIT = pygame.USEREVENT + 1
-LEFT_HIT = pygame.USEREVENT + 2
-
-WIN = pygame.USEREVENT + 3
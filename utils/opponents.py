@@ -0,0 +1,361 @@
+"""Computer controlled opponents that decide the inputs of a spaceship every tick.
+
+The opponents only read the GameContext and return the input flags of a
+spaceship for the next utils.simulation.step(), so they can replace a player
+in game_loop() or play against the agents in the training environments.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.classes.bullet_pool import BulletPool
+from utils.classes.game_context import GameContext, GameSnapshot
+from utils.classes.spaceship import Spaceship
+from utils.classes.spaceship_store import SpaceshipStore
+from utils.config import VEL, BULLET_VEL, LEFT_SPACESHIP_FILE, RIGHT_SPACESHIP_FILE
+from utils.config import OPPONENT_DODGE_TICKS, OPPONENT_SEARCH_DEPTH
+from utils.config import OPPONENT_DECISION_TICKS, OPPONENT_TIME_BUDGET
+from utils.simulation import NO_INPUT, MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN, SHOOT
+from utils.simulation import step
+
+
+# Movements tried by the lookahead opponent in each decision
+SEARCH_INPUTS = (NO_INPUT, MOVE_UP, MOVE_DOWN, MOVE_LEFT, MOVE_RIGHT)
+
+# Scores of the simulated futures of the lookahead opponent
+DAMAGE_SCORE = 1.0  # For each point of damage dealt, or minus for each point received
+WIN_SCORE = 100.0
+ALIGNMENT_SCORE = 0.5  # For being aligned with the closest enemy at the end
+THREAT_SCORE = -0.5  # For having an enemy bullet coming at the end
+
+
+class Opponent:
+    """Base class of the computer controlled opponents."""
+
+    def start_tick(self, context: GameContext) -> None:
+        """Prepares the decisions of a tick, before the get_inputs() calls of its spaceships.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+        """
+
+    def get_inputs(self, context: GameContext, spaceship: Spaceship) -> int:
+        """Decides the inputs of a spaceship for the next tick.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+            spaceship: The spaceship controlled by the opponent.
+
+        Returns:
+            An int with the input flags of the spaceship.
+        """
+        raise NotImplementedError
+
+
+def get_closest_enemy(context: GameContext, spaceship: Spaceship) -> Optional[Spaceship]:
+    """Finds the alive enemy spaceship that is vertically closest to a spaceship.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        spaceship: The spaceship whose enemies are searched.
+
+    Returns:
+        The closest enemy spaceship, or None if all of them are dead.
+    """
+    y_pos, team = spaceship.y, spaceship.team
+    enemies = [enemy for enemy in context.spaceships if enemy.team != team and not enemy.is_dead()]
+    if not enemies:
+        return None
+    return min(enemies, key=lambda enemy: abs(enemy.y - y_pos))
+
+
+def find_threat(context: GameContext,
+                spaceship: Spaceship,
+                max_ticks: int,
+                offset: int = 0) -> Optional[float]:
+    """Finds the first enemy bullet that will hit a spaceship if it doesn't move.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        spaceship: The spaceship that the bullets could hit.
+        max_ticks: The number of ticks ahead to look for the bullets.
+        offset: The vertical offset of the spaceship body, to look for the
+            bullets that would hit it after a move.
+
+    Returns:
+        The vertical center of the bullet, or None if no bullet hits the
+        spaceship within max_ticks ticks.
+    """
+    body = spaceship.body.move(0, offset)
+    bullets = context.bullets
+    slots = bullets.get_slots()
+    teams = context.ships.team
+    threat, threat_ticks = None, max_ticks + 1
+    for x_pos, y_pos, width, height, velocity, owner in zip(
+            bullets.x[slots].tolist(), bullets.y[slots].tolist(),
+            bullets.width[slots].tolist(), bullets.height[slots].tolist(),
+            bullets.velocity[slots].tolist(), bullets.owner[slots].tolist()):
+        if teams[owner] == spaceship.team or y_pos >= body.bottom or y_pos + height <= body.y:
+            continue
+        if velocity > 0:
+            passed, distance = x_pos >= body.right, body.x - (x_pos + width)
+        else:
+            passed, distance = x_pos + width <= body.x, x_pos - body.right
+        distance = max(distance, 0)  # (the bullet can be already over the body)
+        if not passed and distance < threat_ticks * abs(velocity):
+            threat, threat_ticks = y_pos + height / 2, distance // abs(velocity)
+    return threat
+
+
+class HeuristicOpponent(Opponent):
+    """Scripted opponent that dodges the incoming bullets and aims at the closest enemy.
+
+    If an enemy bullet will hit the spaceship within dodge_ticks ticks, the
+    spaceship moves vertically away from it. Otherwise it moves towards the
+    height of the closest enemy, unless the move gets it in the way of a bullet,
+    and it shoots when a bullet would hit the enemy.
+    """
+
+    def __init__(self, dodge_ticks: int = OPPONENT_DODGE_TICKS):
+        """HeuristicOpponent constructor.
+
+        Args:
+            dodge_ticks: The number of ticks ahead that the incoming bullets are
+                looked for.
+        """
+        self.dodge_ticks = dodge_ticks
+
+    def get_inputs(self, context: GameContext, spaceship: Spaceship) -> int:
+        if spaceship.is_dead():
+            return NO_INPUT
+        body = spaceship.body
+        threat = find_threat(context, spaceship, self.dodge_ticks)
+        if threat is not None:
+            # Move away from the bullet, unless the border of the field is there
+            ships = context.ships
+            can_move_up = body.y > ships.move_min[1, spaceship.index]
+            can_move_down = body.y < ships.move_max[1, spaceship.index]
+            if (threat > body.centery and can_move_up) or not can_move_down:
+                return MOVE_UP
+            return MOVE_DOWN
+
+        inputs = self.aim(context, spaceship)
+        if inputs & (MOVE_UP | MOVE_DOWN):
+            offset = -VEL if inputs & MOVE_UP else VEL
+            if find_threat(context, spaceship, self.dodge_ticks, offset) is not None:
+                inputs &= ~(MOVE_UP | MOVE_DOWN)
+        return inputs
+
+    @staticmethod
+    def aim(context: GameContext, spaceship: Spaceship) -> int:
+        """Decides the inputs to aim at the closest enemy.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+            spaceship: The spaceship that aims.
+
+        Returns:
+            An int with the flags to move towards the height of the closest
+            enemy, with SHOOT if a bullet fired now would hit it.
+        """
+        enemy = get_closest_enemy(context, spaceship)
+        if enemy is None:
+            return NO_INPUT
+        inputs = NO_INPUT
+        offset = enemy.body.centery - spaceship.body.centery
+        if offset < -VEL:
+            inputs |= MOVE_UP
+        elif offset > VEL:
+            inputs |= MOVE_DOWN
+        if abs(offset) < enemy.height // 2:
+            inputs |= SHOOT
+        return inputs
+
+
+class SearchTimeout(Exception):
+    """The time budget of a search ran out."""
+
+
+class LookaheadOpponent(Opponent):
+    """Opponent that searches the simulated futures of its decisions within a time budget.
+
+    Every decision_ticks ticks the opponent copies the game to a private
+    headless context (see GameContext.snapshot()), where the events of the
+    simulated ticks don't reach the handlers of the game. There it searches
+    depth first the sequences of up to max_depth decisions, each one a movement
+    of SEARCH_INPUTS held for decision_ticks ticks, assuming that the other
+    spaceships stay still. The futures are scored with the damage dealt and
+    received, the end of the game, the final alignment with the closest enemy
+    and the enemy bullets still coming. The bullets take longer than the
+    searched futures to cross the field, so the shots are not searched: the
+    spaceship shoots every tick that it is aligned with an enemy. For the same
+    reason the bullets about to hit the spaceship are dodged by the
+    HeuristicOpponent, without searching.
+
+    The depth grows one decision at a time (iterative deepening) until the
+    time budget runs out, and the first decision of the best sequence of the
+    deepest finished search is used. If not even a single decision could be
+    searched, the HeuristicOpponent decides. The budget is shared by all the
+    spaceships planned in a tick, from the start_tick() call of the tick.
+    """
+
+    def __init__(self,
+                 max_depth: int = OPPONENT_SEARCH_DEPTH,
+                 decision_ticks: int = OPPONENT_DECISION_TICKS,
+                 time_budget: float = OPPONENT_TIME_BUDGET):
+        """LookaheadOpponent constructor.
+
+        Args:
+            max_depth: The maximum number of decisions searched ahead.
+            decision_ticks: The number of ticks that each decision is held.
+            time_budget: The milliseconds of search allowed in a tick, for all
+                the spaceships of the opponent. The search checks it before
+                simulating each decision, so it is only exceeded by the
+                simulation of one decision. Without start_tick() calls each
+                plan() has its own budget.
+        """
+        self.max_depth = max_depth
+        self.decision_ticks = decision_ticks
+        self.time_budget = time_budget
+        self.fallback = HeuristicOpponent()
+        self._shadow: Optional[GameContext] = None
+        self._plans: Dict[int, Tuple[int, int]] = {}  # Index -> (inputs, ticks left)
+        self._ships: Optional[SpaceshipStore] = None  # Store of the game of the plans
+        self._deadline: Optional[int] = None  # Deadline of the tick, see start_tick()
+
+    def _get_shadow(self, context: GameContext) -> GameContext:
+        """Returns the private context to simulate the futures of a game, created on first use."""
+        shadow = self._shadow
+        if shadow is None or len(shadow.ships) != len(context.ships) \
+                or shadow.bullets.capacity != context.bullets.capacity \
+                or shadow.barrier != context.barrier \
+                or (shadow.width, shadow.height) != (context.width, context.height):
+            store = SpaceshipStore(len(context.ships))
+            spaceships = [Spaceship(LEFT_SPACESHIP_FILE if spaceship.side == "left" else RIGHT_SPACESHIP_FILE,
+                                    spaceship.side, (0, 0), store=store)
+                          for spaceship in context.spaceships]
+            shadow = GameContext(game_window=None,
+                                 barrier=context.barrier.copy(),
+                                 spaceships=spaceships,
+                                 bullets=BulletPool(context.bullets.capacity, context.bullets.n_owners),
+                                 field_size=(context.width, context.height))
+            self._shadow = shadow
+        return shadow
+
+    def start_tick(self, context: GameContext) -> None:
+        self._deadline = time.perf_counter_ns() + int(self.time_budget * 1e6)
+
+    def get_inputs(self, context: GameContext, spaceship: Spaceship) -> int:
+        if context.ships is not self._ships:
+            # The game was restarted (or is another one), the plans are stale
+            self._plans.clear()
+            self._ships = context.ships
+        if spaceship.is_dead():
+            return NO_INPUT
+        if find_threat(context, spaceship, self.fallback.dodge_ticks) is not None:
+            # A dodge takes longer than the searched futures, the heuristic does it
+            self._plans.pop(spaceship.index, None)
+            return self.fallback.get_inputs(context, spaceship)
+        inputs, ticks_left = self._plans.get(spaceship.index, (NO_INPUT, 0))
+        if ticks_left == 0:
+            inputs, ticks_left = self.plan(context, spaceship), self.decision_ticks
+        self._plans[spaceship.index] = (inputs, ticks_left - 1)
+        return inputs | (self.fallback.aim(context, spaceship) & SHOOT)
+
+    def plan(self, context: GameContext, spaceship: Spaceship) -> int:
+        """Searches the best decision of a spaceship within the time budget.
+
+        Args:
+            context: GameContext object with the context variables of the game.
+            spaceship: The spaceship controlled by the opponent.
+
+        Returns:
+            An int with the movement flags of the decision.
+        """
+        deadline = self._deadline
+        if deadline is None:
+            deadline = time.perf_counter_ns() + int(self.time_budget * 1e6)
+        shadow = self._get_shadow(context)
+        shadow.restore(context.snapshot())
+        root = shadow.snapshot()
+        # The move of the heuristic is tried first, so it is kept on ties
+        default = self.fallback.get_inputs(context, spaceship) & ~SHOOT
+        decisions = (default,) + tuple(inputs for inputs in SEARCH_INPUTS if inputs != default)
+        best_inputs = None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                best_inputs = self._search(shadow, root, shadow.spaceships[spaceship.index],
+                                           decisions, depth, deadline)[1]
+        except SearchTimeout:
+            pass
+        if best_inputs is None:
+            return default
+        return best_inputs
+
+    def _search(self,
+                shadow: GameContext,
+                snapshot: GameSnapshot,
+                spaceship: Spaceship,
+                decisions: Tuple[int, ...],
+                depth: int,
+                deadline: int) -> Tuple[float, int]:
+        """Searches the best sequence of decisions from a state.
+
+        Args:
+            shadow: The private context of the simulations.
+            snapshot: The state to search from.
+            spaceship: The spaceship of the shadow context controlled by the opponent.
+            decisions: The inputs to try in the first decision, in order of preference.
+            depth: The number of decisions to search.
+            deadline: The time.perf_counter_ns() at which the search times out.
+
+        Returns:
+            A tuple (score, inputs) with the score of the best sequence and its
+            first decision.
+        """
+        best_score, best_inputs = float("-inf"), NO_INPUT
+        inputs = [NO_INPUT] * len(shadow.ships)
+        for decision in decisions:
+            if time.perf_counter_ns() > deadline:
+                raise SearchTimeout()
+            shadow.restore(snapshot)
+            inputs[spaceship.index] = decision
+            score, ended = self._simulate(shadow, spaceship, inputs)
+            if not ended:
+                if depth > 1:
+                    score += self._search(shadow, shadow.snapshot(), spaceship, SEARCH_INPUTS,
+                                          depth - 1, deadline)[0]
+                else:
+                    score += self._evaluate(shadow, spaceship)
+            if score > best_score:
+                best_score, best_inputs = score, decision
+        return best_score, best_inputs
+
+    def _simulate(self, shadow: GameContext, spaceship: Spaceship, inputs: List[int]) -> Tuple[float, bool]:
+        """Holds a decision for decision_ticks ticks.
+
+        Returns:
+            A tuple (score, ended) with the score of the damage of the ticks (and
+            of the end of the game) and if the game ended.
+        """
+        score = 0.0
+        for _ in range(self.decision_ticks):
+            for target, damage in step(shadow, *inputs):
+                score += DAMAGE_SCORE * damage if target.team != spaceship.team else -DAMAGE_SCORE * damage
+            if spaceship.is_dead():
+                return score - WIN_SCORE, True
+            if get_closest_enemy(shadow, spaceship) is None:
+                return score + WIN_SCORE, True
+        return score, False
+
+    def _evaluate(self, shadow: GameContext, spaceship: Spaceship) -> float:
+        """Scores the final state of a simulated future.
+
+        The spaceship scores for being aligned with the closest enemy, and it
+        loses score if an enemy bullet is coming (see find_threat()).
+        """
+        enemy = get_closest_enemy(shadow, spaceship)
+        score = ALIGNMENT_SCORE * (1 - abs(enemy.y - spaceship.y) / shadow.height)
+        # (any bullet coming, moving away horizontally only delays the hit)
+        if find_threat(shadow, spaceship, shadow.width // BULLET_VEL) is not None:
+            score += THREAT_SCORE
+        return score
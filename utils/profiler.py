@@ -0,0 +1,119 @@
+"""Low-overhead timing of the phases of each frame of the game."""
+import json
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Phases of an iteration of utils.game_api.game_loop()
+GAME_LOOP_PHASES = ("events", "inputs", "simulation", "render", "wait")
+# Phases of a step of dqn.game_env.GameEnv
+ENV_STEP_PHASES = ("simulation", "reward", "render", "observation")
+
+PROFILER_PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    """Class that records the time spent in each phase of the last frames.
+
+    The durations of the phases of a frame are accumulated in a small Python
+    list with time.perf_counter_ns(), and copied to a preallocated ring buffer
+    with the last frames when the frame ends. The statistics (percentiles) are
+    only computed when they are requested.
+
+    Usage:
+        profiler.start_frame()
+        ...  # Phase 0
+        profiler.mark(0)
+        ...  # Phase 1
+        profiler.mark(1)
+        profiler.end_frame()
+    """
+
+    def __init__(self,
+                 phases: Sequence[str],
+                 capacity: int = 600,
+                 dump_path: Optional[str] = None,
+                 dump_interval: int = 600):
+        """FrameProfiler constructor.
+
+        Args:
+            phases: The names of the phases of a frame, in order.
+            capacity: The number of last frames kept to compute the statistics.
+            dump_path: Optional path of a .csv or .json file where the statistics
+                are written periodically (see dump()).
+            dump_interval: The number of frames between dumps.
+        """
+        self.phases = tuple(phases)
+        self.capacity = capacity
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.n_frames = 0  # Total number of recorded frames
+        self._timings = np.zeros((capacity, len(self.phases)), dtype=np.int64)
+        self._frame_timings = [0] * len(self.phases)
+        self._last_time = 0
+
+    def start_frame(self) -> None:
+        """Starts the timing of a new frame."""
+        self._frame_timings = [0] * len(self.phases)
+        self._last_time = time.perf_counter_ns()
+
+    def mark(self, phase: int) -> None:
+        """Adds the time since the previous mark (or the frame start) to a phase.
+
+        Args:
+            phase: The index of the phase that just finished.
+        """
+        now = time.perf_counter_ns()
+        self._frame_timings[phase] += now - self._last_time
+        self._last_time = now
+
+    def end_frame(self) -> None:
+        """Stores the timings of the current frame in the ring buffer."""
+        self._timings[self.n_frames % self.capacity] = self._frame_timings
+        self.n_frames += 1
+        if self.dump_path is not None and self.n_frames % self.dump_interval == 0:
+            self.dump(self.dump_path)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Computes the statistics of the phases over the stored frames.
+
+        Returns:
+            A dict with the mean and the percentiles (PROFILER_PERCENTILES) in
+            milliseconds of each phase and of the whole frame ("frame").
+        """
+        timings = self._timings[:min(self.n_frames, self.capacity)] / 1e6
+        if len(timings) == 0:
+            return {}
+        timings = np.concatenate((timings, timings.sum(axis=1, keepdims=True)), axis=1)
+        percentiles = np.percentile(timings, PROFILER_PERCENTILES, axis=0)
+        stats = {}
+        for phase_idx, phase in enumerate(self.phases + ("frame",)):
+            stats[phase] = {"mean_ms": float(timings[:, phase_idx].mean())}
+            for percentile, value in zip(PROFILER_PERCENTILES, percentiles[:, phase_idx]):
+                stats[phase][f"p{percentile}_ms"] = float(value)
+        return stats
+
+    def get_summary_lines(self) -> List[str]:
+        """Returns a line of text with the statistics of each phase."""
+        return [f"{phase:>11}: " + " ".join(f"{value:6.2f}" for value in phase_stats.values())
+                for phase, phase_stats in self.get_stats().items()]
+
+    def dump(self, file_path: str) -> None:
+        """Writes the statistics to a file (replacing its content).
+
+        Args:
+            file_path: The path of the file. If it ends with ".json" the
+                statistics are written as JSON, otherwise as CSV.
+        """
+        stats = self.get_stats()
+        with open(file_path, "w") as dump_file:
+            if file_path.endswith(".json"):
+                json.dump({"n_frames": self.n_frames, "phases": stats}, dump_file, indent=2)
+                return
+            columns = ["mean_ms"] + [f"p{percentile}_ms" for percentile in PROFILER_PERCENTILES]
+            dump_file.write(",".join(["phase"] + columns) + "\n")
+            for phase, phase_stats in stats.items():
+                dump_file.write(",".join(
+                    [phase] + [f"{phase_stats[column]:.4f}" for column in columns]) + "\n")
@@ -0,0 +1,143 @@
+"""Recording and replay of matches as logs of the per-tick inputs.
+
+A recording is a binary file with:
+    - A header with the magic bytes, the format version, the number of ships
+      and the seed of the game.
+    - One record per tick with the input flags of every ship (one byte each).
+    - A footer with the number of ticks and the hash of the final game state.
+
+Since the simulation is deterministic given the seed and the inputs, the match
+can be re-simulated headlessly from the log, and the final state hash verifies
+that the replay matches the recorded match.
+"""
+import hashlib
+import struct
+from typing import BinaryIO, NamedTuple, Optional
+
+import numpy as np
+
+from utils.classes.event_bus import WinEvent
+from utils.classes.game_context import GameContext
+from utils.game_utils import create_barrier, create_spaceships, restart_game
+from utils.simulation import step
+
+
+RECORDING_MAGIC = b"SSRL"
+RECORDING_VERSION = 1
+HEADER_FORMAT = struct.Struct("<4sBBq")  # magic, version, number of ships, seed
+FOOTER_FORMAT = struct.Struct("<Q16s")  # number of ticks, final state hash
+
+
+class Recording(NamedTuple):
+    """Contents of a recording file."""
+    seed: int
+    inputs: np.ndarray  # (n_ticks, n_ships) uint8 input flags
+    state_hash: bytes  # Hash of the game state after the last tick
+
+
+def compute_state_hash(context: GameContext) -> bytes:
+    """Computes a hash of the simulation state of a game.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+
+    Returns:
+        The 16 bytes digest of the spaceships and bullets state.
+    """
+    ships = context.ships
+    ships_state = np.stack((*ships.position, ships.health), axis=1)[:len(ships)].astype(np.int64)
+    bullets = context.bullets
+    slots = bullets.get_slots()
+    digest = hashlib.blake2b(ships_state.tobytes(), digest_size=16)
+    for array in (bullets.x, bullets.y, bullets.owner, bullets.damage):
+        digest.update(array[slots].astype(np.int64).tobytes())
+    return digest.digest()
+
+
+class InputRecorder:
+    """Class that writes the inputs of a match to a recording file."""
+
+    def __init__(self, file_path: str, seed: int, n_ships: int = 2):
+        """InputRecorder constructor.
+
+        Args:
+            file_path: The path of the recording file to create.
+            seed: The seed of the recorded game.
+            n_ships: The number of ships with inputs in each tick.
+        """
+        self.n_ships = n_ships
+        self.n_ticks = 0
+        self._file: Optional[BinaryIO] = open(file_path, "wb")
+        self._file.write(HEADER_FORMAT.pack(RECORDING_MAGIC, RECORDING_VERSION, n_ships, seed))
+
+    def record(self, *inputs: int) -> None:
+        """Writes the input flags of the ships for one tick.
+
+        Args:
+            inputs: The input flags of each ship, e.g. (left_inputs, right_inputs).
+        """
+        self._file.write(bytes(inputs))
+        self.n_ticks += 1
+
+    def close(self, context: GameContext) -> None:
+        """Writes the footer with the final state of the game and closes the file.
+
+        Args:
+            context: GameContext object of the recorded game, after the last tick.
+        """
+        self._file.write(FOOTER_FORMAT.pack(self.n_ticks, compute_state_hash(context)))
+        self._file.close()
+        self._file = None
+
+
+def read_recording(file_path: str) -> Recording:
+    """Reads a recording file.
+
+    Args:
+        file_path: The path of the recording file.
+
+    Returns:
+        A Recording with the contents of the file.
+    """
+    with open(file_path, "rb") as recording_file:
+        data = recording_file.read()
+    magic, version, n_ships, seed = HEADER_FORMAT.unpack_from(data)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError(f"The file \"{file_path}\" is not a valid recording.")
+    n_ticks, state_hash = FOOTER_FORMAT.unpack_from(data, len(data) - FOOTER_FORMAT.size)
+    inputs = np.frombuffer(data, dtype=np.uint8, count=n_ticks * n_ships,
+                           offset=HEADER_FORMAT.size).reshape(n_ticks, n_ships)
+    return Recording(seed=seed, inputs=inputs, state_hash=state_hash)
+
+
+def replay_recording(recording: Recording) -> GameContext:
+    """Re-simulates a recorded match headlessly at maximum speed.
+
+    Args:
+        recording: The Recording of the match.
+
+    Returns:
+        The GameContext of the game after the last tick.
+    """
+    context = GameContext(game_window=None,
+                          barrier=create_barrier(),
+                          spaceships=create_spaceships(recording.inputs.shape[1] // 2),
+                          seed=recording.seed)
+    # The interactive game restarts after a win
+    context.events.subscribe(WinEvent, lambda event: restart_game(context))
+    for inputs in recording.inputs.tolist():
+        step(context, *inputs)
+    return context
+
+
+def verify_recording(file_path: str) -> bool:
+    """Replays a recording file and checks that it reaches the recorded final state.
+
+    Args:
+        file_path: The path of the recording file.
+
+    Returns:
+        A bool that says if the final state of the replay matches the recording.
+    """
+    recording = read_recording(file_path)
+    return compute_state_hash(replay_recording(recording)) == recording.state_hash
@@ -0,0 +1,92 @@
+"""Fonts and sounds of the game, created on first use.
+
+Nothing is initialized when this module is imported, so the processes that
+never draw texts or play sounds (e.g. the environment workers) don't pay for
+the font lookups, the mixer initialization or the decoding of the sounds, and
+they don't need an audio device.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import pygame
+from pygame.font import Font
+
+from utils.config import ASSETS_PATH, VOLUME, SILENT_ENV_VAR
+from utils.config import BULLET_HIT_SOUND_FILE, BULLET_SHOOT_SOUND_FILE
+
+
+# Created fonts by (name, size)
+_FONTS: Dict[Tuple[str, int], Font] = {}
+_silent = os.environ.get(SILENT_ENV_VAR) == "1"
+
+
+def get_font(font: Tuple[str, int]) -> Font:
+    """Returns a system font, initializing the font module the first time.
+
+    Args:
+        font: A tuple (name, size) with the font, e.g. utils.config.HP_FONT.
+
+    Returns:
+        The Font object (shared by all the callers).
+    """
+    font_object = _FONTS.get(font)
+    if font_object is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font_object = pygame.font.SysFont(*font)
+        _FONTS[font] = font_object
+    return font_object
+
+
+def set_silent(silent: bool) -> None:
+    """Enables or disables the silent mode, where playing a sound does nothing.
+
+    Args:
+        silent: True to disable the sounds.
+    """
+    global _silent
+    _silent = silent
+
+
+def is_silent() -> bool:
+    """Checks if the silent mode is enabled."""
+    return _silent
+
+
+class LazySound:
+    """Class for a sound that is only loaded the first time it is played."""
+
+    def __init__(self, sound_file: str, volume: float = VOLUME):
+        """LazySound constructor.
+
+        Args:
+            sound_file: str with the name of the sound file in the assets folder.
+            volume: The volume of the sound in the [0, 1] range.
+        """
+        self.sound_file = sound_file
+        self.volume = volume
+        self._sound: Optional[pygame.mixer.Sound] = None
+
+    def play(self) -> None:
+        """Plays the sound. It does nothing in silent mode.
+
+        If the mixer can't be initialized (e.g. there is no audio device), the
+        silent mode is enabled.
+        """
+        if _silent:
+            return
+        if self._sound is None:
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self._sound = pygame.mixer.Sound(os.path.join(ASSETS_PATH, self.sound_file))
+            except pygame.error as error:
+                print(f"Error! The sounds are disabled, the mixer can't be used: {error}")
+                set_silent(True)
+                return
+            self._sound.set_volume(self.volume)
+        self._sound.play()
+
+
+BULLET_HIT_SOUND = LazySound(BULLET_HIT_SOUND_FILE)
+BULLET_SHOOT_SOUND = LazySound(BULLET_SHOOT_SOUND_FILE)
@@ -0,0 +1,313 @@
+"""Display-free simulation core of the game.
+
+The functions of this module only read and write the game state stored in the
+GameContext (spaceships, bullets and barrier) and publish the fire, hit and win
+events in the bus of the context. They never touch the display, the pygame
+event queue or the sound mixer, so they can run on hosts without an SDL video
+device. Rendering, sounds and input handling are built on top of this core in
+utils.game_utils.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.classes.bullet import get_spawn_position
+from utils.classes.event_bus import FireEvent, HitEvent, WinEvent
+from utils.classes.game_context import GameContext
+from utils.classes.spaceship import Spaceship
+from utils.config import VEL, BULLET_VEL, MAX_ACTIVE_BULLETS, INIT_HEALTH
+from utils.config import BULLET_WIDTH, BULLET_HEIGHT, BULLET_DAMAGE, SPATIAL_HASH_MIN_PAIRS, SIDES
+from utils.config import VECTORIZED_MOVEMENT_MIN_SHIPS
+
+
+# Input flags of a spaceship for one simulation tick
+NO_INPUT = 0
+MOVE_LEFT = 1 << 0
+MOVE_RIGHT = 1 << 1
+MOVE_UP = 1 << 2
+MOVE_DOWN = 1 << 3
+SHOOT = 1 << 4
+MOVE_FLAGS = MOVE_LEFT | MOVE_RIGHT | MOVE_UP | MOVE_DOWN
+
+# Index of the team of each side (see utils.config.SIDES)
+LEFT = 0
+RIGHT = 1
+
+# Size of the state vector of a game, see encode_state()
+SHIP_STATE_SIZE = 3  # x, y, health
+BULLET_STATE_SIZE = 4  # active, x, y, direction
+SIDE_STATE_SIZE = SHIP_STATE_SIZE + MAX_ACTIVE_BULLETS * BULLET_STATE_SIZE
+STATE_SIZE = 2 * SIDE_STATE_SIZE
+
+
+# Movement requested by each value of the input flags, as a bool array indexed
+# by [negative (left, up) or positive (right, down) direction, axis (x, y), inputs]
+_ALL_INPUTS = np.arange(SHOOT << 1)
+INPUT_DIRECTIONS = np.array([[_ALL_INPUTS & MOVE_LEFT, _ALL_INPUTS & MOVE_UP],
+                             [_ALL_INPUTS & MOVE_RIGHT, _ALL_INPUTS & MOVE_DOWN]]) != 0
+
+
+def move_spaceships(context: GameContext, inputs: Sequence[int]) -> None:
+    """Movement system: moves the alive spaceships inside the area of their team.
+
+    A step in a direction is only done if the spaceship stays inside its area
+    (the limits of the store are checked with the position before the
+    movement). The games with VECTORIZED_MOVEMENT_MIN_SHIPS or more spaceships
+    move both axes of all the spaceships at once on the (2, n_spaceships)
+    position block of the store, the smaller ones (where the overhead of the
+    array operations dominates) move the spaceships one by one.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        inputs: The input flags (MOVE_*) of each spaceship of the store of the
+            context.
+    """
+    ships = context.ships
+    n_ships = len(ships)
+    if n_ships >= VECTORIZED_MOVEMENT_MIN_SHIPS:
+        position = ships.position[:, :n_ships]
+        negative, positive = INPUT_DIRECTIONS[:, :, np.asarray(inputs) * ships.get_alive()]
+        negative &= position > ships.move_min[:, :n_ships]
+        positive &= position < ships.move_max[:, :n_ships]
+        position += VEL * (positive.astype(np.int32) - negative)
+        return
+
+    position, move_min, move_max = ships.position, ships.move_min, ships.move_max
+    for index, flags in enumerate(inputs):
+        if not flags & MOVE_FLAGS or ships.health[index] <= 0:
+            continue
+        x_pos, y_pos = position[:, index].tolist()
+        if flags & MOVE_LEFT and x_pos > move_min[0, index]:
+            position[0, index] -= VEL
+        if flags & MOVE_RIGHT and x_pos < move_max[0, index]:
+            position[0, index] += VEL
+        if flags & MOVE_UP and y_pos > move_min[1, index]:
+            position[1, index] -= VEL
+        if flags & MOVE_DOWN and y_pos < move_max[1, index]:
+            position[1, index] += VEL
+
+
+def move_spaceship(context: GameContext, spaceship: Spaceship, inputs: int) -> None:
+    """Moves a spaceship inside its area following the movement input flags.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        spaceship: The spaceship to move.
+        inputs: int with the input flags (MOVE_*) of the spaceship.
+    """
+    all_inputs = [0] * len(context.ships)
+    all_inputs[spaceship.index] = inputs
+    move_spaceships(context, all_inputs)
+
+
+def fire_bullet(context: GameContext, spaceship: Spaceship) -> bool:
+    """Fires a new bullet from a spaceship if it has not reached the bullets limit.
+
+    Publishes a FireEvent if the bullet is fired.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        spaceship: The spaceship that shoots.
+
+    Returns:
+        A bool that says if the bullet was fired.
+    """
+    owner = spaceship.index
+    if context.bullets.count(owner) >= MAX_ACTIVE_BULLETS:
+        return False
+
+    x_pos, y_pos = get_spawn_position(spaceship, BULLET_WIDTH, BULLET_HEIGHT)
+    velocity = BULLET_VEL if spaceship.team == LEFT else -BULLET_VEL
+    if context.bullets.spawn(x_pos, y_pos, BULLET_WIDTH, BULLET_HEIGHT,
+                             velocity, BULLET_DAMAGE, owner) < 0:
+        return False
+
+    context.events.publish(FireEvent(shooter=spaceship))
+    return True
+
+
+def fire_bullets(context: GameContext, inputs: Sequence[int]) -> None:
+    """Firing system: fires a bullet from each alive spaceship with the SHOOT flag.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        inputs: The input flags of each spaceship of the store of the context.
+    """
+    for spaceship, flags in zip(context.spaceships, inputs):
+        if flags & SHOOT and not spaceship.is_dead():
+            fire_bullet(context, spaceship)
+
+
+def move_bullets(context: GameContext) -> List[Tuple[Spaceship, int]]:
+    """Moves the bullets and removes the ones that hit a spaceship or leave the field.
+
+    Each of the movement, the hit checks of each alive spaceship and the
+    culling is a single pass over the arrays of the bullet pool. With many
+    spaceships and bullets (SPATIAL_HASH_MIN_PAIRS, if set) the bullets are
+    indexed in the collision grid of the context instead, and each hit check
+    only tests the nearby bullets. A bullet hits the spaceships of the other team, and
+    only the first one it overlaps.
+
+    Note: The damage of the hits is not applied, see resolve_hits().
+
+    Args:
+        context: GameContext object with the context variables of the game.
+
+    Returns:
+        A list with the hits of the tick as (target_spaceship, damage) tuples.
+    """
+    bullets = context.bullets
+    bullets.move()
+
+    hits = []
+    removed = bullets.find_out_of_field(context.width)
+    # Bullets that can hit each team, the ones that hit a spaceship are removed
+    # so they don't hit another spaceship of the team
+    bullet_teams = context.ships.team[bullets.owner]
+    enemy_bullets = [bullet_teams != team for team in range(len(SIDES))]
+    grid = None
+    if SPATIAL_HASH_MIN_PAIRS is not None and len(context.spaceships) * len(bullets) >= SPATIAL_HASH_MIN_PAIRS:
+        grid = context.spatial_hash
+        grid.build(bullets.x, bullets.y, bullets.width, bullets.height, bullets.active)
+    for target in context.spaceships:
+        if target.is_dead():
+            continue
+        if grid is None:
+            hitting = bullets.find_overlaps(target.body)
+        else:
+            hitting = np.zeros_like(removed)
+            hitting[grid.query(target.body)] = True
+        hitting &= enemy_bullets[target.team]
+        damages = bullets.damage[hitting].tolist()
+        if damages:
+            hits.extend((target, damage) for damage in damages)
+            enemy_bullets[target.team] &= ~hitting
+            removed |= hitting
+    bullets.release(np.flatnonzero(removed))
+
+    return hits
+
+
+def apply_hit(target: Spaceship, damage: int) -> bool:
+    """Applies the damage of a bullet hit to a spaceship.
+
+    Args:
+        target: The spaceship that was hit.
+        damage: The damage dealt by the bullet.
+
+    Returns:
+        A bool that says if the hit killed the spaceship.
+    """
+    was_alive = not target.is_dead()
+    target.health -= damage
+    return was_alive and target.is_dead()
+
+
+def resolve_hits(context: GameContext, hits: List[Tuple[Spaceship, int]]) -> None:
+    """Damage system: applies the damage of the hits and publishes their events.
+
+    A HitEvent is published for each hit, followed by a WinEvent with the leader
+    of the other team if the hit killed the last alive spaceship of the team of
+    the target.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        hits: A list with the hits as (target_spaceship, damage) tuples.
+    """
+    for target, damage in hits:
+        killed = apply_hit(target, damage)
+        context.events.publish(HitEvent(target=target, damage=damage, killed=killed))
+        # (the target may be from a game restarted by a previous event handler)
+        if killed and target.store is context.ships \
+                and context.ships.count_alive(target.team) == 0:
+            winner = context.left_spaceship if target.team == RIGHT else context.right_spaceship
+            context.events.publish(WinEvent(winner=winner))
+
+
+def get_winner(context: GameContext) -> Optional[Spaceship]:
+    """Checks if the game has a winner.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+
+    Returns:
+        The leader of the winner team or None if both teams have alive spaceships.
+    """
+    if context.ships.count_alive(RIGHT) == 0:
+        return context.left_spaceship
+    if context.ships.count_alive(LEFT) == 0:
+        return context.right_spaceship
+    return None
+
+
+def step(context: GameContext, *inputs: int) -> List[Tuple[Spaceship, int]]:
+    """Advances the simulation one tick.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        *inputs: int with the input flags of each spaceship, in the order of
+            context.spaceships (left_inputs, right_inputs in the two player game).
+
+    Returns:
+        A list with the hits of the tick as (target_spaceship, damage) tuples. The
+        damage of the hits is already applied.
+    """
+    if len(inputs) != len(context.ships):
+        raise ValueError(f"Expected the inputs of {len(context.ships)} spaceships, "
+                         f"got {len(inputs)}.")
+    fire_bullets(context, inputs)
+
+    hits = move_bullets(context)
+    resolve_hits(context, hits)
+
+    move_spaceships(context, inputs)
+
+    return hits
+
+
+def encode_state(context: GameContext,
+                 out: Optional[np.ndarray] = None,
+                 mirror: bool = False) -> np.ndarray:
+    """Builds a compact vector with the state of the game.
+
+    For each side (left first) the vector has the (x, y, health) of the leader
+    spaceship of the team (the only one in the two player game) followed by a
+    table of MAX_ACTIVE_BULLETS rows with the (active, x, y, direction) of its
+    bullets, padded with zeros. Positions are normalized by
+    the field size and health by INIT_HEALTH.
+
+    Args:
+        context: GameContext object with the context variables of the game.
+        out: Optional float32 array with shape (STATE_SIZE,) to write to.
+        mirror: If True the state of the game mirrored horizontally is encoded,
+            so the spaceships swap their sides (e.g. the left spaceship sees
+            itself as the right one in self-play).
+
+    Returns:
+        A float32 array with shape (STATE_SIZE,).
+    """
+    if out is None:
+        out = np.empty(STATE_SIZE, dtype=np.float32)
+    out[:] = 0.0
+    bullets = context.bullets
+    sides = ((LEFT, context.left_spaceship, 1.0), (RIGHT, context.right_spaceship, -1.0))
+    if mirror:
+        sides = ((LEFT, context.right_spaceship, 1.0), (RIGHT, context.left_spaceship, -1.0))
+    for side_idx, spaceship, direction in sides:
+        offset = side_idx * SIDE_STATE_SIZE
+        x_pos = context.width - spaceship.x - spaceship.width if mirror else spaceship.x
+        out[offset] = x_pos / context.width
+        out[offset + 1] = spaceship.y / context.height
+        out[offset + 2] = spaceship.health / INIT_HEALTH
+        offset += SHIP_STATE_SIZE
+        slots = bullets.get_slots(spaceship.index)[:MAX_ACTIVE_BULLETS]
+        table = out[offset:offset + MAX_ACTIVE_BULLETS * BULLET_STATE_SIZE].reshape(
+            MAX_ACTIVE_BULLETS, BULLET_STATE_SIZE)[:len(slots)]
+        bullets_x = bullets.x[slots]
+        if mirror:
+            bullets_x = context.width - bullets_x - bullets.width[slots]
+        table[:, 0] = 1.0
+        table[:, 1] = bullets_x / context.width
+        table[:, 2] = bullets.y[slots] / context.height
+        table[:, 3] = direction
+    return out
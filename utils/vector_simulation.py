@@ -0,0 +1,191 @@
+"""Vectorized simulation core that runs many independent games at once.
+
+The state of all the games is stored in struct-of-arrays NumPy buffers, so one
+tick of every game is a handful of array operations instead of a Python loop
+per game. The rules are the same as the ones of utils.simulation.
+"""
+from typing import Optional
+
+import numpy as np
+
+from utils.config import VEL, BULLET_VEL, MAX_ACTIVE_BULLETS, INIT_HEALTH
+from utils.config import BULLET_WIDTH, BULLET_HEIGHT, BULLET_DAMAGE
+from utils.config import WINDOW_WIDTH, WINDOW_HEIGHT, BARRIER_WIDTH
+from utils.config import SPACESHIP_WIDTH, SPACESHIP_HEIGHT
+from utils.simulation import MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN, SHOOT
+from utils.simulation import SHIP_STATE_SIZE, BULLET_STATE_SIZE, STATE_SIZE
+from utils.simulation import LEFT, RIGHT  # Index of each side in the arrays of the games
+
+# Dimensions of the bodies (the spaceships are rotated 90 degrees)
+SHIP_BODY_WIDTH = SPACESHIP_HEIGHT
+SHIP_BODY_HEIGHT = SPACESHIP_WIDTH
+BULLET_Y_OFFSET = int(SHIP_BODY_HEIGHT / 2 - BULLET_HEIGHT / 2)
+
+BARRIER_X = int(WINDOW_WIDTH / 2 - BARRIER_WIDTH / 2)
+
+# Horizontal limits of the area of each side: [left, right]
+MIN_X = np.array([0, BARRIER_X + BARRIER_WIDTH], dtype=np.int32)
+MAX_X = np.array([BARRIER_X, WINDOW_WIDTH], dtype=np.int32)
+# Horizontal velocity of the bullets of each side
+BULLETS_VEL = np.array([BULLET_VEL, -BULLET_VEL], dtype=np.int32)
+
+
+class VectorGame:
+    """Class that simulates a batch of independent games using NumPy arrays."""
+
+    def __init__(self, num_games: int, seed: Optional[int] = None):
+        """VectorGame constructor.
+
+        Args:
+            num_games: The number of games to simulate.
+            seed: Seed for the random initial positions of the spaceships.
+        """
+        self.num_games = num_games
+        self.rng = np.random.default_rng(seed)
+        # Spaceships state with shape (num_games, 2)
+        self.ship_x = np.zeros((num_games, 2), dtype=np.int32)
+        self.ship_y = np.zeros((num_games, 2), dtype=np.int32)
+        self.health = np.zeros((num_games, 2), dtype=np.int32)
+        # Bullets state with shape (num_games, 2, MAX_ACTIVE_BULLETS)
+        bullets_shape = (num_games, 2, MAX_ACTIVE_BULLETS)
+        self.bullet_x = np.zeros(bullets_shape, dtype=np.int32)
+        self.bullet_y = np.zeros(bullets_shape, dtype=np.int32)
+        self.bullet_active = np.zeros(bullets_shape, dtype=bool)
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Restarts games with the spaceships at random positions.
+
+        Args:
+            mask: A bool array of shape (num_games,) with the games to restart.
+                If None, all the games are restarted.
+        """
+        if mask is None:
+            mask = np.ones(self.num_games, dtype=bool)
+        n_reset = int(mask.sum())
+        if n_reset == 0:
+            return
+
+        left_x = self.rng.integers(
+            0, WINDOW_WIDTH // 2 - BARRIER_WIDTH // 2 - SHIP_BODY_WIDTH, n_reset, endpoint=True)
+        right_x = self.rng.integers(
+            WINDOW_WIDTH // 2 + BARRIER_WIDTH // 2, WINDOW_WIDTH - SHIP_BODY_WIDTH, n_reset, endpoint=True)
+        self.ship_x[mask] = np.stack((left_x, right_x), axis=-1)
+        self.ship_y[mask] = self.rng.integers(
+            0, WINDOW_HEIGHT - SHIP_BODY_HEIGHT, (n_reset, 2), endpoint=True)
+        self.health[mask] = INIT_HEALTH
+        self.bullet_active[mask] = False
+
+    def step(self, inputs: np.ndarray) -> np.ndarray:
+        """Advances all the games one tick.
+
+        Args:
+            inputs: An int array of shape (num_games, 2) with the input flags
+                (see utils.simulation) of the [left, right] spaceships.
+
+        Returns:
+            An int array of shape (num_games, 2) with the damage received by
+            each spaceship in the tick.
+        """
+        self._fire_bullets((inputs & SHOOT) > 0)
+        damage = self._move_bullets()
+        self.health -= damage
+        self._move_spaceships(inputs)
+        return damage
+
+    def _fire_bullets(self, shoot: np.ndarray) -> None:
+        """Fires a bullet from the spaceships that shoot and have a free bullet slot.
+
+        Args:
+            shoot: A bool array of shape (num_games, 2) with the spaceships that shoot.
+        """
+        free_slots = ~self.bullet_active
+        fire = shoot & free_slots.any(axis=-1)
+        game_idx, side_idx = np.nonzero(fire)
+        if len(game_idx) == 0:
+            return
+        slot_idx = free_slots[game_idx, side_idx].argmax(axis=-1)
+
+        ship_x = self.ship_x[game_idx, side_idx]
+        self.bullet_x[game_idx, side_idx, slot_idx] = np.where(
+            side_idx == LEFT, ship_x + SHIP_BODY_WIDTH, ship_x - BULLET_WIDTH)
+        self.bullet_y[game_idx, side_idx, slot_idx] = \
+            self.ship_y[game_idx, side_idx] + BULLET_Y_OFFSET
+        self.bullet_active[game_idx, side_idx, slot_idx] = True
+
+    def _move_bullets(self) -> np.ndarray:
+        """Moves the bullets and removes the ones that hit a spaceship or leave the field.
+
+        Returns:
+            An int array of shape (num_games, 2) with the damage received by
+            each spaceship.
+        """
+        self.bullet_x += BULLETS_VEL[None, :, None]
+
+        # The target of the bullets of each side is the spaceship of the other side
+        target_x = self.ship_x[:, ::-1, None]
+        target_y = self.ship_y[:, ::-1, None]
+        hits = self.bullet_active \
+            & (self.bullet_x < target_x + SHIP_BODY_WIDTH) \
+            & (self.bullet_x + BULLET_WIDTH > target_x) \
+            & (self.bullet_y < target_y + SHIP_BODY_HEIGHT) \
+            & (self.bullet_y + BULLET_HEIGHT > target_y)
+
+        in_field = np.empty_like(self.bullet_active)
+        in_field[:, LEFT] = self.bullet_x[:, LEFT] <= WINDOW_WIDTH
+        in_field[:, RIGHT] = self.bullet_x[:, RIGHT] >= 0
+        self.bullet_active &= in_field & ~hits
+
+        return hits.sum(axis=-1)[:, ::-1] * BULLET_DAMAGE
+
+    def _move_spaceships(self, inputs: np.ndarray) -> None:
+        """Moves the spaceships inside their areas following the input flags.
+
+        Args:
+            inputs: An int array of shape (num_games, 2) with the input flags.
+        """
+        x_pos, y_pos = self.ship_x, self.ship_y
+        move_left = ((inputs & MOVE_LEFT) > 0) & (x_pos - VEL > MIN_X)
+        move_right = ((inputs & MOVE_RIGHT) > 0) \
+            & (x_pos + VEL + SHIP_BODY_WIDTH < MAX_X)
+        move_up = ((inputs & MOVE_UP) > 0) & (y_pos - VEL > 0)
+        move_down = ((inputs & MOVE_DOWN) > 0) \
+            & (y_pos + VEL + SHIP_BODY_HEIGHT < WINDOW_HEIGHT)
+        self.ship_x += VEL * (move_right.astype(np.int32) - move_left)
+        self.ship_y += VEL * (move_down.astype(np.int32) - move_up)
+
+    def is_dead(self) -> np.ndarray:
+        """Checks which spaceships are dead.
+
+        Returns:
+            A bool array of shape (num_games, 2) with the dead spaceships.
+        """
+        return self.health <= 0
+
+    def get_state(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Builds the state vectors of the games, see utils.simulation.encode_state().
+
+        The bullets of each side are in the rows of their slots, so the active
+        rows are not necessarily the first ones of the table.
+
+        Args:
+            out: Optional float32 array of shape (num_games, STATE_SIZE) to write to.
+
+        Returns:
+            A float32 array of shape (num_games, STATE_SIZE).
+        """
+        if out is None:
+            out = np.empty((self.num_games, STATE_SIZE), dtype=np.float32)
+        side_state = out.reshape(self.num_games, 2, -1)
+        side_state[:, :, 0] = self.ship_x / WINDOW_WIDTH
+        side_state[:, :, 1] = self.ship_y / WINDOW_HEIGHT
+        side_state[:, :, 2] = self.health / INIT_HEALTH
+
+        bullets_state = side_state[:, :, SHIP_STATE_SIZE:].reshape(
+            self.num_games, 2, MAX_ACTIVE_BULLETS, BULLET_STATE_SIZE)
+        active = self.bullet_active
+        bullets_state[..., 0] = active
+        bullets_state[..., 1] = np.where(active, self.bullet_x / WINDOW_WIDTH, 0.0)
+        bullets_state[..., 2] = np.where(active, self.bullet_y / WINDOW_HEIGHT, 0.0)
+        bullets_state[..., 3] = np.where(active, np.sign(BULLETS_VEL)[None, :, None], 0.0)
+        return out